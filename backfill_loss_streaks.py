@@ -0,0 +1,15 @@
+"""Fill the raffle_loss_streaks table from existing raffle history.
+
+Raffle loss streaks used to be counted from raffle_entries on every entry.
+They are now stored per user and kept up to date as raffles close, so run
+this once after upgrading (with the bot stopped) to carry existing streaks
+over. It is safe to run again; every streak is rebuilt from scratch.
+
+    python backfill_loss_streaks.py
+"""
+
+from db import DB
+
+if __name__ == "__main__":
+    users = DB().backfill_loss_streaks()
+    print(f"Backfilled loss streaks for {users} users")
@@ -0,0 +1,127 @@
+"""Compare the Gen Alpha cringe word filters on chat-shaped messages.
+
+Times the previous replace-then-24-regexes approach against the single
+compiled alternation in util/brainrot.py and checks that both flag the same
+messages. Needs no database or Discord connection.
+
+    python -m benchmarks.brainrot_matcher --messages 20000
+"""
+
+import argparse
+import random
+import re
+import time
+
+from util.brainrot import BrainrotMatcher
+
+WORDS = [
+    "sigma",
+    "omega",
+    "skibidi",
+    "gyat",
+    "rizz",
+    "boomer",
+    "ohio",
+    "cope",
+    "ratio",
+    "bussin",
+    "mewing",
+    "gronk",
+    "jelq",
+    "griddy",
+    "ligma",
+    "imposter",
+    "amogus",
+    "fanum",
+    "maxxing",
+    "Σ",
+    "erm what the",
+    "erm, what the",
+    "chat",
+    "is this real",
+]
+
+CHAT_WORDS = (
+    "lol nice shot gg wp that was close no way he hit that what a play "
+    "bro is cracked ez clap go next reload rotate b site smoke flash "
+    "why did he peek unlucky lmao wtf hi hello good morning classic "
+    "jett op chamber lurk eco save buy full the round is over"
+).split()
+EMOTES = ["<:hoojKEKW:1059961649412460575>", "<a:hoojPls:1075555123456789012>"]
+
+
+def build_regex(cringe_word: str) -> str:
+    to_return = "(?i)"
+    for c in cringe_word:
+        if c == "l" or c == "i":
+            to_return += "(l|i)" + "+"
+        else:
+            to_return += c + "+"
+
+    return to_return
+
+
+def likely_brain_rot(content: str) -> (bool, str):
+    content = content.replace("1", "i")
+    content = content.replace("3", "e")
+    content = content.replace("4", "a")
+    content = content.replace("5", "s")
+    content = content.replace("0", "o")
+    content = content.replace("7", "t")
+    content = content.replace("$", "s")
+    content = content.replace("|", "l")
+    content = content.replace("/", "l")
+    content = content.replace("\\", "l")
+    content = content.replace("*", "")
+
+    brainrot = [build_regex(word) for word in WORDS]
+
+    for rot in brainrot:
+        found = re.findall(rot, content)
+        if len(found) > 0:
+            return (True, rot)
+
+    return (False, "")
+
+
+def chat_line(rng: random.Random) -> str:
+    words = rng.choices(CHAT_WORDS, k=rng.randint(1, 14))
+    if rng.random() < 0.2:
+        words.insert(rng.randrange(len(words) + 1), rng.choice(EMOTES))
+    if rng.random() < 0.05:
+        words.insert(rng.randrange(len(words) + 1), rng.choice(WORDS))
+    line = " ".join(words)
+    if rng.random() < 0.3:
+        line = line.upper()
+    return line
+
+
+def main(messages: int, seed: int):
+    rng = random.Random(seed)
+    corpus = [chat_line(rng) for _ in range(messages)]
+    matcher = BrainrotMatcher(WORDS)
+
+    mismatches = sum(
+        likely_brain_rot(line)[0] != (matcher.match(line) is not None)
+        for line in corpus
+    )
+    flagged = sum(matcher.match(line) is not None for line in corpus)
+    print(f"{flagged}/{messages} messages flagged, {mismatches} disagreements")
+
+    for name, check in [
+        ("replace+24 regexes", likely_brain_rot),
+        ("compiled matcher", matcher.match),
+    ]:
+        start = time.perf_counter()
+        for line in corpus:
+            check(line)
+        elapsed = (time.perf_counter() - start) / messages
+        print(f"{name:<19} {elapsed * 1_000_000:.1f}us per message")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--messages", type=int, default=20_000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    main(args.messages, args.seed)
@@ -0,0 +1,99 @@
+"""Measure how long the event loop stalls while chat messages accrue points.
+
+Simulates a burst of stream chat messages hitting ``accrue_channel_points``
+through both the blocking ``DB`` facade and the awaitable ``AsyncDB`` one,
+while a probe task records how late each of its sleeps wakes up. Requires the
+MySQL database configured in config.yaml.
+
+    python -m benchmarks.event_loop_lag --messages 2000 --chatters 200
+"""
+
+import argparse
+import asyncio
+import random
+import statistics
+import time
+
+from db import AsyncDB, DB
+
+PROBE_INTERVAL = 0.005
+
+
+async def probe_lag(lags: list[float], stop: asyncio.Event):
+    loop = asyncio.get_running_loop()
+    while not stop.is_set():
+        expected = loop.time() + PROBE_INTERVAL
+        await asyncio.sleep(PROBE_INTERVAL)
+        lags.append(max(0.0, loop.time() - expected))
+
+
+async def sync_on_message(user_id: int):
+    DB().accrue_channel_points(user_id, [])
+
+
+async def async_on_message(user_id: int):
+    await AsyncDB().accrue_channel_points(user_id, [])
+
+
+async def run(handler, messages: int, chatters: int, concurrency: int) -> dict:
+    lags: list[float] = []
+    stop = asyncio.Event()
+    probe = asyncio.create_task(probe_lag(lags, stop))
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def message(user_id: int):
+        async with semaphore:
+            await handler(user_id)
+
+    start = time.perf_counter()
+    await asyncio.gather(
+        *(message(random.randrange(chatters)) for _ in range(messages))
+    )
+    elapsed = time.perf_counter() - start
+    stop.set()
+    await probe
+
+    lags.sort()
+    return {
+        "elapsed": elapsed,
+        "p50": lags[len(lags) // 2] if lags else 0.0,
+        "p99": lags[int(len(lags) * 0.99)] if lags else 0.0,
+        "max": lags[-1] if lags else 0.0,
+        "mean": statistics.fmean(lags) if lags else 0.0,
+    }
+
+
+def report(name: str, result: dict):
+    print(
+        f"{name:<8} elapsed={result['elapsed']:.2f}s"
+        f" lag p50={result['p50'] * 1000:.1f}ms"
+        f" p99={result['p99'] * 1000:.1f}ms"
+        f" max={result['max'] * 1000:.1f}ms"
+        f" mean={result['mean'] * 1000:.1f}ms"
+    )
+
+
+async def main(messages: int, chatters: int, concurrency: int):
+    # Fake user ids far away from real Discord snowflakes
+    base = 10**6
+    report(
+        "sync",
+        await run(
+            lambda uid: sync_on_message(base + uid), messages, chatters, concurrency
+        ),
+    )
+    report(
+        "async",
+        await run(
+            lambda uid: async_on_message(base + uid), messages, chatters, concurrency
+        ),
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--messages", type=int, default=2000)
+    parser.add_argument("--chatters", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=20)
+    args = parser.parse_args()
+    asyncio.run(main(args.messages, args.chatters, args.concurrency))
@@ -0,0 +1,93 @@
+"""Compare the per-user payout loop against the bulk payout path.
+
+Builds a synthetic set of winning prediction entries, pays them out once the
+way predictions used to (a deposit plus a points history write per winner)
+and once through deposit_points_bulk, then removes the synthetic rows.
+Requires the MySQL database configured in config.yaml.
+
+    python -m benchmarks.prediction_payout --entries 10000
+"""
+
+import argparse
+import asyncio
+import random
+import time
+
+from sqlalchemy import delete
+
+from controllers.point_history_controller import PointHistoryController
+from controllers.predictions.payout_prediction_controller import (
+    PayoutPredictionController,
+)
+from db import AsyncDB, DB
+from db.models import ChannelPoints, PointsHistory, PredictionEntry
+from models.transaction import Transaction
+
+# Fake user ids far away from real Discord snowflakes
+BASE_USER_ID = 10**6
+
+
+def synthetic_payouts(entries: int) -> list[tuple[int, int]]:
+    winners = [
+        PredictionEntry(
+            user_id=BASE_USER_ID + i, channel_points=random.randint(1, 5000)
+        )
+        for i in range(entries)
+    ]
+    winning_pot = sum(entry.channel_points for entry in winners)
+    total_points = winning_pot * 2
+    return [
+        (
+            entry.user_id,
+            PayoutPredictionController.calculate_payout(
+                entry, winning_pot, total_points
+            ),
+        )
+        for entry in winners
+    ]
+
+
+async def per_user_payout(payouts: list[tuple[int, int]]):
+    for user_id, payout in payouts:
+        _, new_balance = await AsyncDB().deposit_points(user_id, payout)
+        await PointHistoryController.record_transaction(
+            Transaction(
+                user_id,
+                payout,
+                new_balance - payout,
+                new_balance,
+                "Prediction Payout (benchmark)",
+            )
+        )
+
+
+async def bulk_payout(payouts: list[tuple[int, int]]):
+    await AsyncDB().deposit_points_bulk(payouts, "Prediction Payout (benchmark)")
+
+
+def cleanup(entries: int):
+    user_ids = list(range(BASE_USER_ID, BASE_USER_ID + entries))
+    with DB().session() as sess:
+        sess.execute(delete(ChannelPoints).where(ChannelPoints.user_id.in_(user_ids)))
+        sess.execute(delete(PointsHistory).where(PointsHistory.user_id.in_(user_ids)))
+
+
+async def main(entries: int):
+    payouts = synthetic_payouts(entries)
+    for name, payout in (("per-user", per_user_payout), ("bulk", bulk_payout)):
+        cleanup(entries)
+        start = time.perf_counter()
+        await payout(payouts)
+        elapsed = time.perf_counter() - start
+        print(
+            f"{name:<8} {entries} winners in {elapsed:.2f}s"
+            f" ({entries / elapsed:.0f} winners/s)"
+        )
+    cleanup(entries)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--entries", type=int, default=10000)
+    args = parser.parse_args()
+    asyncio.run(main(args.entries))
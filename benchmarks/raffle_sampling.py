@@ -0,0 +1,68 @@
+"""Compare raffle winner sampling strategies at a large number of entrants.
+
+Times the previous power-key-and-sort approach against the heap-based
+sampler in util/weighted_sampling.py and its NumPy path, when NumPy is
+installed. Both are seeded, as raffle draws are. Needs no database.
+
+    python -m benchmarks.raffle_sampling --entrants 100000 --winners 5
+"""
+
+import argparse
+import random
+import time
+
+from util import weighted_sampling
+
+
+def power_sort_sample(population, weights, k):
+    v = [random.random() ** (1 / w) for w in weights]
+    order = sorted(range(len(population)), key=lambda i: v[i])
+    return [population[i] for i in order[-k:]]
+
+
+def main(entrants: int, winners: int, rounds: int):
+    population = list(range(entrants))
+    # Everyone starts with 100 tickets, plus role modifiers and loss streaks
+    weights = [
+        100 + random.choice((0, 50, 100, 200)) + 5 * random.randint(0, 20)
+        for _ in population
+    ]
+
+    strategies = [
+        ("power+sort", lambda: power_sort_sample(population, weights, winners)),
+        (
+            "heap (seeded)",
+            lambda: weighted_sampling._sample_heap(
+                population, weights, winners, random.Random(1)
+            ),
+        ),
+    ]
+    if weighted_sampling.numpy is not None:
+        strategies.append(
+            (
+                "numpy (seeded)",
+                lambda: weighted_sampling._sample_numpy(
+                    population, weights, winners, 1
+                ),
+            )
+        )
+    else:
+        print("numpy is not installed, skipping the vectorized path")
+
+    for name, sample in strategies:
+        start = time.perf_counter()
+        for _ in range(rounds):
+            sample()
+        elapsed = (time.perf_counter() - start) / rounds
+        print(
+            f"{name:<14} {entrants} entrants, {winners} winners: {elapsed * 1000:.1f}ms"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--entrants", type=int, default=100_000)
+    parser.add_argument("--winners", type=int, default=5)
+    parser.add_argument("--rounds", type=int, default=10)
+    args = parser.parse_args()
+    main(args.entrants, args.winners, args.rounds)
@@ -0,0 +1,111 @@
+"""Compare per-client Redis reads with the SSE channel hub.
+
+Connects a number of simulated overlay clients to one channel, first each
+reading the channel from Redis itself like the SSE blueprint used to, then
+through ``sse.messages`` and the shared ``ChannelHub``. Publishes events and
+reports the Redis connections held by readers, the time until every client
+has every event, and CPU time per event. Requires a Redis server.
+
+    python -m benchmarks.sse_fan_out --redis-url redis://localhost --clients 200
+"""
+
+import argparse
+import asyncio
+import time
+
+from quart import Quart
+
+from server.blueprints.sse import sse
+
+CHANNEL = "sse-fan-out-benchmark"
+
+
+async def per_client_messages(app: Quart, channel: str):
+    # What sse.messages did before the hub, one Redis read per client
+    key = sse.stream_key(channel)
+    last_id = "$"
+    while True:
+        for _, entries in await sse.redis.xread({key: last_id}, block=15000):
+            for id, fields in entries:
+                last_id = id
+                yield sse._decode(id, fields)
+
+
+async def hub_messages(app: Quart, channel: str):
+    async for message in sse.messages(channel=channel):
+        yield message
+
+
+async def run(app: Quart, messages, clients: int, events: int) -> dict:
+    ready = asyncio.Event()
+    done = asyncio.Event()
+    connected = 0
+    finished = 0
+
+    async def client():
+        nonlocal connected, finished
+        async with app.app_context():
+            stream = messages(app, CHANNEL)
+            received = 0
+            first = asyncio.ensure_future(stream.__anext__())
+            connected += 1
+            if connected == clients:
+                ready.set()
+            await first
+            while True:
+                received += 1
+                if received == events:
+                    break
+                await stream.__anext__()
+            await stream.aclose()
+        finished += 1
+        if finished == clients:
+            done.set()
+
+    tasks = [asyncio.create_task(client()) for _ in range(clients)]
+    await ready.wait()
+    # Let every read reach Redis before publishing
+    await asyncio.sleep(1)
+    async with app.app_context():
+        readers = sse.redis.connection_pool.in_use
+        start = time.perf_counter()
+        cpu_start = time.process_time()
+        for i in range(events):
+            await sse.publish({"n": i, "text": "x" * 200}, type="chat", channel=CHANNEL)
+        await done.wait()
+        cpu = time.process_time() - cpu_start
+        elapsed = time.perf_counter() - start
+    await asyncio.gather(*tasks)
+    return {"readers": readers, "elapsed": elapsed, "cpu": cpu}
+
+
+def report(name: str, result: dict, events: int):
+    print(
+        f"{name:<10} redis readers={result['readers']:<4}"
+        f" delivered in {result['elapsed']:.2f}s"
+        f" cpu/event={result['cpu'] / events * 1000:.2f}ms"
+    )
+
+
+async def main(redis_url: str, clients: int, events: int):
+    app = Quart(__name__)
+    app.config["REDIS_URL"] = redis_url
+    app.config["SSE_REDIS_MAX_CONNECTIONS"] = clients + 10
+    app.config["SSE_CLIENT_QUEUE_SIZE"] = events
+    await sse.connect(app)
+    try:
+        report(
+            "per-client", await run(app, per_client_messages, clients, events), events
+        )
+        report("hub", await run(app, hub_messages, clients, events), events)
+    finally:
+        await sse.close(app)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--redis-url", default="redis://localhost")
+    parser.add_argument("--clients", type=int, default=200)
+    parser.add_argument("--events", type=int, default=200)
+    args = parser.parse_args()
+    asyncio.run(main(args.redis_url, args.clients, args.events))
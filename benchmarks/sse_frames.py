@@ -0,0 +1,113 @@
+"""Measure per-event CPU cost of fanning SSE events out to subscribers.
+
+Pushes chat-sized events through a ChannelHub to a number of subscribers
+and times the work done for each event in three ways: every subscriber
+decoding the stored JSON and formatting the event itself, as the blueprint
+originally did; decoding once and every subscriber formatting; and the
+wire-format frames ``sse.publish`` now stores, which subscribers write as
+is. Needs no Redis server.
+
+    python -m benchmarks.sse_frames --subscribers 100 --events 2000
+"""
+
+import argparse
+import asyncio
+import time
+
+from quart import json
+
+from server.blueprints.sse import Frame, Message, parse_event_id
+from util.channel_hub import ChannelHub
+
+CHANNEL = "sse-frames-benchmark"
+
+
+def chat_event(n: int) -> dict:
+    return {
+        "content": f"message {n} " + "lorem ipsum " * 10,
+        "displayName": "chatter",
+        "roles": [{"colorR": 218, "colorG": 165, "colorB": 32, "name": "T3"}],
+        "emojis": [],
+        "mentions": [],
+        "platform": "discord",
+    }
+
+
+def stored_json(n: int):
+    # What was stored in Redis before frames
+    return json.dumps(Message(chat_event(n), type="chat").to_dict())
+
+
+def decode_per_client(item, id: str) -> bytes:
+    return str(Message(id=id, **json.loads(item))).encode("utf-8")
+
+
+def decode_once(item, id: str):
+    return Message(id=id, **json.loads(item))
+
+
+def encode_per_client(message, id: str) -> bytes:
+    return str(message).encode("utf-8")
+
+
+def stored_frame(n: int):
+    # What sse.publish stores now
+    return str(Message(chat_event(n), type="chat"))[:-1].encode("utf-8")
+
+
+def frame_once(body, id: str):
+    return Frame(id, parse_event_id(id), "chat", body + b"id:" + id.encode() + b"\n\n")
+
+
+def write_frame(frame, id: str) -> bytes:
+    return frame.data
+
+
+MODES = {
+    # name: (build stored item, once per event, once per subscriber)
+    "decode-per-client": (stored_json, lambda item, id: item, decode_per_client),
+    "encode-per-client": (stored_json, decode_once, encode_per_client),
+    "frames": (stored_frame, frame_once, write_frame),
+}
+
+
+async def run(mode: str, subscribers: int, events: int) -> float:
+    store, once, per_subscriber = MODES[mode]
+    stored = [store(n) for n in range(events)]
+
+    async def idle(channel: str, last):
+        await asyncio.Event().wait()
+        yield
+
+    hub = ChannelHub(idle, queue_size=1)
+    queues = [hub.subscribe(CHANNEL) for _ in range(subscribers)]
+
+    start = time.process_time()
+    for n, item in enumerate(stored):
+        id = f"{n}-0"
+        hub.publish_local(CHANNEL, once(item, id))
+        for queue in queues:
+            per_subscriber(queue.get_nowait(), id)
+    elapsed = time.process_time() - start
+
+    await hub.close()
+    return elapsed / events
+
+
+async def main(subscribers: int, events: int):
+    baseline = None
+    for mode in MODES:
+        per_event = await run(mode, subscribers, events)
+        baseline = baseline or per_event
+        print(
+            f"{mode:<18} {per_event * 1_000_000:>8.1f}us cpu/event"
+            f" ({baseline / per_event:.1f}x)"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--subscribers", type=int, default=100)
+    parser.add_argument("--events", type=int, default=2000)
+    args = parser.parse_args()
+    asyncio.run(main(args.subscribers, args.events))
@@ -0,0 +1,96 @@
+"""Load test Redis connection usage of SSE publishing.
+
+Publishes events from concurrent tasks for a fixed time, first through the
+shared pool opened by ``sse.connect``, then with a new Redis client per
+publish like the SSE blueprint used to. Samples the server's
+``connected_clients`` once a second, which should stay flat for the former
+and climb for the latter. Requires a Redis server.
+
+    python -m benchmarks.sse_redis_pool --redis-url redis://localhost --seconds 10
+"""
+
+import argparse
+import asyncio
+import time
+
+from quart import Quart
+from redis.asyncio import StrictRedis
+
+from server.blueprints.sse import Message, sse
+from server.util.redis_pool import REDIS_CONNECTIONS_CREATED
+
+CHANNEL = "sse-pool-benchmark"
+
+
+async def per_call_publish(app: Quart, data: dict):
+    message = Message(data, type="benchmark").to_dict()
+    client = StrictRedis.from_url(app.config["REDIS_URL"])
+    await client.publish(CHANNEL, str(message))
+
+
+async def pooled_publish(app: Quart, data: dict):
+    await sse.publish(data, type="benchmark", channel=CHANNEL)
+
+
+async def run(app: Quart, publish, seconds: float, publishers: int) -> dict:
+    admin = StrictRedis.from_url(app.config["REDIS_URL"])
+    samples = []
+    published = 0
+    deadline = time.monotonic() + seconds
+
+    async def publisher(i: int):
+        nonlocal published
+        async with app.app_context():
+            while time.monotonic() < deadline:
+                await publish(app, {"publisher": i, "n": published})
+                published += 1
+
+    async def sample():
+        while time.monotonic() < deadline:
+            info = await admin.info("clients")
+            samples.append(info["connected_clients"])
+            await asyncio.sleep(1)
+
+    await asyncio.gather(sample(), *(publisher(i) for i in range(publishers)))
+    await admin.aclose()
+    return {"published": published, "connected_clients": samples}
+
+
+def report(name: str, result: dict, seconds: float):
+    clients = result["connected_clients"]
+    print(
+        f"{name:<9} {result['published'] / seconds:>8.0f} publishes/s"
+        f" connected_clients min={min(clients)} max={max(clients)}"
+        f" samples={clients}"
+    )
+
+
+async def main(redis_url: str, seconds: float, publishers: int, max_connections: int):
+    app = Quart(__name__)
+    app.config["REDIS_URL"] = redis_url
+    app.config["SSE_REDIS_MAX_CONNECTIONS"] = max_connections
+
+    # The pool runs first, since the per-call clients are never closed and
+    # would still be counted
+    await sse.connect(app)
+    created = REDIS_CONNECTIONS_CREATED.get()
+    try:
+        result = await run(app, pooled_publish, seconds, publishers)
+    finally:
+        await sse.close(app)
+    report("pooled", result, seconds)
+    print(f"pool opened {REDIS_CONNECTIONS_CREATED.get() - created} connections")
+
+    report("per-call", await run(app, per_call_publish, seconds, publishers), seconds)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--redis-url", default="redis://localhost")
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--publishers", type=int, default=20)
+    parser.add_argument("--max-connections", type=int, default=50)
+    args = parser.parse_args()
+    asyncio.run(
+        main(args.redis_url, args.seconds, args.publishers, args.max_connections)
+    )
@@ -3,11 +3,9 @@ import asyncio
 from datetime import timedelta
 import logging
 import time
-import requests
 import discord
 from discord import (
     Member,
-    Role,
     User,
     app_commands,
     Client,
@@ -16,8 +14,6 @@ from discord import (
     Reaction,
 )
 from commands import sync_commands
-from commands import mod_commands
-from commands import viewer_commands
 from commands.meme_commands import MemeCommands
 from commands.mod_commands import ModCommands
 from commands.overlay_commands import OverlayCommands
@@ -29,50 +25,47 @@ from commands.manager_commands import ManagerCommands
 from commands.reaction_commands import ReactionCommands
 from commands.vod_commands import VodCommands
 from config import YAMLConfig as Config
+from controllers import active_chatter_controller, reaction_controller
+from controllers.active_chatter_controller import ActiveChatterController
 from controllers.reaction_controller import ReactionController
+from controllers.cool_meter_controller import CoolMeterController
+from controllers.overlay_controller import OverlayController
 from controllers.sub_controller import SubController
 from controllers.temprole_controller import TempRoleController
 from controllers.good_morning_controller import GoodMorningController
+from controllers.gen_alpha_controller import GenAlphaController
+from controllers import point_history_controller
+from controllers import live_raffle_controller, point_accrual_controller
+from controllers.live_raffle_controller import LiveRaffleController
+from controllers.point_accrual_controller import PointAccrualController
+from controllers.role_policy_controller import RolePolicyController
 from db import DB
-from threading import Thread
 from util.discord_utils import DiscordUtils
-from util.server_utils import get_base_url
+from util.metrics_server import start_metrics_server
 from util.sync_utils import SyncUtils
 import re
 
 
 discord.utils.setup_logging(level=logging.INFO, root=True)
 
-COOL_URL = f"{get_base_url()}/publish-cool"
 COOL_ID = Config.CONFIG["Discord"]["CoolMeter"]["CoolEmoji"]
 UNCOOL_ID = Config.CONFIG["Discord"]["CoolMeter"]["UncoolEmoji"]
-AUTH_TOKEN = Config.CONFIG["Secrets"]["Server"]["Token"]
 STREAM_CHAT_ID = Config.CONFIG["Discord"]["Channels"]["Stream"]
 WELCOME_CHAT_ID = Config.CONFIG["Discord"]["Channels"]["Welcome"]
 PENDING_REWARDS_CHAT_ID = Config.CONFIG["Discord"]["ChannelPoints"][
     "PendingRewardChannel"
 ]
 GUILD_ID = Config.CONFIG["Discord"]["GuildID"]
+METRICS_HOST = Config.CONFIG["Discord"]["Metrics"]["Host"]
+METRICS_PORT = Config.CONFIG["Discord"]["Metrics"]["Port"]
 TIER3_ROLE = Config.CONFIG["Discord"]["Subscribers"]["Tier3Role"]
 GIFTED_TIER3_ROLE = Config.CONFIG["Discord"]["Subscribers"]["GiftedTier3Role"]
-# HIDDEN_MOD_ROLE should be 1040337265790042172 when committing and refers to the Mod (Role Hidden)
-# STAFF_DEVELOPER_ROLE should be 1226317841272279131 when committing and refers to the Staff Developer role
-HIDDEN_MOD_ROLE = Config.CONFIG["Discord"]["Roles"]["HiddenMod"]
-STAFF_DEVELOPER_ROLE = Config.CONFIG["Discord"]["Roles"]["StaffDev"]
+T3_ROLES = {TIER3_ROLE, GIFTED_TIER3_ROLE}
 FOSSA_BOT_ID = 488164251249279037
 SERVER_SUBSCRIPTION_MESSAGE_TYPE = 25
 CUSTOM_EMOJI_PATTERN = re.compile("(<a?:(\w+):\d{17,19}>?)")
 MAX_EMOJI_COUNT = 5
 
-MAX_CHARACTER_LENGTH = 200
-ROLE_AND_USER_OVERRIDE: dict[str, int] = {
-    STAFF_DEVELOPER_ROLE: 300,
-    Config.CONFIG["Discord"]["Roles"]["Mod"]: 400,
-    HIDDEN_MOD_ROLE: 400,
-    1237760496191537176: 400,  # Hooj's Accountant
-    204343692960464896: 9999,  # Ethan
-}
-
 LOG = logging.getLogger(__name__)
 
 
@@ -87,6 +80,10 @@ class RaffleBot(Client):
         DB()
 
         super().__init__(intents=intents)
+        self.metrics_runner = None
+
+    async def setup_hook(self):
+        self.metrics_runner = await start_metrics_server(METRICS_HOST, METRICS_PORT)
 
     async def on_ready(self):
         logging.info(f"Logged in as {self.user} (ID: {self.user.id})")
@@ -99,9 +96,27 @@ class RaffleBot(Client):
         # Disable opening / closing inhouse queues at Ethan's request
         # Leaving here for posterity
         # SubController(self).sync_channel_perms.start()
-        TempRoleController(self).expire_roles.start()
+        TempRoleController(self).start_expiring_roles()
         GoodMorningController(self).auto_reward_users.start()
-        mod_commands.remove_inactive_chatters.start()
+        active_chatter_controller.remove_inactive_chatters.start()
+        point_accrual_controller.flush_pending_accruals.start()
+        live_raffle_controller.flush_pending_entries.start()
+        reaction_controller.flush_robomoji_last_used.start()
+        point_history_controller.trim_transaction_history.start()
+
+    async def close(self):
+        TempRoleController.stop_expiring_roles()
+        point_accrual_controller.flush_pending_accruals.cancel()
+        await PointAccrualController.flush()
+        live_raffle_controller.flush_pending_entries.cancel()
+        await LiveRaffleController.flush_all()
+        reaction_controller.flush_robomoji_last_used.cancel()
+        await ReactionController.flush_last_used()
+        await CoolMeterController.close()
+        await OverlayController.close()
+        await super().close()
+        if self.metrics_runner is not None:
+            await self.metrics_runner.cleanup()
 
     async def on_message_edit(self, before: Message, message: Message):
         # Don't respond to ourselves
@@ -126,7 +141,7 @@ class RaffleBot(Client):
         custom_emoji_count = len(custom_emoji_matches)
         length = len(clean_content)
 
-        user_max_length = get_length_for_user(message.author.roles, message.author.id)
+        user_max_length = RolePolicyController.for_member(message.author).max_length
         if length > user_max_length:
             content = message.content
             await message.delete()
@@ -150,16 +165,15 @@ class RaffleBot(Client):
             return
 
         # Gen Alpha Role Custom Rules
-        if any(role.id in [1245138880626425866] for role in message.author.roles):
-            brainrot = likely_brain_rot(message)
-            if brainrot[0]:
-                await message.channel.send(
-                    f"{message.author.mention} used a cringe word: {brainrot[1]}. I've timed them out for a minute."
-                )
-                await message.author.timeout(
-                    timedelta(minutes=1),
-                    reason=f"Gen Alpha cringe detected: {brainrot[1]}",
-                )
+        brainrot = GenAlphaController.likely_brain_rot(message)
+        if brainrot is not None:
+            await message.channel.send(
+                f"{message.author.mention} used a cringe word: {brainrot}. I've timed them out for a minute."
+            )
+            await message.author.timeout(
+                timedelta(minutes=1),
+                reason=f"Gen Alpha cringe detected: {brainrot}",
+            )
 
         asyncio.get_event_loop().create_task(
             ReactionController.apply_reactions(message)
@@ -176,106 +190,32 @@ class RaffleBot(Client):
         if message.channel.id == STREAM_CHAT_ID:
             await self.check_message_length(message)
 
-            DB().accrue_channel_points(message.author.id, message.author.roles)
+            policy = RolePolicyController.for_member(message.author)
+            await PointAccrualController.accrue_channel_points(
+                message.author.id, policy.multiplier
+            )
             cool = str(COOL_ID) in message.content
             uncool = str(UNCOOL_ID) in message.content
             if cool and not uncool:
-                Thread(
-                    target=publish_cool,
-                    args=(1,),
-                ).start()
+                CoolMeterController.vote(message.author.id, 1)
             elif uncool and not cool:
-                Thread(
-                    target=publish_cool,
-                    args=(-1,),
-                ).start()
-
-            if viewer_commands.ACTIVE_CHATTER_KEYWORD is not None:
-                if viewer_commands.ACTIVE_CHATTER_KEYWORD in message.content:
-                    mod_commands.ACTIVE_CHATTERS[message.author.id] = time.time()
-                    if any(
-                        role.id in [TIER3_ROLE, GIFTED_TIER3_ROLE]
-                        for role in message.author.roles
-                    ):
-                        mod_commands.ACTIVE_T3_CHATTERS[message.author.id] = time.time()
-            else:
-                mod_commands.ACTIVE_CHATTERS[message.author.id] = time.time()
-                if any(
-                    role.id in [TIER3_ROLE, GIFTED_TIER3_ROLE]
-                    for role in message.author.roles
-                ):
-                    mod_commands.ACTIVE_T3_CHATTERS[message.author.id] = time.time()
+                CoolMeterController.vote(message.author.id, -1)
+
+            ActiveChatterController.record(
+                message.author.id,
+                message.content,
+                not policy.role_ids.isdisjoint(T3_ROLES),
+            )
+
+    async def on_member_remove(self, member: Member):
+        RolePolicyController.invalidate(member)
 
     async def on_reaction_add(self, reaction: Reaction, user: Member | User):
         await ReactionController.apply_crowd_mute(reaction)
 
     async def on_member_update(self, before: Member, after: Member):
-        removed_roles = set(before.roles) - set(after.roles)
-        if removed_roles:
-            removed_roles = [role.id for role in removed_roles]
-            await TempRoleController.check_removed_roles(removed_roles, after, GUILD_ID)
-
-
-def likely_brain_rot(message: Message) -> (bool, str):
-    content = message.content
-
-    # No leet speak here.
-    content = content.replace("1", "i")
-    content = content.replace("3", "e")
-    content = content.replace("4", "a")
-    content = content.replace("5", "s")
-    content = content.replace("0", "o")
-    content = content.replace("7", "t")
-    content = content.replace("$", "s")
-    content = content.replace("|", "l")
-    content = content.replace("/", "l")
-    content = content.replace("\\", "l")
-    content = content.replace("*", "")
-
-    brainrot = [
-        build_regex("sigma"),
-        build_regex("omega"),
-        build_regex("skibidi"),
-        build_regex("gyat"),
-        build_regex("rizz"),
-        build_regex("boomer"),
-        build_regex("ohio"),
-        build_regex("cope"),
-        build_regex("ratio"),
-        build_regex("bussin"),
-        build_regex("mewing"),
-        build_regex("gronk"),
-        build_regex("jelq"),
-        build_regex("griddy"),
-        build_regex("ligma"),
-        build_regex("imposter"),
-        build_regex("amogus"),
-        build_regex("fanum"),
-        build_regex("maxxing"),
-        build_regex("Σ"),
-        build_regex("erm what the"),
-        build_regex("erm, what the"),
-        build_regex("chat"),
-        build_regex("is this real"),
-    ]
-
-    for rot in brainrot:
-        found = re.findall(rot, content)
-        if len(found) > 0:
-            return (True, rot)
-
-    return (False, "")
-
-
-def build_regex(cringe_word: str) -> str:
-    to_return = "(?i)"
-    for c in cringe_word:
-        if c == "l" or c == "i":
-            to_return += "(l|i)" + "+"
-        else:
-            to_return += c + "+"
-
-    return to_return
+        RolePolicyController.invalidate(after)
+        await TempRoleController.check_removed_roles(before, after)
 
 
 client = RaffleBot()
@@ -289,27 +229,6 @@ async def on_guild_join(guild):
     await tree.sync(guild=guild)
 
 
-def publish_cool(cool: int):
-    payload = {"cool": cool}
-    response = requests.post(
-        url=COOL_URL, json=payload, headers={"x-access-token": AUTH_TOKEN}
-    )
-    if response.status_code != 200:
-        LOG.error(f"Failed to publish sub summary: {response.text}")
-
-
-def get_length_for_user(roles: list[Role], user_id: int) -> int:
-    for id, override in sorted(
-        ROLE_AND_USER_OVERRIDE.items(), key=lambda item: item[1], reverse=True
-    ):
-        if user_id == id:
-            return override
-        role = discord.utils.get(roles, id=id)
-        if role is not None:
-            return override
-    return MAX_CHARACTER_LENGTH
-
-
 async def main():
     async with client:
         tree.add_command(SyncCommands(tree, client))
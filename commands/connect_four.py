@@ -2,16 +2,13 @@ from datetime import timedelta, datetime
 from discord.ext import tasks
 import logging
 from discord import Client, Interaction, User, app_commands
-import requests
 from config import YAMLConfig as Config
 from controllers.connect_four.connect_four_controller import ConnectFourController
+from controllers.overlay_controller import OverlayController
 from discord.app_commands.errors import AppCommandError, CheckFailure
 
 from controllers.connect_four.game_orchestrator import GameOrchestrator
-from util.server_utils import get_base_url
 
-PUBLISH_CONNECT_FOUR_URL = f"{get_base_url()}/publish-connect-four"
-AUTH_TOKEN = Config.CONFIG["Secrets"]["Server"]["Token"]
 MOD_ROLE = Config.CONFIG["Discord"]["Roles"]["Mod"]
 # these are hardcoded until raze to radiant is over, or config file changes are allowed
 # for testing on own setup, these need to be changed to your appropriate IDs
@@ -47,7 +44,7 @@ class ConnectFourCommands(app_commands.Group, name="connect_four"):
         self.orchestrator.reopen_challenges()
         self.controller.reset()
         self.expire_game.start()
-        publish_accepting_challenges()
+        await publish_accepting_challenges()
         await interaction.response.send_message("Connect Four Enabled!", ephemeral=True)
 
     @app_commands.command()
@@ -94,7 +91,7 @@ class ConnectFourCommands(app_commands.Group, name="connect_four"):
             interaction.user if first_move_player_id == opponent.id else opponent
         )
 
-        publish_new_game(first_move_user, second_move_user)
+        await publish_new_game(first_move_user, second_move_user)
 
         self.orchestrator.update_last_played()
         await interaction.response.send_message(
@@ -122,7 +119,9 @@ class ConnectFourCommands(app_commands.Group, name="connect_four"):
             )
 
         self.orchestrator.update_last_played()
-        publish_move(interaction.user, column - 1, move_summary.row, move_summary.win)
+        await publish_move(
+            interaction.user, column - 1, move_summary.row, move_summary.win
+        )
 
         if move_summary.win:
             self.orchestrator.reopen_challenges()
@@ -145,23 +144,17 @@ class ConnectFourCommands(app_commands.Group, name="connect_four"):
         LOG.info(f"Reopening challenges...")
         self.orchestrator.reopen_challenges()
         self.controller.reset()
-        publish_accepting_challenges()
+        await publish_accepting_challenges()
 
 
-def publish_accepting_challenges():
+async def publish_accepting_challenges():
     payload = {
         "action": "accepting_challenges",
     }
-    response = requests.post(
-        url=PUBLISH_CONNECT_FOUR_URL,
-        json=payload,
-        headers={"x-access-token": AUTH_TOKEN},
-    )
-    if response.status_code != 200:
-        LOG.error(f"Failed to publish connect four updates: {response.text}")
+    await OverlayController.publish("connect-four", "/publish-connect-four", payload)
 
 
-def publish_move(player: User, column: int, row: int, win: bool):
+async def publish_move(player: User, column: int, row: int, win: bool):
     payload = {
         "action": "move",
         "player_id": player.id,
@@ -169,27 +162,13 @@ def publish_move(player: User, column: int, row: int, win: bool):
         "row": row,
         "win": win,
     }
-    response = requests.post(
-        url=PUBLISH_CONNECT_FOUR_URL,
-        json=payload,
-        headers={"x-access-token": AUTH_TOKEN},
-    )
-
-    if response.status_code != 200:
-        LOG.error(f"Failed to publish connect four updates: {response.text}")
+    await OverlayController.publish("connect-four", "/publish-connect-four", payload)
 
 
-def publish_new_game(player_one: User, player_two: User):
+async def publish_new_game(player_one: User, player_two: User):
     payload = {
         "action": "new_game",
         "player_one": {"id": player_one.id, "name": player_one.display_name},
         "player_two": {"id": player_two.id, "name": player_two.display_name},
     }
-    response = requests.post(
-        url=PUBLISH_CONNECT_FOUR_URL,
-        json=payload,
-        headers={"x-access-token": AUTH_TOKEN},
-    )
-
-    if response.status_code != 200:
-        LOG.error(f"Failed to publish connect four updates: {response.text}")
+    await OverlayController.publish("connect-four", "/publish-connect-four", payload)
@@ -139,9 +139,9 @@ class ManagerCommands(app_commands.Group, name="manager"):
         approved_role = interaction.guild.get_role(APPROVED_ROLE)
         rejected_role = interaction.guild.get_role(REJECTED_ROLE)
 
-        if TempRoleController.user_has_temprole(user, approved_role):
+        if await TempRoleController.user_has_temprole(user, approved_role):
             await TempRoleController.remove_role(user, approved_role)
-        if TempRoleController.user_has_temprole(user, rejected_role):
+        if await TempRoleController.user_has_temprole(user, rejected_role):
             await TempRoleController.remove_role(user, rejected_role)
 
     @staticmethod
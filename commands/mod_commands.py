@@ -16,10 +16,14 @@ from discord import (
 from discord.app_commands.errors import AppCommandError, CheckFailure
 from discord.ext import tasks
 from commands import t3_commands, viewer_commands
+from controllers.active_chatter_controller import ActiveChatterController
 from controllers.good_morning_controller import (
     GoodMorningController,
     GOOD_MORNING_EXPLANATION,
 )
+from controllers.gen_alpha_controller import GenAlphaController
+from controllers.live_raffle_controller import LiveRaffleController
+from controllers.overlay_controller import OverlayController
 from controllers.point_history_controller import PointHistoryController
 from controllers.temprole_controller import TempRoleController
 from db import DB, RaffleType
@@ -28,11 +32,8 @@ from views.raffle.new_raffle_modal import NewRaffleModal
 from views.rewards.add_reward_modal import AddRewardModal
 from controllers.raffle_controller import RaffleController
 from config import YAMLConfig as Config
-from util.server_utils import get_base_url
 import logging
 import random
-from threading import Thread
-import requests
 import enum
 
 LOG = logging.getLogger(__name__)
@@ -51,15 +52,6 @@ STAFF_DEVELOPER_ROLE = Config.CONFIG["Discord"]["Roles"]["StaffDev"]
 
 GUILD_ID = Config.CONFIG["Discord"]["GuildID"]
 
-AUTH_TOKEN = Config.CONFIG["Secrets"]["Server"]["Token"]
-PUBLISH_POLL_URL = f"{get_base_url()}/publish-poll"
-PUBLISH_TIMER_URL = f"{get_base_url()}/publish-timer"
-PUBLISH_CHESS_URL = f"{get_base_url()}/publish-chess"
-PUBLISH_STREAMDECK_URL = f"{get_base_url()}/publish-streamdeck"
-
-ACTIVE_DURATION = 5 * 60
-ACTIVE_CHATTERS = {}
-ACTIVE_T3_CHATTERS = {}
 
 PERMISSION_LOCK = Lock()
 
@@ -129,14 +121,7 @@ class ModCommands(app_commands.Group, name="mod"):
         voice: t3_commands.VoiceAI,
     ) -> None:
         """Toggles the given user to show up as a talking entity on stream."""
-        Thread(
-            target=publish_talker,
-            args=(
-                user.id,
-                name,
-                voice.value,
-            ),
-        ).start()
+        await publish_talker(user.id, name, voice.value)
 
         await interaction.response.send_message("Talk event sent!", ephemeral=True)
 
@@ -151,13 +136,7 @@ class ModCommands(app_commands.Group, name="mod"):
         game_name: Optional[str],
     ) -> None:
         """Sends gameOverlay event to stream"""
-        Thread(
-            target=publish_game_overlay,
-            args=(
-                overlay_status,
-                game_name,
-            ),
-        ).start()
+        await publish_game_overlay(overlay_status, game_name)
 
         await interaction.response.send_message(
             "Game overlay event sent!", ephemeral=True
@@ -172,14 +151,7 @@ class ModCommands(app_commands.Group, name="mod"):
         self, interaction: Interaction, open_value: int, na_score: int, eu_score: int
     ) -> None:
         """Open NA vs NOT NA Chess"""
-        Thread(
-            target=publish_chess,
-            args=(
-                open_value,
-                na_score,
-                eu_score,
-            ),
-        ).start()
+        await publish_chess(open_value, na_score, eu_score)
 
         await interaction.response.send_message("Chess event sent!", ephemeral=True)
 
@@ -206,11 +178,7 @@ class ModCommands(app_commands.Group, name="mod"):
         """Returns a given amount of active chatters, can be restricted to an amount and automatically grant a role"""
 
         try:
-            if t3_only:
-                active_chatters = list(ACTIVE_T3_CHATTERS.keys())
-            else:
-                active_chatters = list(ACTIVE_CHATTERS.keys())
-            random_chatters = random.sample(active_chatters, amount)
+            random_chatters = ActiveChatterController.sample(amount, t3_only)
         except Exception as e:
             return await interaction.response.send_message(
                 f"An error occurred: {str(e)}", ephemeral=True
@@ -246,8 +214,9 @@ class ModCommands(app_commands.Group, name="mod"):
         if grant_role is not None:
             send_message += f" They were granted the role {grant_role.mention} for {grant_duration}."
 
-        if viewer_commands.ACTIVE_CHATTER_KEYWORD is not None:
-            send_message += f" Active chatter keyword is set to `{viewer_commands.ACTIVE_CHATTER_KEYWORD}`."
+        keyword = ActiveChatterController.get_keyword()
+        if keyword is not None:
+            send_message += f" Active chatter keyword is set to `{keyword}`."
 
         await interaction.response.send_message(
             send_message,
@@ -264,12 +233,10 @@ class ModCommands(app_commands.Group, name="mod"):
         keyword: str,
     ) -> None:
         """Sets the keyword to be used for active chatter tracking"""
-        viewer_commands.ACTIVE_CHATTER_KEYWORD = keyword
-        ACTIVE_CHATTERS.clear()
-        ACTIVE_T3_CHATTERS.clear()
+        ActiveChatterController.set_keyword(keyword)
 
         await interaction.response.send_message(
-            f"Keyword set to `{viewer_commands.ACTIVE_CHATTER_KEYWORD}`!",
+            f"Keyword set to `{keyword}`!",
             ephemeral=True,
         )
 
@@ -290,16 +257,7 @@ class ModCommands(app_commands.Group, name="mod"):
         option_four: str = "",
     ) -> None:
         """Run the given poll, 2-4 options"""
-        Thread(
-            target=publish_poll,
-            args=(
-                title,
-                option_one,
-                option_two,
-                option_three,
-                option_four,
-            ),
-        ).start()
+        await publish_poll(title, option_one, option_two, option_three, option_four)
 
         await interaction.response.send_message("Poll created!", ephemeral=True)
 
@@ -584,7 +542,7 @@ class ModCommands(app_commands.Group, name="mod"):
             return await interaction.response.send_message(
                 "Failed to award points - please try again.", ephemeral=True
             )
-        PointHistoryController.record_transaction(
+        await PointHistoryController.record_transaction(
             Transaction(
                 user.id, points, new_balance - points, new_balance, "Give Points"
             )
@@ -612,8 +570,37 @@ class ModCommands(app_commands.Group, name="mod"):
             )
             return
 
+        await LiveRaffleController.refresh_user(interaction.guild_id, user.id)
         await interaction.response.send_message("Winner removed!")
 
+    @app_commands.command(name="set_role_modifier")
+    @app_commands.checks.has_any_role(MOD_ROLE, HIDDEN_MOD_ROLE)
+    @app_commands.describe(role="Role to change the raffle ticket modifier for")
+    @app_commands.describe(modifier="Extra raffle tickets members with the role get")
+    async def set_role_modifier(
+        self, interaction: Interaction, role: Role, modifier: int
+    ):
+        """Set how many extra raffle tickets a role grants"""
+        DB().set_role_modifier(interaction.guild_id, role.id, modifier)
+        await interaction.response.send_message(
+            f"{role.name} now grants {modifier} extra raffle tickets", ephemeral=True
+        )
+
+    @app_commands.command(name="reload_gen_alpha_words")
+    @app_commands.checks.has_any_role(MOD_ROLE, HIDDEN_MOD_ROLE)
+    async def reload_gen_alpha_words(self, interaction: Interaction):
+        """Reload the Gen Alpha cringe word list from config.yaml"""
+        try:
+            count = GenAlphaController.reload_words()
+        except Exception as e:
+            LOG.exception("Failed to reload Gen Alpha words")
+            return await interaction.response.send_message(
+                f"Failed to reload the word list: {e}", ephemeral=True
+            )
+        await interaction.response.send_message(
+            f"Now matching {count} Gen Alpha words", ephemeral=True
+        )
+
     @app_commands.command(name="set_tts_values")
     @app_commands.checks.has_any_role(MOD_ROLE, HIDDEN_MOD_ROLE)
     @app_commands.describe(
@@ -724,91 +711,36 @@ class ModCommands(app_commands.Group, name="mod"):
             self.last_weekday = datetime.now(tz=PACIFIC_TZ).weekday()
 
 
-def publish_poll(title, option_one, option_two, option_three, option_four):
+async def publish_poll(title, option_one, option_two, option_three, option_four):
     payload = {
         "title": title,
         "options": [option_one, option_two, option_three, option_four],
     }
-
-    response = requests.post(
-        url=PUBLISH_POLL_URL, json=payload, headers={"x-access-token": AUTH_TOKEN}
-    )
-
-    if response.status_code != 200:
-        LOG.error(f"Failed to publish poll: {response.text}")
+    await OverlayController.publish("poll", "/publish-poll", payload)
 
 
-def publish_timer(time, direction: TimerDirection):
+async def publish_timer(time, direction: TimerDirection):
     payload = {
         "time": time,
         "direction": direction.value,
     }
-
-    response = requests.post(
-        url=PUBLISH_TIMER_URL, json=payload, headers={"x-access-token": AUTH_TOKEN}
-    )
-
-    if response.status_code != 200:
-        LOG.error(f"Failed to publish timer: {response.text}")
+    await OverlayController.publish("timer", "/publish-timer", payload)
 
 
-def publish_chess(openValue, na, eu):
+async def publish_chess(openValue, na, eu):
     payload = {"open": openValue, "naScore": na, "euScore": eu}
-
-    response = requests.post(
-        url=PUBLISH_CHESS_URL, json=payload, headers={"x-access-token": AUTH_TOKEN}
-    )
-
-    if response.status_code != 200:
-        LOG.error(f"Failed to publish chess: {response.text}")
+    await OverlayController.publish("chess", "/publish-chess", payload)
 
 
-def publish_talker(user_id, name, voice):
+async def publish_talker(user_id, name, voice):
     payload = {"type": "talker", "value": user_id, "name": name, "voice": voice}
+    await OverlayController.publish("talker", "/publish-streamdeck", payload)
 
-    response = requests.post(
-        url=PUBLISH_STREAMDECK_URL, json=payload, headers={"x-access-token": AUTH_TOKEN}
-    )
-
-    if response.status_code != 200:
-        LOG.error(f"Failed to publish talker: {response.text}")
 
-
-def publish_game_overlay(overlay_state, game_name):
+async def publish_game_overlay(overlay_state, game_name):
     payload = {
         "type": "gameOverlay",
         "overlayState": overlay_state.value,
         "gameName": game_name,
     }
-
-    response = requests.post(
-        url=PUBLISH_STREAMDECK_URL, json=payload, headers={"x-access-token": AUTH_TOKEN}
-    )
-
-    if response.status_code != 200:
-        LOG.error(f"Failed to publish game overlay: {response.text}")
-
-
-def publish_timer(time, direction: TimerDirection):
-    payload = {
-        "time": time,
-        "direction": direction.value,
-    }
-
-    response = requests.post(
-        url=PUBLISH_TIMER_URL, json=payload, headers={"x-access-token": AUTH_TOKEN}
-    )
-
-    if response.status_code != 200:
-        LOG.error(f"Failed to publish timer: {response.text}")
-
-
-@tasks.loop(seconds=30)
-async def remove_inactive_chatters():
-    for user_id, time in list(ACTIVE_CHATTERS.items()):
-        if time < (datetime.now() - timedelta(seconds=ACTIVE_DURATION)).timestamp():
-            del ACTIVE_CHATTERS[user_id]
-            try:
-                del ACTIVE_T3_CHATTERS[user_id]
-            except Exception:
-                pass
+    await OverlayController.publish("gameOverlay", "/publish-streamdeck", payload)
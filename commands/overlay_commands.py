@@ -97,7 +97,7 @@ class OverlayCommands(app_commands.Group, name="overlay"):
         self, interaction: Interaction, field: TextFields, text: str, color: str = None
     ):
         """Set overlay text field to specified value"""
-        OverlayController.publish_overlay(
+        await OverlayController.publish_overlay(
             {field.value: {"type": FieldType.TEXT, "value": text, "color": color}}
         )
         await interaction.response.send_message(
@@ -120,7 +120,7 @@ class OverlayCommands(app_commands.Group, name="overlay"):
         if media is not None:
             media_url = media.url
 
-        OverlayController.publish_overlay(
+        await OverlayController.publish_overlay(
             {field.value: {"type": FieldType.MEDIA, "source": media_url}}
         )
         await interaction.response.send_message(
@@ -134,7 +134,7 @@ class OverlayCommands(app_commands.Group, name="overlay"):
     async def set_list(self, interaction: Interaction, field: ListFields, csv: str):
         """Set overlay list field to specified value"""
         values = csv.split(",")
-        OverlayController.publish_overlay({field.value: values})
+        await OverlayController.publish_overlay({field.value: values})
         await interaction.response.send_message(
             "Overlay list update sent!", ephemeral=True
         )
@@ -144,7 +144,7 @@ class OverlayCommands(app_commands.Group, name="overlay"):
     @app_commands.describe(field="Overlay field to set")
     async def clear_field(self, interaction: Interaction, field: AllFields):
         """Clear value of field off overlay"""
-        OverlayController.publish_overlay({field.value: None})
+        await OverlayController.publish_overlay({field.value: None})
         await interaction.response.send_message(
             "Overlay clear update sent!", ephemeral=True
         )
@@ -155,7 +155,7 @@ class OverlayCommands(app_commands.Group, name="overlay"):
     @app_commands.describe(color="Color of text")
     async def timer(self, interaction: Interaction, duration: int, color: str = None):
         """Start timer on overlay for specified seconds"""
-        OverlayController.publish_overlay(
+        await OverlayController.publish_overlay(
             {"timer": {"duration": duration, "color": color}}
         )
         await interaction.response.send_message("Overlay update sent!", ephemeral=True)
@@ -169,7 +169,7 @@ class OverlayCommands(app_commands.Group, name="overlay"):
         if switch == Switch.off:
             display = False
 
-        OverlayController.publish_overlay({"display": display})
+        await OverlayController.publish_overlay({"display": display})
         await interaction.response.send_message(
             f"Overlay toggled {switch.value}!", ephemeral=True
         )
@@ -38,7 +38,7 @@ class PointHistoryCommands(app_commands.Group, name="points_history"):
     @app_commands.command(name="mine")
     async def mine(self, interaction: Interaction):
         """View your own point transaction history"""
-        user_history = PointHistoryController.get_transaction_history(
+        user_history = await PointHistoryController.get_transaction_history(
             interaction.user.id
         )
         embed = PointHistoryCommands.format_reply(user_history, interaction.user)
@@ -49,7 +49,7 @@ class PointHistoryCommands(app_commands.Group, name="points_history"):
     @app_commands.describe(user="User to check point transaction history for")
     async def user(self, interaction: Interaction, user: User):
         """View point transaction history for specified user"""
-        user_history = PointHistoryController.get_transaction_history(user.id)
+        user_history = await PointHistoryController.get_transaction_history(user.id)
         embed = PointHistoryCommands.format_reply(user_history, user)
         await interaction.response.send_message(embed=embed)
 
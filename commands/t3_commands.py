@@ -1,5 +1,4 @@
 import re
-from threading import Thread
 from discord import (
     app_commands,
     Interaction,
@@ -8,22 +7,17 @@ from discord import (
 from discord.app_commands.errors import AppCommandError, CheckFailure
 import enum
 
-import requests
-
+from controllers.overlay_controller import OverlayController
 from controllers.point_history_controller import PointHistoryController
 from db import DB
 from config import YAMLConfig as Config
 import logging
 
 from models.transaction import Transaction
-from util.server_utils import get_base_url
 from views.rewards.redeem_tts_view import RedeemTTSView
 
 LOG = logging.getLogger(__name__)
 
-PUBLISH_URL = f"{get_base_url()}/publish-streamdeck"
-AUTH_TOKEN = Config.CONFIG["Secrets"]["Server"]["Token"]
-
 
 class VoiceAI(enum.Enum):
     Brad = "XPbvdPpvVOOvvOgaEkUH"
@@ -99,10 +93,7 @@ class T3Commands(app_commands.Group, name="tier3"):
     ) -> None:
         """Enter the raffle to play DND live on stream"""
 
-        Thread(
-            target=publish_dnd,
-            args=(interaction.user.id, voice.value, use_spells),
-        ).start()
+        await publish_dnd(interaction.user.id, voice.value, use_spells)
 
         return await interaction.response.send_message(
             "You have entered the DND raffle!", ephemeral=True
@@ -191,32 +182,21 @@ class T3Commands(app_commands.Group, name="tier3"):
         ):
             required_points = 0
 
-        user_points = DB().get_point_balance(interaction.user.id)
-        if not user_points:
-            return await interaction.response.send_message(
-                "Failed to retrieve point balance - please try again.", ephemeral=True
-            )
-
-        if user_points < required_points:
-            return await interaction.response.send_message(
-                f"You need {required_points} points to redeem a TTS message. You currently have: {user_points}",
-                ephemeral=True,
-            )
-
         if required_points > 0:
             success, balance = DB().withdraw_points(
                 interaction.user.id, required_points
             )
             if not success:
                 return await interaction.response.send_message(
-                    "Failed to redeem reward - please try again.", ephemeral=True
+                    f"You need {required_points} points to redeem a TTS message. You currently have: {balance}",
+                    ephemeral=True,
                 )
 
-            PointHistoryController.record_transaction(
+            await PointHistoryController.record_transaction(
                 Transaction(
                     interaction.user.id,
                     -required_points,
-                    self.user_points,
+                    balance + required_points,
                     balance,
                     "TTS Redemption",
                 )
@@ -232,10 +212,7 @@ class T3Commands(app_commands.Group, name="tier3"):
                 f"https://cdn.discordapp.com/emojis/{custom_emote_id}.{custom_emote_type}"
             )
 
-        Thread(
-            target=publish_emote_animation,
-            args=(animation.value, custom_emote_links),
-        ).start()
+        await publish_emote_animation(animation.value, custom_emote_links)
 
         await interaction.response.send_message(
             f"Emote animation redeemed! You have {balance} points remaining after spending {required_points}.",
@@ -243,33 +220,21 @@ class T3Commands(app_commands.Group, name="tier3"):
         )
 
 
-def publish_emote_animation(animation: str, emotes: list[str]):
+async def publish_emote_animation(animation: str, emotes: list[str]):
     payload = {
         "type": "happy-emotes",
         "location": "special",
         "animation": animation,
         "emotes": ",".join(emotes),
     }
-
-    response = requests.post(
-        url=PUBLISH_URL, json=payload, headers={"x-access-token": AUTH_TOKEN}
-    )
-
-    if response.status_code != 200:
-        LOG.error(f"Failed to publish emote animation: {response.text}")
+    await OverlayController.publish("happy-emotes", "/publish-streamdeck", payload)
 
 
-def publish_dnd(user_id: str, voice_id: str, can_mage: bool):
+async def publish_dnd(user_id: str, voice_id: str, can_mage: bool):
     payload = {
         "type": "dnd",
         "user_id": user_id,
         "voice_id": voice_id,
         "can_mage": can_mage,
     }
-
-    response = requests.post(
-        url=PUBLISH_URL, json=payload, headers={"x-access-token": AUTH_TOKEN}
-    )
-
-    if response.status_code != 200:
-        LOG.error(f"Failed to dnd: {response.text}")
+    await OverlayController.publish("dnd", "/publish-streamdeck", payload)
@@ -2,33 +2,29 @@ from discord import Colour, Member, app_commands, Interaction, Client, AllowedMe
 from discord.app_commands import Choice, Range
 from typing import Optional
 from controllers.good_morning_controller import GoodMorningController
+from controllers.overlay_controller import OverlayController
 from controllers.point_history_controller import PointHistoryController
 from controllers.predictions.prediction_entry_controller import (
     PredictionEntryController,
 )
 from controllers.temprole_controller import TempRoleController
-from db import DB
+from db import AsyncDB, DB
 from db.models import PredictionChoice
 from models.transaction import Transaction
 from util.discord_utils import DiscordUtils
 from views.rewards.redeem_reward_view import RedeemRewardView
-from threading import Thread
-import requests
 import logging
 import datetime
 import time
 from pytz import timezone
 from config import YAMLConfig as Config
 from discord.app_commands.errors import AppCommandError, CheckFailure
-from util.server_utils import get_base_url
 
 from views.vod_submission.vod_submission_modal import NewVodSubmissionModal
 
 LOG = logging.getLogger(__name__)
 
 POKEMON_THREAD_ID = 1233467109485314150
-PUBLISH_POLL_URL = f"{get_base_url()}/publish-poll-answer"
-POKEMON_PUBLISH_URL = f"{get_base_url()}/publish-streamdeck"
 
 HIDDEN_MOD_ROLE = Config.CONFIG["Discord"]["Roles"]["HiddenMod"]
 STAFF_DEVELOPER_ROLE = Config.CONFIG["Discord"]["Roles"]["StaffDev"]
@@ -36,11 +32,6 @@ MOD_ROLE = Config.CONFIG["Discord"]["Roles"]["Mod"]
 GIFTED_T2_ROLE = Config.CONFIG["Discord"]["Subscribers"]["GiftedTier2Role"]
 TEMPROLE_AUDIT_CHANNEL = 1225769539267199026
 
-AUTH_TOKEN = Config.CONFIG["Secrets"]["Server"]["Token"]
-
-# It's stupid that it's here but I don't know how else to make it work
-ACTIVE_CHATTER_KEYWORD = None
-
 PACIFIC_TZ = timezone("US/Pacific")
 # Number representing day of the week, from 0 through to 6
 VOD_REVIEW_DAY = 3
@@ -68,7 +59,12 @@ class ViewerCommands(app_commands.Group, name="hooj"):
     @app_commands.command(name="redeem")
     async def redeem_reward(self, interaction: Interaction):
         """Redeem an available channel reward"""
-        redemptions_allowed = DB().check_redemption_status()
+        async with AsyncDB().unit() as uow:
+            redemptions_allowed = await uow.check_redemption_status()
+            if redemptions_allowed:
+                rewards = await uow.get_channel_rewards()
+                user_points = await uow.get_point_balance(interaction.user.id)
+
         if not redemptions_allowed:
             return await interaction.response.send_message(
                 "Sorry! Reward redemptions are currently paused. Try again during"
@@ -76,8 +72,6 @@ class ViewerCommands(app_commands.Group, name="hooj"):
                 ephemeral=True,
             )
 
-        rewards = DB().get_channel_rewards()
-        user_points = DB().get_point_balance(interaction.user.id)
         view = RedeemRewardView(user_points, rewards, self.client)
         await interaction.response.send_message(
             f"You currently have {user_points} points", view=view, ephemeral=True
@@ -111,14 +105,11 @@ class ViewerCommands(app_commands.Group, name="hooj"):
     )
     async def vote(self, interaction: Interaction, option_number: int):
         """Places your vote on the thing, if you revote it updates your choice"""
-        Thread(
-            target=publish_poll_answer,
-            args=(
-                interaction.user.id,
-                option_number,
-                [r.id for r in interaction.user.roles],
-            ),
-        ).start()
+        await publish_poll_answer(
+            interaction.user.id,
+            option_number,
+            [r.id for r in interaction.user.roles],
+        )
 
         await interaction.response.send_message("Poll answer sent!", ephemeral=True)
 
@@ -186,10 +177,7 @@ class ViewerCommands(app_commands.Group, name="hooj"):
         if move not in ["Right", "Left", "Up", "Down"]:
             amount = 1
 
-        Thread(
-            target=publish_pokemon_move,
-            args=(interaction.user.display_name, move, amount),
-        ).start()
+        await publish_pokemon_move(interaction.user.display_name, move, amount)
 
         await interaction.guild.get_thread(POKEMON_THREAD_ID).send(
             f"{interaction.user.mention} played: {move} {amount} times!",
@@ -229,32 +217,21 @@ class ViewerCommands(app_commands.Group, name="hooj"):
         ):
             required_points = 0
 
-        user_points = DB().get_point_balance(interaction.user.id)
-        if not user_points:
-            return await interaction.response.send_message(
-                "Failed to retrieve point balance - please try again.", ephemeral=True
-            )
-
-        if user_points < required_points:
-            return await interaction.response.send_message(
-                f"You need {required_points} points to redeem a TTS message. You currently have: {user_points}",
-                ephemeral=True,
-            )
-
         if required_points > 0:
             success, balance = DB().withdraw_points(
                 interaction.user.id, required_points
             )
             if not success:
                 return await interaction.response.send_message(
-                    "Failed to redeem reward - please try again.", ephemeral=True
+                    f"You need {required_points} points to redeem a TTS message. You currently have: {balance}",
+                    ephemeral=True,
                 )
 
-            PointHistoryController.record_transaction(
+            await PointHistoryController.record_transaction(
                 Transaction(
                     interaction.user.id,
                     -required_points,
-                    user_points,
+                    balance + required_points,
                     balance,
                     f"Gifted T2 to {member.name} (ID {member.id})",
                 )
@@ -286,7 +263,7 @@ class ViewerCommands(app_commands.Group, name="hooj"):
         )
 
 
-def publish_poll_answer(user_id, choice, roles):
+async def publish_poll_answer(user_id, choice, roles):
     """
     Option Number is 1-indexed
     {
@@ -300,26 +277,14 @@ def publish_poll_answer(user_id, choice, roles):
         "optionNumber": choice,
         "userRoleIDs": roles,
     }
-
-    response = requests.post(
-        url=PUBLISH_POLL_URL, json=payload, headers={"x-access-token": AUTH_TOKEN}
-    )
-
-    if response.status_code != 200:
-        LOG.error(f"Failed to publish poll answer: {response.text}")
+    await OverlayController.publish("pollAnswer", "/publish-poll-answer", payload)
 
 
-def publish_pokemon_move(user_name, move, number):
+async def publish_pokemon_move(user_name, move, number):
     payload = {
         "type": "pokemon-move",
         "move": move,
         "userName": user_name,
         "number": number,
     }
-
-    response = requests.post(
-        url=POKEMON_PUBLISH_URL, json=payload, headers={"x-access-token": AUTH_TOKEN}
-    )
-
-    if response.status_code != 200:
-        LOG.error(f"Failed to publish pokemon move: {response.text}")
+    await OverlayController.publish("pokemon-move", "/publish-streamdeck", payload)
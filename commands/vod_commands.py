@@ -1,16 +1,12 @@
 from typing import Optional
 from discord import app_commands, Interaction, Client, User
-from threading import Thread
 from config import YAMLConfig as Config
 from util.command_utils import CommandUtils
-from util.server_utils import get_base_url
-import requests
+from controllers.overlay_controller import OverlayController
 import logging
 from discord.app_commands.errors import AppCommandError, CheckFailure
 
-PUBLISH_URL = f"{get_base_url()}/publish-vod"
 LOG = logging.getLogger(__name__)
-AUTH_TOKEN = Config.CONFIG["Secrets"]["Server"]["Token"]
 MOD_ROLE = Config.CONFIG["Discord"]["Roles"]["Mod"]
 # these are hardcoded until raze to radiant is over, or config file changes are allowed
 # for testing on own setup, these need to be changed to your appropriate IDs
@@ -48,16 +44,13 @@ class VodCommands(app_commands.Group, name="vod"):
         username: Optional[str] = None,
     ) -> None:
         """Start a VOD review for the given username"""
-        Thread(
-            target=publish_update,
-            args=(
-                user.display_name if username is None else username,
-                user.id,
-                riotid,
-                rank.name,
-                False,
-            ),
-        ).start()
+        await publish_update(
+            user.display_name if username is None else username,
+            user.id,
+            riotid,
+            rank.name,
+            False,
+        )
 
         await interaction.response.send_message("VOD start event sent!", ephemeral=True)
 
@@ -65,23 +58,16 @@ class VodCommands(app_commands.Group, name="vod"):
     @app_commands.checks.has_any_role(MOD_ROLE, HIDDEN_MOD_ROLE)
     async def complete(self, interaction: Interaction) -> None:
         """Start a VOD review for the given username"""
-        Thread(
-            target=publish_update,
-            args=(
-                "",
-                -1,
-                "",
-                "",
-                True,
-            ),
-        ).start()
+        await publish_update("", -1, "", "", True)
 
         await interaction.response.send_message(
             "VOD Complete Event sent!", ephemeral=True
         )
 
 
-def publish_update(username: str, user_id: int, riotid: str, rank: str, complete: bool):
+async def publish_update(
+    username: str, user_id: int, riotid: str, rank: str, complete: bool
+):
     payload = {
         "username": username,
         "userid": user_id,
@@ -89,10 +75,4 @@ def publish_update(username: str, user_id: int, riotid: str, rank: str, complete
         "rank": rank,
         "complete": complete,
     }
-
-    response = requests.post(
-        url=PUBLISH_URL, json=payload, headers={"x-access-token": AUTH_TOKEN}
-    )
-
-    if response.status_code != 200:
-        LOG.error(f"Failed to publish updated prediction summary: {response.text}")
+    await OverlayController.publish("vod", "/publish-vod", payload)
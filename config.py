@@ -12,19 +12,22 @@ class Config:
     CONFIG.read(os.path.join(os.path.dirname(__file__), "config.ini"))
 
 
+def load_yaml_config() -> dict:
+    with open(os.path.join(os.path.dirname(__file__), "config.yaml")) as config_file:
+        config = yaml.safe_load(config_file)
+
+    if config is not None:
+        with open(
+            os.path.join(os.path.dirname(__file__), "secrets.yaml")
+        ) as secrets_file:
+            config["Secrets"] = yaml.safe_load(secrets_file)
+    return config
+
+
 class YAMLConfig:
     CONFIG = dict()
     try:
-        with open(
-            os.path.join(os.path.dirname(__file__), "config.yaml")
-        ) as config_file:
-            CONFIG = yaml.safe_load(config_file)
-
-        if CONFIG is not None:
-            with open(
-                os.path.join(os.path.dirname(__file__), "secrets.yaml")
-            ) as secrets_file:
-                CONFIG["Secrets"] = yaml.safe_load(secrets_file)
+        CONFIG = load_yaml_config()
     except FileNotFoundError:
         LOG.error(
             "Failed to load YAML config. "
@@ -33,3 +36,21 @@ class YAMLConfig:
             "or filled in config.yaml + secrets.yaml."
         )
         sys.exit(-1)
+
+    @staticmethod
+    def reload():
+        """Re-read config.yaml and secrets.yaml into CONFIG
+
+        Only code that reads CONFIG when it runs sees the new values; module
+        level constants keep the ones loaded at startup. CONFIG is left as it
+        was if the files can't be read or config.yaml is empty, e.g. while
+        it is being rewritten.
+
+        Raises:
+            ValueError: config.yaml does not hold a non-empty mapping
+        """
+        config = load_yaml_config()
+        if not isinstance(config, dict) or len(config) == 0:
+            raise ValueError("config.yaml is empty or not a mapping")
+        YAMLConfig.CONFIG.clear()
+        YAMLConfig.CONFIG.update(config)
@@ -0,0 +1,64 @@
+import time
+from typing import Optional
+from discord.ext import tasks
+from config import YAMLConfig as Config
+from util.active_chatters import ActiveChatterSet
+
+ACTIVE_CHATTERS_CONFIG = Config.CONFIG["Discord"]["ActiveChatters"]
+
+ACTIVE_CHATTERS = ActiveChatterSet(ACTIVE_CHATTERS_CONFIG["WindowSeconds"])
+ACTIVE_T3_CHATTERS = ActiveChatterSet(ACTIVE_CHATTERS_CONFIG["T3WindowSeconds"])
+
+# When set, only messages containing the keyword count as activity
+KEYWORD: Optional[str] = None
+
+
+class ActiveChatterController:
+    @staticmethod
+    def record(user_id: int, content: str, t3: bool):
+        """Mark a stream chat message's author as active
+
+        Args:
+            user_id (int): Discord user ID of the author
+            content (str): Message content, checked for the keyword if one is set
+            t3 (bool): Whether the author is a T3 subscriber
+        """
+        if KEYWORD is not None and KEYWORD not in content:
+            return
+        now = time.monotonic()
+        ACTIVE_CHATTERS.touch(user_id, now)
+        if t3:
+            ACTIVE_T3_CHATTERS.touch(user_id, now)
+
+    @staticmethod
+    def sample(amount: int, t3_only: bool = False) -> list[int]:
+        """Pick distinct active chatters at random
+
+        Raises:
+            ValueError: If fewer than amount chatters are active
+        """
+        chatters = ACTIVE_T3_CHATTERS if t3_only else ACTIVE_CHATTERS
+        return chatters.sample(amount, time.monotonic())
+
+    @staticmethod
+    def get_keyword() -> Optional[str]:
+        return KEYWORD
+
+    @staticmethod
+    def set_keyword(keyword: str):
+        """Only count messages containing keyword from now on
+
+        Chatters seen before the keyword was set no longer count as active.
+        """
+        global KEYWORD
+        KEYWORD = keyword
+        now = time.monotonic()
+        ACTIVE_CHATTERS.reset(now)
+        ACTIVE_T3_CHATTERS.reset(now)
+
+
+@tasks.loop(seconds=30)
+async def remove_inactive_chatters():
+    now = time.monotonic()
+    ACTIVE_CHATTERS.evict(now)
+    ACTIVE_T3_CHATTERS.evict(now)
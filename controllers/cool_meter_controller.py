@@ -0,0 +1,31 @@
+import logging
+from config import YAMLConfig as Config
+from controllers.overlay_controller import OverlayController
+from util.cool_meter import CoolMeterAggregator
+
+WINDOW_SECONDS = Config.CONFIG["Discord"]["CoolMeter"]["WindowMilliseconds"] / 1000
+
+LOG = logging.getLogger(__name__)
+
+
+class CoolMeterController:
+    """Publishes cool meter votes from stream chat, one event per window"""
+
+    @staticmethod
+    async def publish(delta: int, voters: int):
+        await OverlayController.publish(
+            "cool", "/publish-cool", {"cool": delta, "voters": voters}
+        )
+
+    @staticmethod
+    def vote(user_id: int, delta: int):
+        """Count a +1 (cool) or -1 (uncool) from a chatter"""
+        COOL_METER.vote(user_id, delta)
+
+    @staticmethod
+    async def close():
+        """Publish the open window"""
+        await COOL_METER.close()
+
+
+COOL_METER = CoolMeterAggregator(CoolMeterController.publish, WINDOW_SECONDS)
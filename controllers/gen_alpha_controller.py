@@ -0,0 +1,35 @@
+import logging
+from typing import Optional
+from discord import Member, Message
+from config import YAMLConfig as Config
+from util.brainrot import BrainrotMatcher
+
+GEN_ALPHA_ROLE = Config.CONFIG["Discord"]["GenAlpha"]["Role"]
+
+LOG = logging.getLogger(__name__)
+
+MATCHER = BrainrotMatcher(Config.CONFIG["Discord"]["GenAlpha"]["Words"])
+
+
+class GenAlphaController:
+    """Custom chat rules for members with the Gen Alpha role"""
+
+    @staticmethod
+    def likely_brain_rot(message: Message) -> Optional[str]:
+        """Get the cringe term used in a message, if there is one"""
+        author = message.author
+        if not isinstance(author, Member) or author.get_role(GEN_ALPHA_ROLE) is None:
+            return None
+        return MATCHER.match(message.content)
+
+    @staticmethod
+    def reload_words() -> int:
+        """Reload the cringe word list from config.yaml
+
+        Returns:
+            int: Number of words now being matched
+        """
+        Config.reload()
+        MATCHER.load(Config.CONFIG["Discord"]["GenAlpha"]["Words"])
+        LOG.info(f"Reloaded {len(MATCHER.terms)} Gen Alpha words")
+        return len(MATCHER.terms)
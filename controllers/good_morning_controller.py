@@ -1,5 +1,5 @@
 from discord import Client, Interaction, Thread
-from db import DB
+from db import AsyncDB
 from config import YAMLConfig as Config
 from datetime import datetime, timedelta
 from time import mktime as epochtime
@@ -38,7 +38,7 @@ class GoodMorningController:
         self.client = client
 
     async def get_morning_points(interaction: Interaction):
-        points = DB().get_morning_points(interaction.user.id)
+        points = await AsyncDB().get_morning_points(interaction.user.id)
         await interaction.response.send_message(
             f"Your current weekly count is {points}!", ephemeral=True
         )
@@ -70,13 +70,13 @@ class GoodMorningController:
                 GoodMorningController.outside_window_response(), ephemeral=True
             )
 
-        accrued = DB().accrue_morning_points(interaction.user.id)
+        accrued = await AsyncDB().accrue_morning_points(interaction.user.id)
         if not accrued:
             return await interaction.response.send_message(
                 "You've already said good morning today!", ephemeral=True
             )
 
-        points = DB().get_morning_points(interaction.user.id)
+        points = await AsyncDB().get_morning_points(interaction.user.id)
         await interaction.response.send_message(
             f"Good morning {interaction.user.mention}! "
             f"Your current weekly count is {points}! "
@@ -85,7 +85,7 @@ class GoodMorningController:
         )
 
     async def reward_users(interaction: Interaction):
-        rewarded_user_ids = DB().get_morning_reward_winners()
+        rewarded_user_ids = await AsyncDB().get_morning_reward_winners()
         if len(rewarded_user_ids) == 0:
             return await interaction.response.send_message(
                 "No users to reward!", ephemeral=True
@@ -119,7 +119,7 @@ class GoodMorningController:
 
         LOG.info("[AUTO GM TASK] Running automatic GM reward distribution...")
 
-        rewarded_user_ids = DB().get_morning_reward_winners()
+        rewarded_user_ids = await AsyncDB().get_morning_reward_winners()
         if len(rewarded_user_ids) == 0:
             LOG.info("[AUTO GM TASK] No users to reward")
             return
@@ -135,7 +135,7 @@ class GoodMorningController:
 
         await self.tempreward_upcoming_sunday(thread, rewarded_user_ids, reward_role)
 
-        DB().reset_all_morning_points()
+        await AsyncDB().reset_all_morning_points()
 
         reward_message = (
             f"Congrats {reward_role.mention}!"
@@ -180,13 +180,13 @@ class GoodMorningController:
             await asyncio.sleep(1)
 
     async def reset_all_morning_points(interaction: Interaction):
-        DB().reset_all_morning_points()
+        await AsyncDB().reset_all_morning_points()
         await interaction.response.send_message(
             "Successfully reset weekly good morning points!", ephemeral=True
         )
 
     async def good_morning_increment(points: int, interaction: Interaction):
-        DB().manual_increment_morning_points(points)
+        await AsyncDB().manual_increment_morning_points(points)
         await interaction.response.send_message(
             f"Successfully gave all users {points} good morning points!", ephemeral=True
         )
@@ -0,0 +1,140 @@
+from asyncio import Lock
+from datetime import date, datetime, timedelta
+import logging
+from typing import Optional
+from discord.ext import tasks
+from config import YAMLConfig as Config
+from db import AsyncDB, RaffleType
+from models.live_raffle import LiveRaffle
+
+FLUSH_INTERVAL_SECONDS = Config.CONFIG["Discord"]["Raffles"]["EntryFlushSeconds"]
+
+LOG = logging.getLogger(__name__)
+
+# guild_id -> raffle started by this process, until it is closed
+LIVE_RAFFLES: dict[int, LiveRaffle] = {}
+# Held while entries are written, so closing a raffle waits for a flush that
+# is already running
+FLUSH_LOCK = Lock()
+
+
+def win_cooldown_start() -> date:
+    """Winning a normal raffle that ended after this blocks entering another"""
+    return datetime.now().date() - timedelta(days=6)
+
+
+class LiveRaffleController:
+    @staticmethod
+    async def start(
+        guild_id: int, message_id: int, raffle_type: RaffleType
+    ) -> LiveRaffle:
+        """Create a raffle and load everything entering it needs into memory
+
+        Args:
+            guild_id (int): Guild the raffle is in
+            message_id (int): Message holding the raffle embed
+            raffle_type (RaffleType): Type of raffle to start
+
+        Returns:
+            LiveRaffle: The raffle's in-memory state
+        """
+        loss_streaks, recent_wins = {}, {}
+        async with AsyncDB().unit() as uow:
+            raffle_id = await uow.create_raffle(guild_id, message_id, raffle_type)
+            role_modifiers = await uow.get_role_modifiers(guild_id)
+            if raffle_type == RaffleType.normal:
+                loss_streaks = await uow.get_loss_streaks()
+                recent_wins = await uow.get_recent_wins(guild_id, win_cooldown_start())
+
+        live_raffle = LiveRaffle(
+            raffle_id,
+            message_id,
+            role_modifiers=dict(role_modifiers),
+            loss_streaks=loss_streaks,
+            recent_wins=recent_wins,
+        )
+        LIVE_RAFFLES[guild_id] = live_raffle
+        return live_raffle
+
+    @staticmethod
+    def get(guild_id: int) -> Optional[LiveRaffle]:
+        """Get the raffle accepting entries in a guild, if there is one"""
+        live_raffle = LIVE_RAFFLES.get(guild_id)
+        if live_raffle is None or not live_raffle.accepting_entries:
+            return None
+        return live_raffle
+
+    @staticmethod
+    async def refresh_user(guild_id: int, user_id: int):
+        """Reload a user's recent wins and loss streak after a mod changes them"""
+        live_raffle = LIVE_RAFFLES.get(guild_id)
+        if live_raffle is None:
+            return
+
+        async with AsyncDB().unit() as uow:
+            weekly_wins, last_win_entry_dt = await uow.get_recent_win_stats(
+                guild_id=guild_id, user_id=user_id, after=win_cooldown_start()
+            )
+            loss_streak = await uow.get_loss_streak_for_user(user_id)
+
+        if weekly_wins > 0 and last_win_entry_dt is not None:
+            live_raffle.recent_wins[user_id] = last_win_entry_dt
+        else:
+            live_raffle.recent_wins.pop(user_id, None)
+        live_raffle.loss_streaks[user_id] = loss_streak
+
+    @staticmethod
+    async def flush(live_raffle: LiveRaffle):
+        """Write a raffle's queued entries to the DB in one insert
+
+        Entries that fail to write are queued again before the error is raised.
+        """
+        async with FLUSH_LOCK:
+            entries = live_raffle.take_pending()
+            if len(entries) == 0:
+                return
+
+            try:
+                await AsyncDB().create_raffle_entries(live_raffle.raffle_id, entries)
+            except Exception:
+                LOG.exception(
+                    f"Failed to write {len(entries)} entries for raffle"
+                    f" {live_raffle.raffle_id}"
+                )
+                live_raffle.restore_pending(entries)
+                raise
+
+    @staticmethod
+    async def flush_all():
+        for live_raffle in list(LIVE_RAFFLES.values()):
+            try:
+                await LiveRaffleController.flush(live_raffle)
+            except Exception:
+                # Already logged, and retried on the next flush
+                pass
+
+    @staticmethod
+    async def close(guild_id: int):
+        """Stop accepting entries and write every queued one to the DB
+
+        Must finish before winners are drawn, so nobody who entered is missed.
+        Does nothing if this process didn't start the guild's raffle.
+        """
+        live_raffle = LIVE_RAFFLES.get(guild_id)
+        if live_raffle is None:
+            return
+
+        live_raffle.accepting_entries = False
+        try:
+            await LiveRaffleController.flush(live_raffle)
+        except Exception:
+            live_raffle.accepting_entries = True
+            raise
+
+        if LIVE_RAFFLES.get(guild_id) is live_raffle:
+            del LIVE_RAFFLES[guild_id]
+
+
+@tasks.loop(seconds=FLUSH_INTERVAL_SECONDS)
+async def flush_pending_entries():
+    await LiveRaffleController.flush_all()
@@ -1,31 +1,42 @@
-from threading import Thread
-import requests
-
+from util.overlay_publisher import OverlayPublisher
 from util.server_utils import get_base_url
 from config import YAMLConfig as Config
 import logging
 
-PUBLISH_OVERLAY_URL = f"{get_base_url()}/publish-overlay"
 AUTH_TOKEN = Config.CONFIG["Secrets"]["Server"]["Token"]
+PUBLISHER_CONFIG = Config.CONFIG["Discord"]["OverlayPublisher"]
 
 LOG = logging.getLogger(__name__)
 
+PUBLISHER = OverlayPublisher(
+    get_base_url(),
+    AUTH_TOKEN,
+    workers=PUBLISHER_CONFIG["Workers"],
+    queue_size=PUBLISHER_CONFIG["QueueSize"],
+    attempts=PUBLISHER_CONFIG["Attempts"],
+)
+
 
 class OverlayController:
     @staticmethod
-    def publish_overlay(overlay_config: dict):
-        Thread(
-            target=publish_overlay,
-            args=(overlay_config,),
-        ).start()
-
-
-def publish_overlay(overlay_config: dict):
-    response = requests.patch(
-        url=PUBLISH_OVERLAY_URL,
-        json=overlay_config,
-        headers={"x-access-token": AUTH_TOKEN},
-    )
-
-    if response.status_code != 200:
-        LOG.error(f"Failed to publish overlay updates: {response.text}")
+    async def publish(type: str, path: str, payload: dict, method: str = "POST"):
+        """Send an event to the overlay server through the shared publisher
+
+        Args:
+            type (str): Event type, used to label metrics
+            path (str): Server endpoint, e.g. /publish-poll
+            payload (dict): JSON body
+            method (str): HTTP method. Defaults to POST
+        """
+        await PUBLISHER.publish(type, path, payload, method)
+
+    @staticmethod
+    async def publish_overlay(overlay_config: dict):
+        await OverlayController.publish(
+            "overlay", "/publish-overlay", overlay_config, method="PATCH"
+        )
+
+    @staticmethod
+    async def close():
+        """Send any queued events and close the publisher's connections"""
+        await PUBLISHER.close()
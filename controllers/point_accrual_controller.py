@@ -0,0 +1,118 @@
+from datetime import datetime
+import logging
+from discord.ext import tasks
+from config import YAMLConfig as Config
+from db import AsyncDB
+from db.point_accrual import (
+    MIN_ACCRUAL_TIME,
+    POINTS_PER_ACCRUAL,
+    next_accrual_time,
+)
+
+FLUSH_INTERVAL_SECONDS = Config.CONFIG["Discord"]["ChannelPoints"][
+    "AccrualFlushSeconds"
+]
+
+LOG = logging.getLogger(__name__)
+
+# user_id -> timestamp of the user's last accrual, as it will be stored in the DB.
+# Only users who accrued within the last MIN_ACCRUAL_TIME are kept
+LAST_ACCRUED: dict[int, datetime] = {}
+# user_id -> (points, timestamp) awarded in memory but not yet written to the DB
+PENDING_ACCRUALS: dict[int, tuple[int, datetime]] = {}
+
+
+class PointAccrualController:
+    @staticmethod
+    async def accrue_channel_points(user_id: int, multiplier: int) -> bool:
+        """Accrues channel points for a given user without writing to the DB
+
+        A user may accrue once MIN_ACCRUAL_TIME has passed since their
+        ChannelPoints.timestamp, which deposits and withdrawals also bump to
+        the time they happened. A recent entry in LAST_ACCRUED is enough to
+        turn the user away without touching the DB. Otherwise the stored
+        timestamp is read, so those bumps are seen, and the later of the two
+        is used, since the stored one lags behind pending accruals. Awarded
+        points are buffered in PENDING_ACCRUALS until the next flush.
+
+        Args:
+            user_id (int): Discord user ID to give points to
+            multiplier (int): The user's accrual multiplier, from their RolePolicy
+
+        Returns:
+            bool: True if points were awarded to the user
+        """
+        now = datetime.now()
+        last_accrued = LAST_ACCRUED.get(user_id)
+        if last_accrued is None or now - last_accrued >= MIN_ACCRUAL_TIME:
+            stored = await AsyncDB().get_last_accrual_time(user_id)
+            # Another message from this user may have been handled while we waited
+            last_accrued = LAST_ACCRUED.get(user_id)
+            if stored is not None and (last_accrued is None or stored > last_accrued):
+                last_accrued = LAST_ACCRUED[user_id] = stored
+        if last_accrued is None:
+            # First accrual ever for this user
+            PointAccrualController._buffer(user_id, POINTS_PER_ACCRUAL, now)
+            return True
+
+        updated_timestamp = next_accrual_time(last_accrued, now)
+        if updated_timestamp is None:
+            return False
+
+        points_to_accrue = POINTS_PER_ACCRUAL * multiplier
+        PointAccrualController._buffer(user_id, points_to_accrue, updated_timestamp)
+        return True
+
+    @staticmethod
+    def _buffer(user_id: int, points: int, timestamp: datetime):
+        LAST_ACCRUED[user_id] = timestamp
+        pending_points, _ = PENDING_ACCRUALS.get(user_id, (0, timestamp))
+        PENDING_ACCRUALS[user_id] = (pending_points + points, timestamp)
+
+    @staticmethod
+    async def flush():
+        """Write every pending accrual to the DB in one upsert, then forget
+        last accrual times that can no longer turn a user away"""
+        if len(PENDING_ACCRUALS) == 0:
+            PointAccrualController._evict(datetime.now())
+            return
+
+        accruals = [
+            (user_id, points, timestamp)
+            for user_id, (points, timestamp) in PENDING_ACCRUALS.items()
+        ]
+        PENDING_ACCRUALS.clear()
+        try:
+            await AsyncDB().flush_channel_point_accruals(accruals)
+        except Exception:
+            LOG.exception(f"Failed to flush {len(accruals)} channel point accruals")
+            # Put the batch back so it is retried on the next flush
+            for user_id, points, timestamp in accruals:
+                pending_points, pending_timestamp = PENDING_ACCRUALS.get(
+                    user_id, (0, timestamp)
+                )
+                PENDING_ACCRUALS[user_id] = (
+                    pending_points + points,
+                    max(timestamp, pending_timestamp),
+                )
+            return
+
+        PointAccrualController._evict(datetime.now())
+
+    @staticmethod
+    def _evict(now: datetime):
+        # Users still waiting on a write keep their entry, since the DB
+        # doesn't have their latest accrual time yet
+        expired = [
+            user_id
+            for user_id, last_accrued in LAST_ACCRUED.items()
+            if now - last_accrued >= MIN_ACCRUAL_TIME
+            and user_id not in PENDING_ACCRUALS
+        ]
+        for user_id in expired:
+            del LAST_ACCRUED[user_id]
+
+
+@tasks.loop(seconds=FLUSH_INTERVAL_SECONDS)
+async def flush_pending_accruals():
+    await PointAccrualController.flush()
@@ -1,19 +1,32 @@
+from discord.ext import tasks
+import logging
+from typing import Optional, Union
 from models.transaction import Transaction
-from db import DB
+from db import AsyncDB, AsyncUnitOfWork
 from config import YAMLConfig as Config
 
 MAXIMUM_TRANSACTIONS = Config.CONFIG["Discord"]["PointsHistory"]["MaximumTransactions"]
+COMPACTION_CADENCE = Config.CONFIG["Discord"]["PointsHistory"][
+    "CompactionCadenceMinutes"
+]
+
+LOG = logging.getLogger(__name__)
 
 
 class PointHistoryController:
     @staticmethod
-    def record_transaction(transaction: Transaction):
-        user_history = DB().get_transaction_history(transaction.user_id)
-        if len(user_history) >= MAXIMUM_TRANSACTIONS:
-            to_delete = user_history[MAXIMUM_TRANSACTIONS - 1 :]
-            DB().delete_transactions(to_delete)
-        DB().record_transaction(transaction)
+    async def record_transaction(
+        transaction: Transaction,
+        db: Optional[Union[AsyncDB, AsyncUnitOfWork]] = None,
+    ):
+        await (db or AsyncDB()).record_transaction(transaction)
 
     @staticmethod
-    def get_transaction_history(user_id: int):
-        return DB().get_transaction_history(user_id)
+    async def get_transaction_history(user_id: int):
+        return await AsyncDB().get_transaction_history(user_id, MAXIMUM_TRANSACTIONS)
+
+
+@tasks.loop(minutes=COMPACTION_CADENCE)
+async def trim_transaction_history():
+    deleted = await AsyncDB().trim_transaction_history(MAXIMUM_TRANSACTIONS)
+    LOG.info(f"[POINTS HISTORY TASK] Trimmed {deleted} old transactions")
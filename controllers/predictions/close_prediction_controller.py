@@ -1,12 +1,18 @@
 from controllers.predictions.update_prediction_controller import (
     UpdatePredictionController,
 )
-from db import DB
+from db import AsyncDB
+import logging
+
+LOG = logging.getLogger(__name__)
 
 
 class ClosePredictionController:
     @staticmethod
     async def close_prediction(guild_id: int):
-        DB().close_prediction(guild_id)
-        prediction_id = DB().get_ongoing_prediction_id(guild_id)
-        UpdatePredictionController.publish_prediction_summary(prediction_id)
+        await AsyncDB().close_prediction(guild_id)
+        prediction_id = await AsyncDB().get_ongoing_prediction_id(guild_id)
+        # Entries are closed, so check the totals the final summary shows
+        if not await AsyncDB().reconcile_pot_totals(prediction_id):
+            LOG.warn(f"Pot totals for {prediction_id=} had drifted and were reset")
+        await UpdatePredictionController.publish_prediction_summary(prediction_id)
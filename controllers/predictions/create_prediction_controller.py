@@ -3,7 +3,7 @@ from discord import Client, Message
 from controllers.predictions.update_prediction_controller import (
     UpdatePredictionController,
 )
-from db import DB
+from db import AsyncDB
 from config import YAMLConfig as Config
 import logging
 from views.predictions.close_prediction_embed import ClosePredictionEmbed
@@ -23,8 +23,8 @@ REFUND_PREDICTION_CHOICE = -1
 
 class CreatePredictionController:
     @staticmethod
-    def has_ongoing_prediction(guild_id: int):
-        return DB().has_ongoing_prediction(guild_id)
+    async def has_ongoing_prediction(guild_id: int):
+        return await AsyncDB().has_ongoing_prediction(guild_id)
 
     @staticmethod
     async def create_prediction(
@@ -39,7 +39,7 @@ class CreatePredictionController:
         client: Client,
     ):
         end_time = datetime.now() + timedelta(seconds=duration)
-        DB().create_prediction(
+        await AsyncDB().create_prediction(
             guild_id,
             channel_id,
             message.id,
@@ -49,8 +49,8 @@ class CreatePredictionController:
             end_time,
             set_nickname,
         )
-        prediction_id = DB().get_ongoing_prediction_id(guild_id)
-        UpdatePredictionController.publish_prediction_summary(prediction_id)
+        prediction_id = await AsyncDB().get_ongoing_prediction_id(guild_id)
+        await UpdatePredictionController.publish_prediction_summary(prediction_id)
         prediction_embed = PredictionEmbed(guild_id, description, end_time)
         prediction_view = PredictionView(
             prediction_embed, option_one, option_two, client
@@ -73,23 +73,23 @@ class CreatePredictionController:
         option_two: str,
         client: Client,
     ):
-        DB().rename_prediction(
+        await AsyncDB().rename_prediction(
             guild_id,
             description,
             option_one,
             option_two,
         )
-        prediction_id = DB().get_ongoing_prediction_id(guild_id)
-        UpdatePredictionController.publish_prediction_summary(prediction_id)
-        prediction_summary = DB().get_prediction_summary(prediction_id)
+        prediction_id = await AsyncDB().get_ongoing_prediction_id(guild_id)
+        await UpdatePredictionController.publish_prediction_summary(prediction_id)
+        prediction_summary = await AsyncDB().get_prediction_summary(prediction_id)
         prediction_embed = PredictionEmbed(
             guild_id, description, prediction_summary.end_time
         )
         prediction_view = PredictionView(
             prediction_embed, option_one, option_two, client
         )
-        channel = client.get_channel(DB().get_prediction_channel_id(prediction_id))
-        message = channel.get_partial_message(
-            DB().get_prediction_message_id(prediction_id)
-        )
+        channel_id = await AsyncDB().get_prediction_channel_id(prediction_id)
+        message_id = await AsyncDB().get_prediction_message_id(prediction_id)
+        channel = client.get_channel(channel_id)
+        message = channel.get_partial_message(message_id)
         await message.edit(content="", embed=prediction_embed, view=prediction_view)
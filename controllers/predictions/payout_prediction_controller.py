@@ -1,9 +1,7 @@
 from asyncio import Lock
 import sys
-from typing import Generator, Tuple
 
 from discord import Client, Interaction
-from controllers.point_history_controller import PointHistoryController
 from controllers.predictions.nickname_prediction_controller import (
     NicknamePredictionController,
 )
@@ -17,23 +15,14 @@ from db.models import (
     PredictionEntry,
     PredictionSummary,
 )
-from db import DB
+from db import AsyncDB
 import logging
 
-from models.transaction import Transaction
 
 LOG = logging.getLogger(__name__)
 PREDICTION_LOCK = Lock()
 
 
-class ReturnableGenerator:
-    def __init__(self, gen):
-        self.gen = gen
-
-    def __iter__(self):
-        self.return_value = yield from self.gen
-
-
 class PayoutPredictionController:
     @staticmethod
     def get_winning_pot(winning_option: int, option_one: int, option_two: int):
@@ -46,41 +35,54 @@ class PayoutPredictionController:
 
     @staticmethod
     def calculate_payout(entry: PredictionEntry, winning_pot: int, total_points: int):
+        if winning_pot == 0:
+            return 0
         pot_percentage = entry.channel_points / winning_pot
         return round(total_points * pot_percentage)
 
     @staticmethod
-    def get_entries_for_prediction(
+    async def get_entries_for_prediction(
         prediction_id: int,
-    ) -> Generator[PredictionEntry, None, int]:
-        option_one_entries = DB().get_prediction_entries_for_guess(prediction_id, 0)
-        option_two_entries = DB().get_prediction_entries_for_guess(prediction_id, 1)
-        entries = option_one_entries + option_two_entries
-        total_points = 0
-        for entry in entries:
-            total_points += entry.channel_points
-            yield entry
-        return total_points
+    ) -> list[PredictionEntry]:
+        option_one_entries = await AsyncDB().get_prediction_entries_for_guess(
+            prediction_id, 0
+        )
+        option_two_entries = await AsyncDB().get_prediction_entries_for_guess(
+            prediction_id, 1
+        )
+        return option_one_entries + option_two_entries
 
     @staticmethod
-    def get_payout_for_option(
+    async def get_payout_for_option(
         option: int, prediction_id: int
-    ) -> Generator[Tuple[int, int], None, int]:
-        option_one, option_two = DB().get_prediction_point_counts(prediction_id)
+    ) -> tuple[list[tuple[int, int]], int]:
+        """Calculate the payout owed to every entry on the winning option
+
+        Returns:
+            tuple[list[tuple[int, int]], int]: (user_id, payout) pairs, and the
+                total number of points in the prediction
+        """
+        option_one, option_two = await AsyncDB().get_prediction_point_counts(
+            prediction_id
+        )
         total_points = option_one + option_two
         winning_pot = PayoutPredictionController.get_winning_pot(
             option, option_one, option_two
         )
-        entries: list[PredictionEntry] = DB().get_prediction_entries_for_guess(
-            prediction_id, option
+        entries: list[PredictionEntry] = (
+            await AsyncDB().get_prediction_entries_for_guess(prediction_id, option)
         )
 
-        for entry in entries:
-            payout = PayoutPredictionController.calculate_payout(
-                entry, winning_pot, total_points
+        payouts = [
+            (
+                entry.user_id,
+                PayoutPredictionController.calculate_payout(
+                    entry, winning_pot, total_points
+                ),
             )
-            yield entry.user_id, payout
-        return total_points
+            for entry in entries
+        ]
+        return payouts, total_points
 
     @staticmethod
     async def _perform_payout(
@@ -89,31 +91,16 @@ class PayoutPredictionController:
         client: Client,
         guild_id: int,
     ):
-        payout_generator = ReturnableGenerator(
-            PayoutPredictionController.get_payout_for_option(
-                option.value, prediction_id
-            )
+        payouts, total_points = await PayoutPredictionController.get_payout_for_option(
+            option.value, prediction_id
         )
 
-        for user_id, payout in payout_generator:
-            success, new_balance = DB().deposit_points(user_id, payout)
-            if not success:
-                LOG.warn(f"Failed to give points to {user_id}")
-                continue
-            PointHistoryController.record_transaction(
-                Transaction(
-                    user_id,
-                    payout,
-                    new_balance - payout,
-                    new_balance,
-                    f"Prediction Payout ({option.name})",
-                )
-            )
-
-        total_points = payout_generator.return_value
+        await AsyncDB().deposit_points_bulk(
+            payouts, f"Prediction Payout ({option.name})"
+        )
 
-        prediction_summary = DB().get_prediction_summary(prediction_id)
-        UpdatePredictionController.publish_prediction_end_summary(
+        prediction_summary = await AsyncDB().get_prediction_summary(prediction_id)
+        await UpdatePredictionController.publish_prediction_end_summary(
             prediction_id, prediction_summary
         )
 
@@ -150,18 +137,18 @@ class PayoutPredictionController:
     ):
         await PREDICTION_LOCK.acquire()
         try:
-            if not DB().has_ongoing_prediction(guild_id):
+            if not await AsyncDB().has_ongoing_prediction(guild_id):
                 return False, "No ongoing prediction!"
 
-            if DB().accepting_prediction_entries(guild_id):
+            if await AsyncDB().accepting_prediction_entries(guild_id):
                 return False, "Please close prediction from entries before paying out!"
 
-            prediction_id = DB().get_ongoing_prediction_id(guild_id)
+            prediction_id = await AsyncDB().get_ongoing_prediction_id(guild_id)
             payout_message = await PayoutPredictionController._perform_payout(
                 prediction_id, option, client, guild_id
             )
 
-            DB().complete_prediction(guild_id, option.value)
+            await AsyncDB().complete_prediction(guild_id, option.value)
             return True, payout_message
         except:
             return False, "Failed to payout prediction!"
@@ -179,31 +166,20 @@ class PayoutPredictionController:
 
     @staticmethod
     async def _perform_refund(prediction_id: int, client: Client, guild_id: int):
-        for entry in PayoutPredictionController.get_entries_for_prediction(
+        entries = await PayoutPredictionController.get_entries_for_prediction(
             prediction_id
-        ):
-            result, new_balance = DB().deposit_points(
-                entry.user_id, entry.channel_points
-            )
-            if not result:
-                LOG.warn(f"Failed to return points to {entry.user_id}")
-                continue
-            PointHistoryController.record_transaction(
-                Transaction(
-                    entry.user_id,
-                    entry.channel_points,
-                    new_balance - entry.channel_points,
-                    new_balance,
-                    "Prediction Refund",
-                )
-            )
+        )
+        await AsyncDB().deposit_points_bulk(
+            [(entry.user_id, entry.channel_points) for entry in entries],
+            "Prediction Refund",
+        )
 
-        UpdatePredictionController.publish_prediction_end_summary(prediction_id)
+        await UpdatePredictionController.publish_prediction_end_summary(prediction_id)
 
         refund_message = "Prediction has been refunded!"
         await reply_to_initial_message(prediction_id, client, refund_message)
 
-        prediction_summary = DB().get_prediction_summary(prediction_id)
+        prediction_summary = await AsyncDB().get_prediction_summary(prediction_id)
 
         if prediction_summary.set_nickname == True:
             guild = client.get_guild(guild_id)
@@ -217,18 +193,20 @@ class PayoutPredictionController:
     async def refund_prediction_for_guild(guild_id: int, client: Client):
         await PREDICTION_LOCK.acquire()
         try:
-            if not DB().has_ongoing_prediction(guild_id):
+            if not await AsyncDB().has_ongoing_prediction(guild_id):
                 return False, "No ongoing prediction!"
 
-            if DB().accepting_prediction_entries(guild_id):
+            if await AsyncDB().accepting_prediction_entries(guild_id):
                 return False, "Please close prediction from entries before refunding!"
 
-            prediction_id = DB().get_ongoing_prediction_id(guild_id)
+            prediction_id = await AsyncDB().get_ongoing_prediction_id(guild_id)
             refund_message = await PayoutPredictionController._perform_refund(
                 prediction_id, client, guild_id
             )
 
-            DB().complete_prediction(guild_id, PredictionOutcome.refund.value)
+            await AsyncDB().complete_prediction(
+                guild_id, PredictionOutcome.refund.value
+            )
             return True, refund_message
         except:
             return False, "Failed to refund prediction!"
@@ -243,7 +221,7 @@ class PayoutPredictionController:
         return await interaction.response.send_message(message, ephemeral=True)
 
     @staticmethod
-    def reset_points_from_payout(prediction: Prediction):
+    async def reset_points_from_payout(prediction: Prediction):
         """
         Resets points to the state they were in immediately prior to payout.
         This means that everyone's balance will return to what it was immediately
@@ -251,24 +229,26 @@ class PayoutPredictionController:
         """
         if prediction.winning_option != PredictionOutcome.refund.value:
             # Withdraw points from previous winners
-            payout_generator = PayoutPredictionController.get_payout_for_option(
+            payouts, _ = await PayoutPredictionController.get_payout_for_option(
                 prediction.winning_option, prediction.id
             )
 
-            for user_id, payout in payout_generator:
-                DB().withdraw_points(user_id, payout)
+            for user_id, payout in payouts:
+                await AsyncDB().withdraw_points(user_id, payout, allow_overdraft=True)
         else:
-            entry_generator = PayoutPredictionController.get_entries_for_prediction(
+            entries = await PayoutPredictionController.get_entries_for_prediction(
                 prediction.id
             )
-            for entry in entry_generator:
-                DB().withdraw_points(entry.user_id, entry.channel_points)
+            for entry in entries:
+                await AsyncDB().withdraw_points(
+                    entry.user_id, entry.channel_points, allow_overdraft=True
+                )
 
     @staticmethod
     async def redo_payout(
         option: PredictionOutcome, interaction: Interaction, client: Client
     ):
-        prediction = DB().get_last_prediction(interaction.guild_id)
+        prediction = await AsyncDB().get_last_prediction(interaction.guild_id)
         if prediction.winning_option is None:
             return await interaction.response.send_message(
                 "Previous prediction has not yet been completed!", ephemeral=True
@@ -279,7 +259,7 @@ class PayoutPredictionController:
                 f"Prediction outcome is already {option.name}", ephemeral=True
             )
 
-        PayoutPredictionController.reset_points_from_payout(prediction)
+        await PayoutPredictionController.reset_points_from_payout(prediction)
 
         reply_message = ""
         if option != PredictionOutcome.refund:
@@ -296,7 +276,7 @@ class PayoutPredictionController:
                 prediction.id, client
             )
 
-        DB().set_prediction_outcome(prediction.id, option.value)
+        await AsyncDB().set_prediction_outcome(prediction.id, option.value)
         await interaction.response.send_message(reply_message, ephemeral=True)
 
     @staticmethod
@@ -314,7 +294,7 @@ class PayoutPredictionController:
         opt_one = prediction_summary.option_one
         opt_two = prediction_summary.option_two
 
-        for entry in PayoutPredictionController.get_entries_for_prediction(
+        for entry in await PayoutPredictionController.get_entries_for_prediction(
             prediction_id
         ):
             member = guild.get_member(entry.user_id)
@@ -332,8 +312,8 @@ class PayoutPredictionController:
 
 
 async def reply_to_initial_message(prediction_id: int, client: Client, message: str):
-    prediction_message_id = DB().get_prediction_message_id(prediction_id)
-    prediction_channel_id = DB().get_prediction_channel_id(prediction_id)
+    prediction_message_id = await AsyncDB().get_prediction_message_id(prediction_id)
+    prediction_channel_id = await AsyncDB().get_prediction_channel_id(prediction_id)
     prediction_message = await client.get_channel(prediction_channel_id).fetch_message(
         prediction_message_id
     )
@@ -1,5 +1,4 @@
 from discord import Client, Forbidden, Interaction, Member
-from threading import Thread
 from config import YAMLConfig as Config
 from controllers.point_history_controller import PointHistoryController
 from controllers.predictions.nickname_prediction_controller import (
@@ -11,7 +10,7 @@ from controllers.predictions.update_prediction_controller import (
 from db.models import (
     PredictionChoice,
 )
-from db import DB
+from db import AsyncDB
 from models.transaction import Transaction
 import logging
 
@@ -26,55 +25,62 @@ class PredictionEntryController:
         interaction: Interaction,
         client: Client,
     ) -> bool:
-        if not DB().accepting_prediction_entries(interaction.guild_id):
-            return await interaction.followup.send(
-                "Predictions are currently closed!", ephemeral=True
-            )
-
         if channel_points <= 0:
             return await interaction.followup.send(
                 "You must wager a positive number of points!", ephemeral=True
             )
 
-        point_balance = DB().get_point_balance(interaction.user.id)
-        if channel_points > point_balance:
+        # One connection for the whole bet. The withdrawal is rolled back if
+        # recording the entry raises, and the prediction is only read once
+        success = False
+        async with AsyncDB().unit() as uow:
+            accepting = await uow.accepting_prediction_entries(interaction.guild_id)
+            if accepting:
+                result, new_balance = await uow.withdraw_points(
+                    interaction.user.id, channel_points
+                )
+                if result:
+                    await PointHistoryController.record_transaction(
+                        Transaction(
+                            interaction.user.id,
+                            -channel_points,
+                            new_balance + channel_points,
+                            new_balance,
+                            f"Prediction Entry ({guess.name})",
+                        ),
+                        uow,
+                    )
+                    success = await uow.create_prediction_entry(
+                        interaction.guild_id,
+                        interaction.user.id,
+                        channel_points,
+                        guess.value,
+                    )
+
+                    prediction_id = await uow.get_ongoing_prediction_id(
+                        interaction.guild_id
+                    )
+                    channel_id = await uow.get_prediction_channel_id(prediction_id)
+                    message_id = await uow.get_prediction_message_id(prediction_id)
+
+                    # We'll use this prediction summary for the reply message
+                    prediction_summary = await uow.get_prediction_summary(prediction_id)
+
+        if not accepting:
             return await interaction.followup.send(
-                f"You can only wager up to {point_balance} points", ephemeral=True
+                "Predictions are currently closed!", ephemeral=True
             )
 
-        result, new_balance = DB().withdraw_points(interaction.user.id, channel_points)
         if not result:
             return await interaction.followup.send(
-                "Unable to cast vote - please try again!", ephemeral=True
+                f"You can only wager up to {new_balance} points", ephemeral=True
             )
 
-        PointHistoryController.record_transaction(
-            Transaction(
-                interaction.user.id,
-                -channel_points,
-                point_balance,
-                new_balance,
-                f"Prediction Entry ({guess.name})",
-            )
-        )
-
-        success = DB().create_prediction_entry(
-            interaction.guild_id, interaction.user.id, channel_points, guess.value
-        )
         if not success:
             await interaction.followup.send("Unable to cast vote", ephemeral=True)
             return False
 
-        prediction_id = DB().get_ongoing_prediction_id(interaction.guild_id)
-
-        channel_id = DB().get_prediction_channel_id(prediction_id)
-        message_id = DB().get_prediction_message_id(prediction_id)
-
-        # We'll use this prediction summary for the reply message
-        prediction_summary = DB().get_prediction_summary(prediction_id)
-        Thread(
-            target=UpdatePredictionController.publish_update, args=(prediction_summary,)
-        ).start()
+        await UpdatePredictionController.publish_update(prediction_summary)
 
         chosen_option = (
             prediction_summary.option_one
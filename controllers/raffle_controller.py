@@ -1,11 +1,13 @@
-import discord
 from datetime import datetime, timedelta
 from typing import Optional
 from discord import Interaction, Member
 from commands.overlay_commands import LOG
-from db import DB, RaffleEntry, RaffleType
+from db import AsyncDB, RaffleEntry, RaffleType
 from config import YAMLConfig as Config
-import random
+from controllers.live_raffle_controller import LiveRaffleController
+from controllers.role_policy_controller import RolePolicyController
+from util.weighted_sampling import uses_numpy, weighted_sample
+import secrets
 
 VOD_APPROVED_ROLE_ID = Config.CONFIG["Discord"]["VODReview"]["ApprovedRole"]
 VOD_SUBMISSION_CHANNEL_ID = Config.CONFIG["Discord"]["VODReview"]["SubmissionChannel"]
@@ -15,6 +17,13 @@ GIFTED_TIER3_ROLE = Config.CONFIG["Discord"]["Subscribers"]["GiftedTier3Role"]
 HIDDEN_MOD_ROLE = Config.CONFIG["Discord"]["Roles"]["HiddenMod"]
 STAFF_DEVELOPER_ROLE = Config.CONFIG["Discord"]["Roles"]["StaffDev"]
 MOD_ROLE = Config.CONFIG["Discord"]["Roles"]["Mod"]
+T3_RAFFLE_ROLES = {
+    TIER3_ROLE,
+    GIFTED_TIER3_ROLE,
+    MOD_ROLE,
+    HIDDEN_MOD_ROLE,
+    STAFF_DEVELOPER_ROLE,
+}
 
 
 class RaffleController:
@@ -24,6 +33,9 @@ class RaffleController:
         raffle_message_id: int,
         num_winners: int,
     ) -> None:
+        # Stop taking entries and write the queued ones before drawing winners
+        await LiveRaffleController.close(interaction.guild.id)
+
         if num_winners == 0:
             await interaction.response.send_message("There is no winner.")
             return
@@ -35,7 +47,7 @@ class RaffleController:
 
         await interaction.response.defer(thinking=True)
 
-        raffle_entries = DB().get_raffle_entries(guild_id)
+        raffle_entries = await AsyncDB().get_raffle_entries(guild_id)
         if len(raffle_entries) == 0:
             await interaction.followup.send("No one is elligible to win the raffle.")
             return
@@ -55,41 +67,42 @@ class RaffleController:
                 f"Raffle winners are: {', '.join(w.mention for w in winners)}!"
             )
 
-        DB().record_win(guild_id, winner_ids)
+        await AsyncDB().record_win(guild_id, winner_ids)
 
     @staticmethod
     def choose_winners(entries: list[RaffleEntry], num_winners: int) -> list[int]:
         """
         Every raffle entry has a ticket count, which is their entry weight.
 
-        Then we let random.choices work its magic.
+        Each draw is seeded and the seed logged, along with whether NumPy
+        drew it, so it can be replayed with weighted_sample to audit the
+        result.
         """
         if len(entries) < num_winners:
             raise Exception("There are not enough entries for that many winners.")
 
-        # step 1. convert raffle entries into lists of user_ids and tickets
-        entrants = []
-        entrant_weights = []
-        for ent in entries:
-            entrants.append(ent.user_id)
-            entrant_weights.append(ent.tickets)
-
-        # step 3. using weighted probability (without replacement), select the random winner(s)
-        winners = RaffleController.weighted_sample_without_replacement(
-            population=entrants, weights=entrant_weights, k=num_winners
+        # step 1. convert raffle entries into lists of user_ids and tickets,
+        # in a stable order so the draw can be replayed from the seed
+        entries = sorted(entries, key=lambda ent: ent.id)
+        entrants = [ent.user_id for ent in entries]
+        entrant_weights = [ent.tickets for ent in entries]
+
+        # step 2. using weighted probability (without replacement), select the random winner(s)
+        seed = secrets.randbits(64)
+        LOG.info(
+            f"[RAFFLE] Drawing {num_winners} winners from {len(entries)} entries"
+            f" (raffle {entries[0].raffle_id if entries else None}) with seed {seed}"
+            f" (numpy={uses_numpy(len(entries))})"
         )
-
-        return winners
-
-    # h/t https://maxhalford.github.io/blog/weighted-sampling-without-replacement/
-    @staticmethod
-    def weighted_sample_without_replacement(population, weights, k):
-        v = [random.random() ** (1 / w) for w in weights]
-        order = sorted(range(len(population)), key=lambda i: v[i])
-        return [population[i] for i in order[-k:]]
+        return weighted_sample(entrants, entrant_weights, num_winners, seed=seed)
 
     @staticmethod
-    def get_tickets(guild_id: int, user: Member, raffle_type: RaffleType) -> int:
+    def get_tickets(
+        user: Member,
+        raffle_type: RaffleType,
+        role_modifiers: dict[int, int],
+        loss_streak: int,
+    ) -> int:
         """
         Calculate the number of tickers a specific user should have for a raffle entry.
         """
@@ -97,25 +110,27 @@ class RaffleController:
         tickets = 100
 
         # + any role modifiers from the DB
-        role_modifiers = DB().get_role_modifiers(guild_id)
-        tickets += sum(role_modifiers.get(r.id, 0) for r in user.roles)
+        role_ids = RolePolicyController.for_member(user).role_ids
+        tickets += sum(role_modifiers.get(role_id, 0) for role_id in role_ids)
 
         # add bad luck protection for normal raffles
         if raffle_type == RaffleType.normal:
             # + 5tk/loss since last win
-            loss_streak = DB().get_loss_streak_for_user(user.id)
             tickets += 5 * loss_streak
 
         return tickets
 
     @staticmethod
     def eligible_for_raffle(
-        guild_id: int, user: Member, raffle_type: RaffleType
+        user: Member, raffle_type: RaffleType, last_win_entry_dt: Optional[datetime]
     ) -> tuple[bool, Optional[str]]:
-
+        """
+        Check whether a user can enter a raffle. last_win_entry_dt is when the
+        user last won a normal raffle in the past week, if they have.
+        """
+        role_ids = RolePolicyController.for_member(user).role_ids
         if raffle_type == RaffleType.normal:
-            vod_approved_role = discord.utils.get(user.roles, id=VOD_APPROVED_ROLE_ID)
-            if vod_approved_role is None:
+            if VOD_APPROVED_ROLE_ID not in role_ids:
                 return (
                     False,
                     (
@@ -124,11 +139,7 @@ class RaffleController:
                     ),
                 )
 
-            one_week_ago = datetime.now().date() - timedelta(days=6)
-            weekly_wins, last_win_entry_dt = DB().get_recent_win_stats(
-                guild_id=guild_id, user_id=user.id, after=one_week_ago
-            )
-            if weekly_wins > 0 and last_win_entry_dt is not None:
+            if last_win_entry_dt is not None:
                 next_eligible_date = last_win_entry_dt.date() + timedelta(days=7)
                 next_eligible_ts = int(
                     datetime.combine(
@@ -145,17 +156,7 @@ class RaffleController:
             return True, None
 
         if raffle_type == RaffleType.t3_only:
-            if any(
-                role.id
-                in [
-                    TIER3_ROLE,
-                    GIFTED_TIER3_ROLE,
-                    MOD_ROLE,
-                    HIDDEN_MOD_ROLE,
-                    STAFF_DEVELOPER_ROLE,
-                ]
-                for role in user.roles
-            ):
+            if not role_ids.isdisjoint(T3_RAFFLE_ROLES):
                 return True, None
 
             return (
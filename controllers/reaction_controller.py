@@ -1,5 +1,8 @@
+from asyncio import Lock
 from discord import HTTPException, Message, Reaction
-from db import DB
+from discord.ext import tasks
+from db import AsyncDB
+from db.robomoji_index import RobomojiIndex
 from datetime import datetime, timedelta
 import logging
 from config import YAMLConfig as Config
@@ -9,12 +12,16 @@ LOG = logging.getLogger(__name__)
 DEFAULT_EMOJI_REACTION_DELAY = (
     15  # Default delay for Robomoji reactions if not set manually
 )
+LAST_USED_FLUSH_SECONDS = Config.CONFIG["Discord"]["Robomojis"]["LastUsedFlushSeconds"]
 CROWD_MUTE_EMOJI_ID = Config.CONFIG["Discord"]["CrowdMute"]["Emoji"]
 CROWD_MUTE_THRESHOLD = Config.CONFIG["Discord"]["CrowdMute"]["Threshold"]
 CROWD_MUTE_DURATION = Config.CONFIG["Discord"]["CrowdMute"]["Duration"]
 
 CROWD_MUTE_ENABLED = True
 
+# Stops every message sent before the index is loaded from loading it again
+INDEX_LOAD_LOCK = Lock()
+
 
 class ReactionController:
     """
@@ -27,37 +34,55 @@ class ReactionController:
         """
         Lookup configured reactions for the provided message author and apply them
         """
-        emojis = DB().get_reactions_for_user(message.author.id)
+        index = RobomojiIndex()
+        if not index.loaded:
+            async with INDEX_LOAD_LOCK:
+                if not index.loaded:
+                    await AsyncDB().load_robomoji_index()
+
+        emojis = index.get(message.author.id)
         if len(emojis) == 0:
-            return  # prevents further DB calls if user does not have any Robomojis
+            return  # most users don't have any Robomojis
 
-        db_emoji_delay = DB().get_emoji_reaction_delay()
         emoji_delay_seconds = (
-            db_emoji_delay
-            if db_emoji_delay != None
+            index.delay
+            if index.delay != None
             else DEFAULT_EMOJI_REACTION_DELAY  # handles case if delay has not been set yet
         )
 
-        last_reaction_datetime = DB().get_emoji_reaction_last_used(message.author.id)
-
-        robomoji_allowed_datetime = (
-            last_reaction_datetime or datetime.now()
-        ) + timedelta(
-            seconds=emoji_delay_seconds
-        )  # handles case on user's first message in new system
+        now = datetime.now()
+        last_reaction_datetime = index.last_used.get(message.author.id)
         if (
-            last_reaction_datetime
-            == None  # handles case on user's first message in new system
-            or robomoji_allowed_datetime <= datetime.now()
+            last_reaction_datetime is not None
+            and last_reaction_datetime + timedelta(seconds=emoji_delay_seconds) > now
         ):
-            for emoji in emojis:
-                try:
-                    await message.add_reaction(emoji)
-                except HTTPException as e:
-                    if e.code == 10014:
-                        LOG.error(f"Emoji {emoji} does not exist, removing from DB.")
-                        DB().toggle_emoji_reaction(message.author.id, emoji)
-            DB().set_emoji_reaction_last_used(message.author.id, datetime.now())
+            return
+
+        # Record the reaction before sending it so messages handled meanwhile
+        # wait out the delay. Written to the DB by flush_last_used
+        index.mark_used(message.author.id, now)
+        for emoji in list(emojis):
+            try:
+                await message.add_reaction(emoji)
+            except HTTPException as e:
+                if e.code == 10014:
+                    LOG.error(f"Emoji {emoji} does not exist, removing from DB.")
+                    await AsyncDB().toggle_emoji_reaction(message.author.id, emoji)
+
+    @staticmethod
+    async def flush_last_used():
+        """Write every Robomoji reaction time recorded since the last flush"""
+        index = RobomojiIndex()
+        last_used = index.take_dirty()
+        if len(last_used) == 0:
+            return
+
+        try:
+            await AsyncDB().set_emoji_reactions_last_used(last_used)
+        except Exception:
+            LOG.exception(f"Failed to write {len(last_used)} Robomoji reaction times")
+            # Retry on the next flush, with whatever time is newest by then
+            index.dirty.update(user_id for user_id, _ in last_used)
 
     @staticmethod
     async def apply_crowd_mute(reaction: Reaction):
@@ -92,3 +117,8 @@ class ReactionController:
                     reason=f"You have {mute_reason}",
                 )
             await reaction.message.reply(f"THIS USER GOT {mute_reason}")
+
+
+@tasks.loop(seconds=LAST_USED_FLUSH_SECONDS)
+async def flush_robomoji_last_used():
+    await ReactionController.flush_last_used()
@@ -0,0 +1,42 @@
+from discord import Member
+from config import YAMLConfig as Config
+from db.point_accrual import ROLE_MULTIPLIERS
+from util.role_policy import RolePolicy, RolePolicyIndex
+
+# HIDDEN_MOD_ROLE should be 1040337265790042172 when committing and refers to the Mod (Role Hidden)
+# STAFF_DEVELOPER_ROLE should be 1226317841272279131 when committing and refers to the Staff Developer role
+HIDDEN_MOD_ROLE = Config.CONFIG["Discord"]["Roles"]["HiddenMod"]
+STAFF_DEVELOPER_ROLE = Config.CONFIG["Discord"]["Roles"]["StaffDev"]
+
+MAX_CHARACTER_LENGTH = 200
+ROLE_AND_USER_OVERRIDE: dict[int, int] = {
+    STAFF_DEVELOPER_ROLE: 300,
+    Config.CONFIG["Discord"]["Roles"]["Mod"]: 400,
+    HIDDEN_MOD_ROLE: 400,
+    1237760496191537176: 400,  # Hooj's Accountant
+    204343692960464896: 9999,  # Ethan
+}
+
+ROLE_POLICIES = RolePolicyIndex(
+    ROLE_AND_USER_OVERRIDE, MAX_CHARACTER_LENGTH, ROLE_MULTIPLIERS
+)
+
+
+class RolePolicyController:
+    """
+    Looks up the chat limits, accrual multiplier and role IDs of members
+    without walking their roles on every message
+    """
+
+    @staticmethod
+    def for_member(member: Member) -> RolePolicy:
+        role_ids = frozenset(role.id for role in member.roles)
+        policy = ROLE_POLICIES.cached(member.id, role_ids)
+        if policy is None:
+            policy = ROLE_POLICIES.resolve(member.id, role_ids)
+        return policy
+
+    @staticmethod
+    def invalidate(member: Member):
+        """Re-resolve a member's policy next time, after their roles changed"""
+        ROLE_POLICIES.invalidate(member.id)
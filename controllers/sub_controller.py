@@ -1,15 +1,13 @@
 from collections import namedtuple
 from operator import attrgetter
-from threading import Thread
 from typing import Optional
 from discord import Colour, Embed, Message, Client
 from discord.ext import tasks
 import discord.utils
 from config import YAMLConfig as Config
+from controllers.overlay_controller import OverlayController
 from controllers.temprole_controller import TempRoleController
-from util.server_utils import get_base_url
 import logging
-import requests
 from datetime import datetime
 import pytz
 
@@ -29,9 +27,6 @@ NA_OPEN_INHOUSE_CHANNEL_ID = Config.CONFIG["Discord"]["Inhouses"]["NAOpenChannel
 EU_OPEN_INHOUSE_CHANNEL_ID = Config.CONFIG["Discord"]["Inhouses"]["EUOpenChannel"]
 GUILD_ID = Config.CONFIG["Discord"]["GuildID"]
 
-AUTH_TOKEN = Config.CONFIG["Secrets"]["Server"]["Token"]
-PUBLISH_URL = f"{get_base_url()}/publish-sub"
-PUBLISH_COUNT_URL = f"{get_base_url()}/publish-sub-count"
 PREMIUM_IDS = list(
     map(
         int,
@@ -175,14 +170,7 @@ class SubController:
             client, message, num_months_subscribed, mention_thankyou
         )
 
-        Thread(
-            target=publish_update,
-            args=(
-                message.author.name,
-                role_name,
-                name_thankyou,
-            ),
-        ).start()
+        await publish_update(message.author.name, role_name, name_thankyou)
         await client.get_channel(BOT_AUDIT_CHANNEL).send(mention_thankyou)
 
     @tasks.loop(minutes=5.0)
@@ -237,36 +225,18 @@ class SubController:
             premium_id_count[role_id] for role_id in PREMIUM_IDS
         ]
 
-        Thread(
-            target=publish_count,
-            args=(
-                tier_1_count,
-                tier_2_count,
-                tier_3_count,
-            ),
-        ).start()
+        await publish_count(tier_1_count, tier_2_count, tier_3_count)
 
 
-def publish_update(name: str, role_name: str, message: str):
+async def publish_update(name: str, role_name: str, message: str):
     payload = {"name": name, "tier": role_name, "message": message}
-    response = requests.post(
-        url=PUBLISH_URL, json=payload, headers={"x-access-token": AUTH_TOKEN}
-    )
-    if response.status_code != 200:
-        LOG.error(f"Failed to publish sub summary: {response.text}")
+    await OverlayController.publish("sub", "/publish-sub", payload)
 
 
-def publish_count(tier_1_count: int, tier_2_count: int, tier_3_count: int):
+async def publish_count(tier_1_count: int, tier_2_count: int, tier_3_count: int):
     payload = {
         "tier1Count": tier_1_count,
         "tier2Count": tier_2_count,
         "tier3Count": tier_3_count,
     }
-    try:
-        response = requests.post(
-            url=PUBLISH_COUNT_URL, json=payload, headers={"x-access-token": AUTH_TOKEN}
-        )
-        if response.status_code != 200:
-            LOG.error(f"Failed to publish sub count: {response.text}")
-    except:
-        LOG.error(f"Failed to publish sub count - an exception occurred")
+    await OverlayController.publish("subCount", "/publish-sub-count", payload)
@@ -1,19 +1,17 @@
-from discord.ext import tasks
 import asyncio
 import logging
 from datetime import datetime, timedelta
 import time
-from discord import Client, Interaction, Role, User, Member, utils
+from discord import Client, Interaction, RateLimited, Role, User, Member, utils
 from pytimeparse.timeparse import timeparse
 from functools import partial
-from db import DB
+from db import AsyncDB
+from db.temprole_cache import ScheduledTempRole, TempRoleCache
 from config import YAMLConfig as Config
 from util.discord_utils import DiscordUtils
 from views.pagination.pagination_embed_view import PaginationEmbed, PaginationView
 
-EXPIRATION_CHECK_CADENCE = Config.CONFIG["Discord"]["TempRoles"][
-    "ExpirationCheckCadenceMinutes"
-]
+REMOVAL_WORKERS = Config.CONFIG["Discord"]["TempRoles"]["RemovalWorkers"]
 APPROVED_ROLE = Config.CONFIG["Discord"]["VODReview"]["ApprovedRole"]
 REJECTED_ROLE = Config.CONFIG["Discord"]["VODReview"]["RejectedRole"]
 # this is hardcoded until raze to radiant is over, or config file changes are allowed
@@ -22,6 +20,15 @@ TOP_ROLE_ACCEPTED = 1077265826886979634
 
 LOG = logging.getLogger(__name__)
 
+LOAD_RETRY_SECONDS = 30
+
+# Stops member updates handled before the cache is loaded from loading it again
+CACHE_LOAD_LOCK = asyncio.Lock()
+
+# The scheduler and removal workers, once started. on_ready runs again after
+# every reconnect, so this stops a second set from being started
+EXPIRY_TASKS: list[asyncio.Task] = []
+
 
 class TempRoleController:
     def __init__(self, client: Client):
@@ -51,14 +58,14 @@ class TempRoleController:
                 "Unable to find provided user - are they in this server?",
             )
 
-        DB().set_temprole(user_id, role.id, guild.id, expiration)
+        await AsyncDB().set_temprole(user_id, role.id, guild.id, expiration)
 
         try:
             await member.add_roles(role)
         except:
-            temprole = DB().retrieve_temprole(user_id, role.id)
+            temprole = await AsyncDB().retrieve_temprole(user_id, role.id)
             if temprole is not None:
-                DB().delete_temprole(temprole.id)
+                await AsyncDB().delete_temprole(temprole.id)
                 return (
                     False,
                     (
@@ -94,20 +101,20 @@ class TempRoleController:
                 "Unable to find provided user - are they in this server?",
             )
 
-        temprole = DB().retrieve_temprole(user_id, role.id)
+        temprole = await AsyncDB().retrieve_temprole(user_id, role.id)
 
         expiration = datetime.now()
         # Set temprole if no existing role to extend
         if temprole is None:
             expiration += extension_duration
-            DB().set_temprole(user_id, role.id, guild.id, expiration)
+            await AsyncDB().set_temprole(user_id, role.id, guild.id, expiration)
             # Add role to user
             try:
                 await member.add_roles(role)
             except:
-                temprole = DB().retrieve_temprole(user_id, role.id)
+                temprole = await AsyncDB().retrieve_temprole(user_id, role.id)
                 if temprole is not None:
-                    DB().delete_temprole(temprole.id)
+                    await AsyncDB().delete_temprole(temprole.id)
                 return (
                     False,
                     (
@@ -117,7 +124,7 @@ class TempRoleController:
                 )
         else:
             expiration = temprole.expiration + extension_duration
-            DB().set_temprole(user_id, role.id, guild.id, expiration)
+            await AsyncDB().set_temprole(user_id, role.id, guild.id, expiration)
 
         unixtime = time.mktime(expiration.timetuple())
         return (
@@ -129,14 +136,14 @@ class TempRoleController:
         )
 
     @staticmethod
-    def user_has_temprole(user: User, role: Role):
-        temprole = DB().retrieve_temprole(user.id, role.id)
-        return temprole is not None
+    async def user_has_temprole(user: User, role: Role):
+        await TempRoleController.load_cache()
+        return TempRoleCache().index.get(user.id, role.id) is not None
 
     @staticmethod
     async def remove_role(user: User, role: Role):
         guild = role.guild
-        temprole = DB().retrieve_temprole(user.id, role.id)
+        temprole = await AsyncDB().retrieve_temprole(user.id, role.id)
         if temprole is None:
             return False, f"No temprole to remove for {user.mention}!"
 
@@ -150,12 +157,12 @@ class TempRoleController:
             await member.remove_roles(role)
         except:
             LOG.warn(f"Failed to remove {role} from {member.name}")
-            DB().delete_temprole(temprole.id)
+            await AsyncDB().delete_temprole(temprole.id)
         return True, f"Removed {role.mention} from {user.mention}."
 
     @staticmethod
     async def view_temproles(user: User, interaction: Interaction):
-        temproles = DB().get_user_temproles(user.id, interaction.guild_id)
+        temproles = await AsyncDB().get_user_temproles(user.id, interaction.guild_id)
         if len(temproles) == 0:
             return await interaction.response.send_message(
                 f"{user.mention} does not currently have any temproles assigned!",
@@ -176,7 +183,7 @@ class TempRoleController:
 
     @staticmethod
     async def view_users(role: Role, interaction: Interaction):
-        if DB().get_temprole_users_count(role.id, interaction.guild_id) == 0:
+        if await AsyncDB().get_temprole_users_count(role.id, interaction.guild_id) == 0:
             return await interaction.response.send_message(
                 f"`@{role.name}` is not currently assigned to any users as a temprole!",
                 ephemeral=True,
@@ -197,7 +204,7 @@ class TempRoleController:
         """
         Gets title, description, and num_pages for each page of view_users
         """
-        temprole_users_count = DB().get_temprole_users_count(
+        temprole_users_count = await AsyncDB().get_temprole_users_count(
             role.id, interaction.guild_id
         )
         num_pages = (temprole_users_count + per_page - 1) // per_page
@@ -212,7 +219,7 @@ class TempRoleController:
 
         description = ""
         offset = current_page * per_page
-        for user in DB().get_temprole_users(
+        for user in await AsyncDB().get_temprole_users(
             role.id, interaction.guild_id, offset, limit=per_page
         ):
             member = interaction.guild.get_member(user.user_id)
@@ -241,61 +248,141 @@ class TempRoleController:
             return False, f"{role} is higher than the top role accepted"
 
     @staticmethod
-    async def check_removed_roles(
-        removed_roles: list[int], user: Member, guild_id: int
-    ):
+    async def load_cache():
+        """Load TempRoleCache unless it already has been"""
+        if TempRoleCache().loaded:
+            return
+        async with CACHE_LOAD_LOCK:
+            if not TempRoleCache().loaded:
+                await AsyncDB().load_temprole_cache()
+
+    @staticmethod
+    async def check_removed_roles(before: Member, after: Member):
         """
-        Takes a list of roles that was removed from the user and
-        checks if the removed role is part of any temproles assigned
+        Checks whether a member update took away any of the member's temproles
 
         Deletes temprole on the DB if the removed role is one of the assigned temproles
         Deletes vod submission if removed role is APPROVED_ROLE or REJECTED_ROLE
+
+        Answered from TempRoleCache, so the DB is only touched when a temprole
+        was actually removed
         """
-        temproles = DB().get_user_temproles(user.id, guild_id)
-
-        removed_temproles = [
-            temp for temp in temproles if temp.role_id in removed_roles
-        ]
-
-        for removed_temprole in removed_temproles:
-            if (
-                removed_temprole.role_id == APPROVED_ROLE
-                or removed_temprole.role_id == REJECTED_ROLE
-            ):
-                DB().reset_user(user.id)
-            DB().delete_temprole(removed_temprole.id)
-
-    @tasks.loop(minutes=EXPIRATION_CHECK_CADENCE)
-    async def expire_roles(self):
-        LOG.info("[TEMPROLE TASK] Running expire roles...")
-        roles_to_expire = DB().get_expired_roles(datetime.now())
-        for expire_role in roles_to_expire:
-            guild = self.client.get_guild(expire_role.guild_id)
-            if guild is None:
-                LOG.warn(f"Unable to find {expire_role.guild_id=}")
-                DB().delete_temprole(expire_role.id)
-                continue
+        await TempRoleController.load_cache()
+        index = TempRoleCache().index
+        if not index.holds_any(after.id):
+            return  # almost every member update
+
+        removed_temproles = index.removed(
+            after.id,
+            {role.id for role in before.roles},
+            {role.id for role in after.roles},
+        )
+        for role_id, id in removed_temproles:
+            if role_id == APPROVED_ROLE or role_id == REJECTED_ROLE:
+                await AsyncDB().reset_user(after.id)
+            await AsyncDB().delete_temprole(id)
+
+    def start_expiring_roles(self):
+        """Start removing temproles as they expire, unless already running"""
+        if len(EXPIRY_TASKS) > 0:
+            return
+
+        removals = asyncio.Queue()
+        EXPIRY_TASKS.append(asyncio.create_task(self.schedule_expirations(removals)))
+        for _ in range(REMOVAL_WORKERS):
+            EXPIRY_TASKS.append(
+                asyncio.create_task(self.remove_expired_roles(removals))
+            )
 
-            role = guild.get_role(expire_role.role_id)
-            if role is None:
-                LOG.warn(f"Unable to find {expire_role.role_id=}")
-                DB().delete_temprole(expire_role.id)
-                continue
+    @staticmethod
+    def stop_expiring_roles():
+        for task in EXPIRY_TASKS:
+            task.cancel()
+        EXPIRY_TASKS.clear()
 
-            member = guild.get_member(expire_role.user_id)
-            if member is None:
-                LOG.warn(f"Unable to find {expire_role.user_id=}")
-                DB().delete_temprole(expire_role.id)
-                continue
+    async def schedule_expirations(self, removals: asyncio.Queue):
+        """
+        Queue each temprole for removal as soon as it expires, sleeping until
+        the next expiration in between. set_temprole and delete_temprole wake
+        this up whenever the schedule changes
+        """
+        cache = TempRoleCache()
+        while not cache.loaded:
+            try:
+                await TempRoleController.load_cache()
+            except Exception:
+                LOG.exception("[TEMPROLE TASK] Failed to load temproles")
+                await asyncio.sleep(LOAD_RETRY_SECONDS)
+
+        while True:
+            # Cleared before reading the schedule so a change made while the
+            # due roles are queued still wakes the next wait
+            cache.changed.clear()
+            now = datetime.now()
+            for id, temprole in cache.schedule.pop_due(now):
+                removals.put_nowait((id, temprole))
+
+            deadline = cache.schedule.next_deadline()
+            timeout = None if deadline is None else (deadline - now).total_seconds()
+            try:
+                await asyncio.wait_for(cache.changed.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
 
-            # If role is removed, temprole will automatically be removed from the database
-            # through member_update event
+    async def remove_expired_roles(self, removals: asyncio.Queue):
+        """
+        Remove queued temproles. discord.py already waits out rate limits
+        before each request; running REMOVAL_WORKERS of these keeps a backlog
+        moving without flooding the API. A rate limit discord.py gives up on
+        is waited out here and the removal retried
+        """
+        while True:
+            id, temprole = await removals.get()
             try:
-                await member.remove_roles(role)
-            except:
-                LOG.warn(f"Failed to remove {role} from {member.name}")
-                DB().delete_temprole(temprole.id)
-                continue
+                await self.expire_role(id, temprole)
+            except RateLimited as e:
+                LOG.warn(f"[TEMPROLE TASK] Rate limited for {e.retry_after:.1f}s")
+                await asyncio.sleep(e.retry_after)
+                removals.put_nowait((id, temprole))
+            except Exception:
+                LOG.exception(f"[TEMPROLE TASK] Failed to expire temprole {id=}")
+
+    async def expire_role(self, id: int, temprole: ScheduledTempRole):
+        # Extended while it waited in the queue - the scheduler queues it
+        # again once the new expiration is reached
+        if id in TempRoleCache().schedule:
+            LOG.info(f"[TEMPROLE TASK] Skipping rescheduled temprole {id=}")
+            return
+
+        guild = self.client.get_guild(temprole.guild_id)
+        if guild is None:
+            LOG.warn(f"Unable to find {temprole.guild_id=}")
+            await AsyncDB().delete_temprole(id)
+            return
+
+        role = guild.get_role(temprole.role_id)
+        if role is None:
+            LOG.warn(f"Unable to find {temprole.role_id=}")
+            await AsyncDB().delete_temprole(id)
+            return
+
+        member = guild.get_member(temprole.user_id)
+        if member is None:
+            LOG.warn(f"Unable to find {temprole.user_id=}")
+            await AsyncDB().delete_temprole(id)
+            return
 
-            # Rate limit
-            await asyncio.sleep(1)
+        # Removing a role the member no longer has won't fire member_update
+        if member.get_role(role.id) is None:
+            await AsyncDB().delete_temprole(id)
+            return
+
+        # If role is removed, temprole will automatically be removed from the database
+        # through member_update event
+        try:
+            await member.remove_roles(role)
+        except RateLimited:
+            raise
+        except:
+            LOG.warn(f"Failed to remove {role} from {member.name}")
+            await AsyncDB().delete_temprole(id)
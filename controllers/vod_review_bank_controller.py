@@ -3,7 +3,7 @@ from typing import Optional
 from discord import Color, Colour, Embed, Interaction, User
 from config import YAMLConfig as Config
 from controllers.temprole_controller import TempRoleController
-from db import DB
+from db import AsyncDB
 from pytimeparse.timeparse import timeparse
 import logging
 
@@ -24,7 +24,7 @@ COLOR_SUCCESS = Colour.green()
 class VODReviewBankController:
     @staticmethod
     async def get_balance(user: User, interaction: Interaction):
-        balance = DB().get_vod_review_balance(user.id)
+        balance = await AsyncDB().get_vod_review_balance(user.id)
         if balance is None:
             balance = 0
 
@@ -36,7 +36,7 @@ class VODReviewBankController:
     async def redeem_gifted_t3(
         user: User, duration: Optional[str], interaction: Interaction
     ):
-        balance = DB().get_vod_review_balance(interaction.user.id)
+        balance = await AsyncDB().get_vod_review_balance(interaction.user.id)
         if balance is None or balance < 1:
             return await interaction.response.send_message(
                 "Insufficient balance to redeem Gifted T3", ephemeral=True
@@ -97,7 +97,7 @@ class VODReviewBankController:
         await DiscordUtils.reply(interaction, embed=embed)
 
         duration_hours = duration_timedelta.total_seconds() / SECONDS_IN_HOUR
-        DB().add_vod_review_balance(interaction.user.id, -duration_hours)
+        await AsyncDB().add_vod_review_balance(interaction.user.id, -duration_hours)
 
     @staticmethod
     async def increment_balance(user: User, interaction: Interaction):
@@ -116,7 +116,7 @@ class VODReviewBankController:
         amount = (
             timedelta(seconds=timeparse(duration)).total_seconds() / SECONDS_IN_HOUR
         )
-        new_balance = DB().add_vod_review_balance(user.id, amount)
+        new_balance = await AsyncDB().add_vod_review_balance(user.id, amount)
         reply_content = (
             f"Added {amount}h to {user.mention} VOD review balance. New balance:"
             f" {new_balance}h"
@@ -1,12 +1,16 @@
+from contextlib import asynccontextmanager, contextmanager, nullcontext
 from datetime import datetime
 from discord import Role
+from inspect import isfunction, unwrap
 from sqlalchemy import create_engine, select, update, insert, func, DateTime
-from sqlalchemy.orm import sessionmaker
-from typing import Optional
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import Session, sessionmaker
+from typing import AsyncIterator, Iterator, Optional
 from db.points_history import (
     delete_transactions,
     get_transaction_history,
     record_transaction,
+    trim_transaction_history,
 )
 
 from db.temproles import (
@@ -15,6 +19,7 @@ from db.temproles import (
     get_user_temproles,
     get_temprole_users,
     get_temprole_users_count,
+    load_temprole_cache,
     retrieve_temprole,
     set_temprole,
 )
@@ -34,7 +39,11 @@ from .vod_submissions import (
 from .point_accrual import (
     accrue_channel_points,
     deposit_points,
+    deposit_points_bulk,
+    flush_channel_point_accruals,
+    get_last_accrual_time,
     get_point_balance,
+    transfer_points,
     withdraw_points,
 )
 from .good_morning import (
@@ -45,6 +54,20 @@ from .good_morning import (
     manual_increment_morning_points,
     reset_all_morning_points,
 )
+from .prediction_state_cache import PotTotals
+from .raffles import (
+    backfill_loss_streaks,
+    create_raffle_entries,
+    get_loss_streak,
+    get_loss_streaks,
+    get_recent_wins,
+    get_role_modifiers,
+    record_raffle_losses,
+    recalculate_loss_streak,
+    reset_loss_streaks,
+    set_role_modifier,
+    undo_raffle_losses,
+)
 from .predictions import (
     accepting_prediction_entries,
     close_prediction,
@@ -58,8 +81,10 @@ from .predictions import (
     get_prediction_message_id,
     get_prediction_channel_id,
     get_prediction_summary,
+    get_pot_totals,
     get_user_prediction_entry,
     has_ongoing_prediction,
+    reconcile_pot_totals,
     rename_prediction,
     set_prediction_outcome,
 )
@@ -77,7 +102,9 @@ from .emoji_reactions import (
     get_emoji_reaction_delay,
     set_emoji_reaction_delay,
     get_emoji_reaction_last_used,
+    load_robomoji_index,
     set_emoji_reaction_last_used,
+    set_emoji_reactions_last_used,
 )
 from .models import (
     Base,
@@ -92,9 +119,35 @@ from .models import (
     TempRoles,
     VodSubmission,
 )
+from .instrumentation import (
+    InstrumentedAsyncPool,
+    InstrumentedQueuePool,
+    instrument_engine,
+    instrumented,
+    is_untimed,
+    timed_async_method,
+    untimed,
+)
 from config import YAMLConfig as Config
 
 
+def get_database_url(driver: str) -> str:
+    """Build the MySQL connection URL for the given DBAPI driver
+
+    Args:
+        driver (str): SQLAlchemy driver name, e.g. pymysql or aiomysql
+
+    Returns:
+        str: Connection URL for the configured database
+    """
+    username = Config.CONFIG["Database"]["Username"]
+    password = Config.CONFIG["Secrets"]["Database"]["Password"]
+    db_host = Config.CONFIG["Database"]["Host"]
+    db_name = Config.CONFIG["Database"]["Name"]
+    return f"mysql+{driver}://{username}:{password}@{db_host}/{db_name}"
+
+
+@instrumented
 class DB:
     __instance = None
 
@@ -110,31 +163,66 @@ class DB:
 
         self.__initialized = True
 
-        username = Config.CONFIG["Database"]["Username"]
-        password = Config.CONFIG["Secrets"]["Database"]["Password"]
-        db_host = Config.CONFIG["Database"]["Host"]
-        db_name = Config.CONFIG["Database"]["Name"]
-
         self.engine = create_engine(
-            f"mysql+pymysql://{username}:{password}@{db_host}/{db_name}",
+            get_database_url("pymysql"), poolclass=InstrumentedQueuePool
         )
+        instrument_engine(self.engine, "sync")
         self.session = sessionmaker(self.engine, autoflush=True, autocommit=True)
 
         Base.metadata.create_all(self.engine)
+        # create_all skips tables that already exist, so add any new indexes
+        for table in Base.metadata.sorted_tables:
+            for index in table.indexes:
+                index.create(self.engine, checkfirst=True)
+
+    @classmethod
+    def bound_to(cls, sess: Session) -> "DB":
+        """Build a DB whose methods all run on an already open session
+
+        Every helper enters `with self.session() as sess:`, so handing them a
+        factory that yields the same Session lets several calls share one
+        connection and transaction.
+
+        Args:
+            sess (Session): Open session to run queries on
+
+        Returns:
+            DB: Non-singleton DB bound to the given session
+        """
+        bound = object.__new__(cls)
+        bound.session = lambda: nullcontext(sess)
+        return bound
+
+    @untimed
+    @contextmanager
+    def unit(self) -> Iterator["DB"]:
+        """Run several DB calls on one connection and transaction
+
+        `with DB().unit() as uow:` checks a single connection out of the pool
+        for the whole block. Everything done through uow is committed when
+        the block exits, or rolled back if it raises.
+
+        Yields:
+            DB: DB bound to the unit's session
+        """
+        with self.session() as sess, sess.begin():
+            yield DB.bound_to(sess)
 
     def create_raffle(
         self, guild_id: int, message_id: int, raffle_type: RaffleType
-    ) -> None:
+    ) -> int:
         if self.has_ongoing_raffle(guild_id):
             raise Exception("There is already an ongoing raffle!")
 
         with self.session() as sess:
-            sess.execute(
+            result = sess.execute(
                 insert(Raffle).values(
                     guild_id=guild_id, message_id=message_id, raffle_type=raffle_type
                 )
             )
 
+        return result.inserted_primary_key[0]
+
     def create_raffle_entry(self, guild_id: int, user_id: int, tickets: int) -> None:
         raffle_id = self.get_raffle_id(guild_id)
         with self.session() as sess:
@@ -144,6 +232,15 @@ class DB:
                 )
             )
 
+    def create_raffle_entries(self, raffle_id: int, entries: list[tuple[int, int]]):
+        """Insert a batch of raffle entries in one statement
+
+        Args:
+            raffle_id (int): Raffle being entered
+            entries (list[tuple[int, int]]): (user_id, tickets) for every entrant
+        """
+        create_raffle_entries(raffle_id, entries, self.session)
+
     def get_user_raffle_entry(self, guild_id: int, user_id: int) -> RaffleEntry:
         raffle_id = self.get_raffle_id(guild_id)
         with self.session() as sess:
@@ -184,6 +281,14 @@ class DB:
 
         return result
 
+    def get_recent_wins(self, guild_id: int, after: datetime) -> dict[int, datetime]:
+        """Get everyone who has won a normal raffle in a guild since :after
+
+        Returns:
+            dict[int, datetime]: user_id -> time of the user's latest winning entry
+        """
+        return get_recent_wins(guild_id, after, self.session)
+
     def get_raffle_entries(self, guild_id: int) -> list[RaffleEntry]:
         if not self.has_ongoing_raffle(guild_id):
             return []
@@ -206,31 +311,23 @@ class DB:
         """
         Fetch the current number of consecutive losses since the last win
         """
+        return get_loss_streak(user_id, self.session)
 
-        with self.session() as sess:
-            # get the most recent raffle entry with MAX(id)
-            subquery = (
-                select(func.ifnull(func.max(RaffleEntry.id), 0).label("last_win_id"))
-                .join(Raffle)
-                .where(RaffleEntry.winner == True)
-                .where(RaffleEntry.user_id == user_id)
-                .where(Raffle.raffle_type == RaffleType.normal)
-                .subquery()
-            )
+    def get_loss_streaks(self) -> dict[int, int]:
+        """Get every user's current loss streak
 
-            # count all losses for the same user after the last winning entry
-            stmt = (
-                select(func.count("*"))
-                .select_from(RaffleEntry)
-                .join(Raffle)
-                .where(RaffleEntry.id > subquery.c.last_win_id)
-                .where(RaffleEntry.winner == False)
-                .where(RaffleEntry.user_id == user_id)
-                .where(Raffle.raffle_type == RaffleType.normal)
-            )
-            result = sess.execute(stmt).one()
+        Returns:
+            dict[int, int]: user_id -> loss streak, for users with a streak
+        """
+        return get_loss_streaks(self.session)
 
-        return result[0]
+    def backfill_loss_streaks(self) -> int:
+        """Rebuild every user's loss streak from their raffle history
+
+        Returns:
+            int: Number of users with a loss streak
+        """
+        return backfill_loss_streaks(self.session)
 
     def get_raffle_entry_count(self, guild_id: int) -> int:
         # special case for immediately after raffle is created
@@ -299,6 +396,7 @@ class DB:
         if not self.has_ongoing_raffle(guild_id):
             raise Exception("There is no ongoing raffle! You need to start a new one.")
 
+        raffle_id = self.get_raffle_id(guild_id)
         with self.session() as sess:
             sess.execute(
                 update(Raffle)
@@ -307,6 +405,7 @@ class DB:
                 .values(ended=True, end_time=end_time)
                 .execution_options(synchronize_session="fetch")
             )
+        record_raffle_losses(raffle_id, self.session)
 
     def record_win(self, guild_id: int, user_ids: list[int]) -> None:
         raffle_id = self.get_raffle_id(guild_id)
@@ -319,9 +418,18 @@ class DB:
                 .values(winner=True)
                 .execution_options(synchronize_session=False)
             )
+        reset_loss_streaks(raffle_id, user_ids, self.session)
 
     def clear_win(self, raffle_message_id: int) -> None:
         with self.session() as sess:
+            raffle_id = sess.execute(
+                select(Raffle.id)
+                .where(Raffle.message_id == raffle_message_id)
+                .where(Raffle.ended == True)
+            ).scalar()
+            if raffle_id is None:
+                return
+
             # TODO: do we want to enable this?
             # clear winner status from previous entries, so anyone can win again
             # sess.execute(
@@ -339,6 +447,7 @@ class DB:
                 .where(Raffle.ended == True)
                 .execution_options(synchronize_session="fetch")
             )
+        undo_raffle_losses(raffle_id, self.session)
 
     def remove_raffle_winner(
         self, guild_id: int, user_id: int, after: datetime
@@ -374,14 +483,32 @@ class DB:
                 .execution_options(synchronize_session="fetch")
             )
 
-            return True
+        recalculate_loss_streak(user_id, self.session)
+        return True
 
     def get_role_modifiers(self, guild_id: int) -> dict[int, int]:
-        with self.session() as sess:
-            stmt = select(RoleModifier).where(RoleModifier.guild_id == guild_id)
-            result = sess.execute(stmt).all()
+        """Get the raffle ticket modifier for every role in a guild
 
-        return {r[0].role_id: r[0].modifier for r in result}
+        Served from memory after the first call for each guild.
+
+        Args:
+            guild_id (int): Guild to look up
+
+        Returns:
+            dict[int, int]: role_id -> modifier. Shared with the cache, so
+                don't modify it
+        """
+        return get_role_modifiers(guild_id, self.session)
+
+    def set_role_modifier(self, guild_id: int, role_id: int, modifier: int):
+        """Set the number of extra raffle tickets a role grants
+
+        Args:
+            guild_id (int): Guild the role belongs to
+            role_id (int): Role to set the modifier for
+            modifier (int): Tickets added to entries by members with the role
+        """
+        set_role_modifier(guild_id, role_id, modifier, self.session)
 
     def accrue_channel_points(self, user_id: int, roles: list[Role]) -> bool:
         """Accrues channel points for a given user
@@ -395,6 +522,27 @@ class DB:
         """
         return accrue_channel_points(user_id, roles, self.session)
 
+    def get_last_accrual_time(self, user_id: int) -> Optional[datetime]:
+        """Get the timestamp of a user's most recent channel point accrual
+
+        Args:
+            user_id (int): Discord user ID to look up
+
+        Returns:
+            Optional[datetime]: Timestamp of the last accrual, or None if the
+                user has never accrued points
+        """
+        return get_last_accrual_time(user_id, self.session)
+
+    def flush_channel_point_accruals(self, accruals: list[tuple[int, int, datetime]]):
+        """Apply a batch of buffered accruals with a single multi-row upsert
+
+        Args:
+            accruals (list[tuple[int, int, datetime]]): (user_id, points, timestamp)
+                for every user with pending points
+        """
+        flush_channel_point_accruals(accruals, self.session)
+
     def accrue_morning_points(self, user_id: int) -> bool:
         """Accrues morning greeting points for a given user
 
@@ -458,32 +606,65 @@ class DB:
         """
         return get_point_balance(user_id, self.session)
 
-    def withdraw_points(self, user_id: int, point_amount: int) -> tuple[bool, int]:
+    def withdraw_points(
+        self, user_id: int, point_amount: int, allow_overdraft: bool = False
+    ) -> tuple[bool, int]:
         """Withdraw points from user's current balance
 
         Args:
-            user_id (int): Discord user ID to give points to
+            user_id (int): Discord user ID to withdraw points from
             point_amount (int): Number of points to withdraw
-            session (sessionmaker): Open DB session
+            allow_overdraft (bool): Withdraw even if the balance would go negative
 
         Returns:
-            tuple[bool, int]: True if points were successfully withdrawn. If so, return new balance
+            tuple[bool, int]: True if points were successfully withdrawn, and the
+                user's balance afterwards (unchanged if the withdrawal failed)
         """
-        return withdraw_points(user_id, point_amount, self.session)
+        return withdraw_points(user_id, point_amount, self.session, allow_overdraft)
 
     def deposit_points(self, user_id: int, point_amount: int) -> tuple[bool, int]:
         """Deposit points into user's current balance
 
         Args:
             user_id (int): Discord user ID to give points to
-            point_amount (int): Number of points to withdraw
-            session (sessionmaker): Open DB session
+            point_amount (int): Number of points to deposit
 
         Returns:
             tuple[bool, int]: True if points were successfully deposited. If so, return new balance
         """
         return deposit_points(user_id, point_amount, self.session)
 
+    def deposit_points_bulk(
+        self, deposits: list[tuple[int, int]], reason: str
+    ) -> list[Transaction]:
+        """Deposit points into many balances and record the matching points
+        history in one transaction
+
+        Args:
+            deposits (list[tuple[int, int]]): (user_id, point_amount) pairs
+            reason (str): Reason recorded in every user's points history
+
+        Returns:
+            list[Transaction]: One transaction per user that received points
+        """
+        return deposit_points_bulk(deposits, reason, self.session)
+
+    def transfer_points(
+        self, from_user_id: int, to_user_id: int, point_amount: int
+    ) -> tuple[bool, int, int]:
+        """Move points from one user's balance to another's in a single transaction
+
+        Args:
+            from_user_id (int): Discord user ID to take points from
+            to_user_id (int): Discord user ID to give points to
+            point_amount (int): Number of points to move
+
+        Returns:
+            tuple[bool, int, int]: True if the sender could afford the transfer,
+                followed by the sender's and recipient's balances afterwards
+        """
+        return transfer_points(from_user_id, to_user_id, point_amount, self.session)
+
     def add_channel_reward(self, name: str, point_cost: int):
         """Add new reward that can be redeemed for ChannelPoints
 
@@ -600,7 +781,8 @@ class DB:
         return get_ongoing_prediction_id(guild_id, self.session)
 
     def get_prediction_point_counts(self, prediction_id: int) -> tuple[int, int]:
-        """Get the total points predicted on each option
+        """Get the total points predicted on each option, summed from the
+        entries themselves so payouts never rely on the running totals
 
         Args:
             prediction_id (int): ID of Prediction to get point totals for
@@ -610,6 +792,29 @@ class DB:
         """
         return get_prediction_point_counts(prediction_id, self.session)
 
+    def get_pot_totals(self, prediction_id: int) -> PotTotals:
+        """Get running point totals and entry counts for a prediction
+
+        Args:
+            prediction_id (int): ID of Prediction to get totals for
+
+        Returns:
+            PotTotals: Points and entries on each option
+        """
+        return get_pot_totals(prediction_id, self.session)
+
+    def reconcile_pot_totals(self, prediction_id: int) -> bool:
+        """Check the running pot totals for a prediction against its entries,
+        correcting them if they have drifted
+
+        Args:
+            prediction_id (int): ID of Prediction to check
+
+        Returns:
+            bool: True if the running totals were correct
+        """
+        return reconcile_pot_totals(prediction_id, self.session)
+
     def create_prediction_entry(
         self, guild_id: int, user_id: int, channel_points: int, guess: int
     ) -> bool:
@@ -809,6 +1014,21 @@ class DB:
         """
         return set_emoji_reaction_last_used(user_id, last_used, self.session)
 
+    def set_emoji_reactions_last_used(self, last_used: list[tuple[int, datetime]]):
+        """
+        Write a batch of Robomoji reaction times
+
+        Args:
+            last_used (list[tuple[int, datetime]]): (user_id, last_used) for
+                every user that has reacted since the last batch
+        """
+        set_emoji_reactions_last_used(last_used, self.session)
+
+    def load_robomoji_index(self):
+        """Load every user's Robomojis, the delay and reaction times into
+        RobomojiIndex"""
+        load_robomoji_index(self.session)
+
     def set_temprole(
         self, user_id: int, role_id: int, guild_id: int, expiration: datetime
     ):
@@ -834,6 +1054,10 @@ class DB:
         """
         return retrieve_temprole(user_id, role_id, self.session)
 
+    def load_temprole_cache(self):
+        """Load every temprole into TempRoleCache"""
+        load_temprole_cache(self.session)
+
     def get_expired_roles(self, compare_time: datetime) -> list[TempRoles]:
         """Get temproles which will expire by given time
 
@@ -919,24 +1143,37 @@ class DB:
         return reset_vod_review_balance(user_id, self.session)
 
     def record_transaction(self, transaction: Transaction):
-        """Record transaction into points history respecting maximum
-        maximum transaction limit
+        """Record transaction into points history. Old transactions are removed
+        separately by trim_transaction_history
 
         Args:
             transaction (Transaction): Transaction data to record
         """
         return record_transaction(transaction, self.session)
 
-    def get_transaction_history(self, user_id: int):
+    def get_transaction_history(self, user_id: int, limit: Optional[int] = None):
         """Get transaction history for user
 
         Args:
             user_id (int): Discord User ID of user
+            limit (Optional[int]): Maximum number of transactions to return
+
+        Returns:
+            list[PointsHistory]: Up to limit most recent point transactions
+        """
+        return get_transaction_history(user_id, self.session, limit)
+
+    def trim_transaction_history(self, max_transactions: int) -> int:
+        """Delete every transaction older than each user's max_transactions
+        most recent ones
+
+        Args:
+            max_transactions (int): Number of transactions to keep per user
 
         Returns:
-            list[PointsHistory]: Up to MAXIMUM_TRANSACTIONS most recent point transactions
+            int: Number of transactions deleted
         """
-        return get_transaction_history(user_id, self.session)
+        return trim_transaction_history(max_transactions, self.session)
 
     def delete_transactions(self, transactions: list[PointsHistory]):
         """Delete transactions from PointsHistory
@@ -946,3 +1183,106 @@ class DB:
             session (sessionmaker): Open DB session
         """
         return delete_transactions(transactions, self.session)
+
+
+def _query_method(name: str):
+    """Look up the DB method an AsyncDB attribute proxies, if there is one"""
+    method = getattr(DB, name, None)
+    if name.startswith("_") or not isfunction(method) or is_untimed(method):
+        return None
+    # Time the whole awaitable call rather than the sync DB method
+    return unwrap(method)
+
+
+def _call_bound(sess: Session, method, args, kwargs):
+    return method(DB.bound_to(sess), *args, **kwargs)
+
+
+class AsyncUnitOfWork:
+    """Awaitable DB methods sharing one AsyncSession and transaction
+
+    Created by AsyncDB.unit(). Calls run one after another on the same
+    connection, so reads see earlier writes in the unit and nothing is
+    committed until the unit exits.
+    """
+
+    def __init__(self, sess: AsyncSession):
+        self.sess = sess
+
+    def __getattr__(self, name: str):
+        method = _query_method(name)
+        if method is None:
+            raise AttributeError(f"{type(self).__name__!r} has no attribute {name!r}")
+
+        async def call(*args, **kwargs):
+            return await self.sess.run_sync(_call_bound, method, args, kwargs)
+
+        call.__name__ = name
+        call.__doc__ = method.__doc__
+        return timed_async_method(call, "unit")
+
+
+class AsyncDB:
+    """Awaitable counterpart to DB
+
+    Every public DB method is available here as a coroutine with the same
+    arguments, e.g. `await AsyncDB().get_point_balance(user_id)`. Each call runs
+    in a single transaction on an aiomysql connection through SQLAlchemy's
+    asyncio extension, so waiting on MySQL suspends only the calling task
+    instead of blocking the whole event loop.
+
+    Use `async with AsyncDB().unit() as uow:` to run several calls on one
+    connection and transaction instead.
+    """
+
+    __instance = None
+
+    def __new__(cls):
+        if cls.__instance is None:
+            cls.__instance = super(AsyncDB, cls).__new__(cls)
+            cls.__instance.__initialized = False
+        return cls.__instance
+
+    def __init__(self):
+        if self.__initialized:
+            return
+
+        self.__initialized = True
+
+        # Tables are created by DB() during startup
+        self.engine = create_async_engine(
+            get_database_url("aiomysql"), poolclass=InstrumentedAsyncPool
+        )
+        instrument_engine(self.engine.sync_engine, "async")
+        self.session = sessionmaker(
+            self.engine, class_=AsyncSession, expire_on_commit=False
+        )
+
+    @asynccontextmanager
+    async def unit(self) -> AsyncIterator[AsyncUnitOfWork]:
+        """Run several DB calls on one connection and transaction
+
+        The connection is checked out on the first query and returned when
+        the block exits. Keep Discord API calls outside the block so the
+        connection isn't held while waiting on them.
+
+        Yields:
+            AsyncUnitOfWork: Awaitable DB methods bound to the unit's session
+        """
+        async with self.session() as sess:
+            async with sess.begin():
+                yield AsyncUnitOfWork(sess)
+
+    def __getattr__(self, name: str):
+        method = _query_method(name)
+        if method is None:
+            raise AttributeError(f"{type(self).__name__!r} has no attribute {name!r}")
+
+        async def call(*args, **kwargs):
+            async with self.session() as sess:
+                async with sess.begin():
+                    return await sess.run_sync(_call_bound, method, args, kwargs)
+
+        call.__name__ = name
+        call.__doc__ = method.__doc__
+        return timed_async_method(call, "async")
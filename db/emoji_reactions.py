@@ -1,10 +1,11 @@
 from sqlalchemy.orm import sessionmaker
-from sqlalchemy import select, delete, insert, update
+from sqlalchemy import bindparam, select, delete, insert, update
 import logging
 from datetime import datetime
 from typing import Optional
 
 from db.models import EmojiReactions, EmojiReactionDelay, EmojiReactionTimes
+from db.robomoji_index import RobomojiIndex
 
 LOG = logging.getLogger(__name__)
 
@@ -29,9 +30,11 @@ def toggle_emoji_reaction(user_id: int, emoji: str, session: sessionmaker) -> bo
         if result is None:
             # Toggle emoji reaction ON
             sess.execute(insert(EmojiReactions).values(user_id=user_id, emoji=emoji))
+            RobomojiIndex().toggle(user_id, emoji, True)
             return True
         # Toggle emoji reaction OFF
         sess.execute(delete(EmojiReactions).where(EmojiReactions.id == result[0].id))
+        RobomojiIndex().toggle(user_id, emoji, False)
         return False
 
 
@@ -81,10 +84,11 @@ def set_emoji_reaction_delay(delay_time: int, session: sessionmaker) -> int:
 
         if result is None:
             sess.execute(insert(EmojiReactionDelay).values(delay_in_seconds=delay_time))
-            return delay_time
+        else:
+            sess.execute(update(EmojiReactionDelay).values(delay_in_seconds=delay_time))
 
-        sess.execute(update(EmojiReactionDelay).values(delay_in_seconds=delay_time))
-        return delay_time
+    RobomojiIndex().delay = delay_time
+    return delay_time
 
 
 def get_emoji_reaction_last_used(
@@ -132,11 +136,84 @@ def set_emoji_reaction_last_used(
                     user_id=user_id, last_reacted=last_used
                 )
             )
-            return
+        else:
+            existing_row: EmojiReactionTimes = result[0]
+            sess.execute(
+                update(EmojiReactionTimes)
+                .where(EmojiReactionTimes.id == existing_row.id)
+                .values(user_id=user_id, last_reacted=last_used)
+            )
+
+    RobomojiIndex().mark_used(user_id, last_used, written=True)
+
+
+def set_emoji_reactions_last_used(
+    last_used: list[tuple[int, datetime]], session: sessionmaker
+):
+    """
+    Write a batch of Robomoji reaction times
 
-        existing_row: EmojiReactionTimes = result[0]
-        sess.execute(
-            update(EmojiReactionTimes)
-            .where(EmojiReactionTimes.id == existing_row.id)
-            .values(user_id=user_id, last_reacted=last_used)
+    Args:
+        last_used (list[tuple[int, datetime]]): (user_id, last_used) for every
+            user that has reacted since the last batch
+    """
+    if len(last_used) == 0:
+        return
+
+    with session() as sess:
+        existing = dict(
+            sess.execute(
+                select(EmojiReactionTimes.user_id, EmojiReactionTimes.id).where(
+                    EmojiReactionTimes.user_id.in_(
+                        [user_id for user_id, _ in last_used]
+                    )
+                )
+            ).all()
         )
+
+        updates = [
+            {"row_id": existing[user_id], "reacted": reacted}
+            for user_id, reacted in last_used
+            if user_id in existing
+        ]
+        inserts = [
+            {"user_id": user_id, "last_reacted": reacted}
+            for user_id, reacted in last_used
+            if user_id not in existing
+        ]
+        if len(updates) > 0:
+            sess.execute(
+                update(EmojiReactionTimes)
+                .where(EmojiReactionTimes.id == bindparam("row_id"))
+                .values(last_reacted=bindparam("reacted"))
+                .execution_options(synchronize_session=False),
+                updates,
+            )
+        if len(inserts) > 0:
+            sess.execute(insert(EmojiReactionTimes), inserts)
+
+
+def load_robomoji_index(session: sessionmaker):
+    """Load every user's Robomojis, the delay and reaction times into memory
+
+    Args:
+        session (sessionmaker): Open DB session
+    """
+    with session() as sess:
+        reactions = sess.execute(
+            select(EmojiReactions.user_id, EmojiReactions.emoji)
+        ).all()
+        delay = sess.execute(select(EmojiReactionDelay.delay_in_seconds)).scalar()
+        times = sess.execute(
+            select(EmojiReactionTimes.user_id, EmojiReactionTimes.last_reacted)
+        ).all()
+
+    emojis: dict[int, list[str]] = {}
+    for user_id, emoji in reactions:
+        emojis.setdefault(user_id, []).append(emoji)
+
+    last_used: dict[int, datetime] = {}
+    for user_id, last_reacted in times:
+        last_used[user_id] = max(last_reacted, last_used.get(user_id, last_reacted))
+
+    RobomojiIndex().load(emojis, delay, last_used)
@@ -0,0 +1,191 @@
+from functools import wraps
+from inspect import isfunction
+import re
+import time
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+from util.metrics import Counter, Gauge, Histogram
+
+DB_METHOD_CALLS = Counter(
+    "robobanana_db_method_calls_total",
+    "Calls to DB methods",
+    ["method", "facade"],
+)
+DB_METHOD_ERRORS = Counter(
+    "robobanana_db_method_errors_total",
+    "DB method calls that raised",
+    ["method", "facade"],
+)
+DB_METHOD_SECONDS = Histogram(
+    "robobanana_db_method_seconds",
+    "Time spent in DB methods, including connection checkout",
+    ["method", "facade"],
+)
+DB_QUERY_SECONDS = Histogram(
+    "robobanana_db_query_seconds",
+    "Time spent executing each SQL statement",
+    ["statement"],
+)
+DB_QUERY_ROWS = Counter(
+    "robobanana_db_query_rows_total",
+    "Rows returned or affected by each SQL statement",
+    ["statement"],
+)
+DB_POOL_CHECKOUT_SECONDS = Histogram(
+    "robobanana_db_pool_checkout_seconds",
+    "Time spent waiting to check a connection out of the pool",
+    ["pool"],
+)
+DB_POOL_CHECKED_OUT = Gauge(
+    "robobanana_db_pool_checked_out",
+    "Connections currently checked out of the pool",
+    ["pool"],
+)
+
+WHITESPACE_PATTERN = re.compile(r"\s+")
+# IN (%s, %s, ...) lists and multi-row VALUES grow with their input, so fold
+# them down to keep one label per statement shape
+PARAM_LIST_PATTERN = re.compile(r"\(%s(?:, %s)+\)")
+VALUES_PATTERN = re.compile(r"(\([^()]*\))(?:, \([^()]*\))+")
+
+
+def normalize_statement(statement: str) -> str:
+    """Reduce a SQL statement to a stable label value
+
+    Args:
+        statement (str): SQL sent to the DBAPI cursor
+
+    Returns:
+        str: The statement with whitespace collapsed and variable length
+            parameter lists folded
+    """
+    statement = WHITESPACE_PATTERN.sub(" ", statement).strip()
+    statement = PARAM_LIST_PATTERN.sub("(%s, ...)", statement)
+    return VALUES_PATTERN.sub(r"\1, ...", statement)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info["query_start"].pop()
+    label = normalize_statement(statement)
+    DB_QUERY_SECONDS.observe(elapsed, statement=label)
+    if cursor.rowcount is not None and cursor.rowcount > 0:
+        DB_QUERY_ROWS.inc(cursor.rowcount, statement=label)
+
+
+def _handle_error(context):
+    starts = context.connection.info.get("query_start") if context.connection else None
+    if starts:
+        starts.pop()
+
+
+def instrument_engine(engine: Engine, pool_name: str):
+    """Record per-statement metrics and pool usage for an engine
+
+    Args:
+        engine (Engine): Engine to instrument. Use AsyncEngine.sync_engine for
+            asyncio engines
+        pool_name (str): Label to report the engine's pool under
+    """
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine, "handle_error", _handle_error)
+    DB_POOL_CHECKED_OUT.set_function(engine.pool.checkedout, pool=pool_name)
+
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool that records how long each checkout waits for a connection"""
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            DB_POOL_CHECKOUT_SECONDS.observe(time.perf_counter() - start, pool="sync")
+
+
+class InstrumentedAsyncPool(AsyncAdaptedQueuePool):
+    """AsyncAdaptedQueuePool that records how long each checkout waits"""
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            DB_POOL_CHECKOUT_SECONDS.observe(time.perf_counter() - start, pool="async")
+
+
+def timed_method(method, facade: str):
+    """Wrap a DB method so every call is counted and timed
+
+    Args:
+        method (Callable): Function to wrap
+        facade (str): Label distinguishing DB from AsyncDB calls
+
+    Returns:
+        Callable: Wrapped function. The original is available as __wrapped__
+    """
+    name = method.__name__
+
+    @wraps(method)
+    def wrapper(*args, **kwargs):
+        DB_METHOD_CALLS.inc(method=name, facade=facade)
+        start = time.perf_counter()
+        try:
+            return method(*args, **kwargs)
+        except Exception:
+            DB_METHOD_ERRORS.inc(method=name, facade=facade)
+            raise
+        finally:
+            DB_METHOD_SECONDS.observe(
+                time.perf_counter() - start, method=name, facade=facade
+            )
+
+    return wrapper
+
+
+def timed_async_method(method, facade: str):
+    """Coroutine counterpart to timed_method"""
+    name = method.__name__
+
+    @wraps(method)
+    async def wrapper(*args, **kwargs):
+        DB_METHOD_CALLS.inc(method=name, facade=facade)
+        start = time.perf_counter()
+        try:
+            return await method(*args, **kwargs)
+        except Exception:
+            DB_METHOD_ERRORS.inc(method=name, facade=facade)
+            raise
+        finally:
+            DB_METHOD_SECONDS.observe(
+                time.perf_counter() - start, method=name, facade=facade
+            )
+
+    return wrapper
+
+
+def untimed(method):
+    """Leave a method out of @instrumented and the AsyncDB proxies"""
+    method.__untimed__ = True
+    return method
+
+
+def is_untimed(method) -> bool:
+    return getattr(method, "__untimed__", False)
+
+
+def instrumented(cls):
+    """Class decorator timing every public method defined on cls"""
+    for name, attribute in list(vars(cls).items()):
+        if (
+            not name.startswith("_")
+            and isfunction(attribute)
+            and not is_untimed(attribute)
+        ):
+            setattr(cls, name, timed_method(attribute, "sync"))
+    return cls
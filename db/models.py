@@ -8,6 +8,7 @@ from sqlalchemy import (
     DateTime,
     Enum,
     ForeignKey,
+    Index,
     Integer,
     VARCHAR,
     func,
@@ -114,6 +115,19 @@ class RoleModifier(Base):
         )
 
 
+class RaffleLossStreak(Base):
+    __tablename__ = "raffle_loss_streaks"
+    user_id = Column(BigInteger, primary_key=True)
+    # Normal raffles lost since the user last won one
+    loss_streak = Column(Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return (
+            f"RaffleLossStreak(user_id={self.user_id!r},"
+            f" loss_streak={self.loss_streak!r})"
+        )
+
+
 class MorningPoints(Base):
     __tablename__ = "morning_points"
     user_id = Column(BigInteger, primary_key=True)
@@ -222,6 +236,22 @@ class PredictionEntry(Base):
         )
 
 
+class PredictionTotal(Base):
+    __tablename__ = "prediction_totals"
+    # Running totals for one option, kept in step with prediction_entries
+    prediction_id = Column(Integer, ForeignKey("predictions.id"), primary_key=True)
+    guess = Column(Integer, primary_key=True)
+    points = Column(BigInteger, nullable=False, default=0)
+    entries = Column(Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return (
+            f"PredictionTotal(prediction_id={self.prediction_id!r},"
+            f" guess={self.guess!r}, points={self.points!r},"
+            f" entries={self.entries!r})"
+        )
+
+
 class EmojiReactions(Base):
     __tablename__ = "emoji_reactions"
 
@@ -292,9 +322,12 @@ class VODReviewBank(Base):
 
 class PointsHistory(Base):
     __tablename__ = "points_history"
+    __table_args__ = (
+        Index("ix_points_history_user_id_timestamp", "user_id", "timestamp"),
+    )
 
     id = Column(Integer, primary_key=True)
-    user_id = Column(BigInteger, nullable=False, index=True)
+    user_id = Column(BigInteger, nullable=False)
     timestamp = Column(DateTime, nullable=False, default=func.now())
     points_delta = Column(Integer, nullable=False)
     starting_balance = Column(Integer, nullable=False)
@@ -1,11 +1,13 @@
-from db.models import ChannelPoints
-from sqlalchemy import select, update, insert
-from sqlalchemy.orm import sessionmaker
+from contextlib import nullcontext
+from typing import Optional
+from db.models import ChannelPoints, PointsHistory
+from sqlalchemy import func, select, update, insert
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+from sqlalchemy.orm import Session, sessionmaker
 from datetime import timedelta, datetime
 from config import YAMLConfig as Config
 from discord import Role
-
-import discord
+from models.transaction import Transaction
 
 MIN_ACCRUAL_TIME = timedelta(minutes=15)
 MAX_ACCRUAL_WINDOW = timedelta(minutes=30)
@@ -24,13 +26,32 @@ ROLE_MULTIPLIERS: dict[str, int] = {
 
 
 def get_multiplier_for_user(roles: list[Role]) -> int:
-    for role_id, multiplier in sorted(
-        ROLE_MULTIPLIERS.items(), key=lambda item: item[1], reverse=True
-    ):
-        role = discord.utils.get(roles, id=role_id)
-        if role is not None:
-            return multiplier
-    return 1
+    multipliers = [
+        ROLE_MULTIPLIERS[role.id] for role in roles if role.id in ROLE_MULTIPLIERS
+    ]
+    return max(multipliers, default=1)
+
+
+def next_accrual_time(last_accrued: datetime, now: datetime) -> Optional[datetime]:
+    """Decide whether a user who last accrued at last_accrued may accrue again
+
+    Args:
+        last_accrued (datetime): Timestamp stored for the user's last accrual
+        now (datetime): Time of the message being accrued for
+
+    Returns:
+        Optional[datetime]: Timestamp to store for this accrual, or None if the
+            user has accrued within the last MIN_ACCRUAL_TIME
+    """
+    # Ensure points are not accruing on every message
+    # Only award points once per MIN_ACCRUAL_TIME
+    time_difference = now - last_accrued
+    if time_difference < MIN_ACCRUAL_TIME:
+        return None
+
+    if time_difference < MAX_ACCRUAL_WINDOW:
+        return last_accrued + MIN_ACCRUAL_TIME
+    return now
 
 
 def get_point_balance(user_id: int, session: sessionmaker) -> int:
@@ -54,36 +75,70 @@ def get_point_balance(user_id: int, session: sessionmaker) -> int:
         return channel_points.points
 
 
+def _transaction(sess: Session):
+    """Begin a transaction on sess unless it is already inside one"""
+    if sess.in_transaction():
+        return nullcontext()
+    return sess.begin()
+
+
+def _balance(sess: Session, user_id: int) -> Optional[int]:
+    return sess.execute(
+        select(ChannelPoints.points).where(ChannelPoints.user_id == user_id)
+    ).scalar()
+
+
+def _withdraw(
+    sess: Session, user_id: int, point_amount: int, allow_overdraft: bool
+) -> tuple[bool, int]:
+    stmt = (
+        update(ChannelPoints)
+        .where(ChannelPoints.user_id == user_id)
+        .values(points=ChannelPoints.points - point_amount)
+    )
+    if not allow_overdraft:
+        stmt = stmt.where(ChannelPoints.points >= point_amount)
+
+    applied = sess.execute(stmt).rowcount > 0
+    balance = _balance(sess, user_id)
+    if balance is None:
+        return False, 0
+    return applied, balance
+
+
+def _deposit(sess: Session, user_id: int, point_amount: int) -> int:
+    stmt = mysql_insert(ChannelPoints).values(user_id=user_id, points=point_amount)
+    stmt = stmt.on_duplicate_key_update(
+        points=ChannelPoints.points + stmt.inserted.points,
+        timestamp=func.now(),
+    )
+    sess.execute(stmt)
+    return _balance(sess, user_id)
+
+
 def withdraw_points(
-    user_id: int, point_amount: int, session: sessionmaker
+    user_id: int,
+    point_amount: int,
+    session: sessionmaker,
+    allow_overdraft: bool = False,
 ) -> tuple[bool, int]:
     """Withdraw points from user's current balance
 
+    The balance check and the withdrawal are a single conditional UPDATE, so
+    concurrent spends can never take a user below zero.
+
     Args:
-        user_id (int): Discord user ID to give points to
+        user_id (int): Discord user ID to withdraw points from
         point_amount (int): Number of points to withdraw
         session (sessionmaker): Open DB session
+        allow_overdraft (bool): Withdraw even if the balance would go negative
 
     Returns:
-        tuple[bool, int]: True if points were successfully withdrawn. If so, return new balance
+        tuple[bool, int]: True if points were successfully withdrawn, and the
+            user's balance afterwards (unchanged if the withdrawal failed)
     """
-    with session() as sess:
-        result = sess.execute(
-            select(ChannelPoints).where(ChannelPoints.user_id == user_id)
-        ).first()
-        if result is None:
-            return False, -1
-
-        channel_points: ChannelPoints = result[0]
-        new_balance = channel_points.points - point_amount
-        sess.execute(
-            update(ChannelPoints)
-            .where(ChannelPoints.user_id == user_id)
-            .values(
-                points=new_balance,
-            )
-        )
-        return True, new_balance
+    with session() as sess, _transaction(sess):
+        return _withdraw(sess, user_id, point_amount, allow_overdraft)
 
 
 def deposit_points(
@@ -93,32 +148,111 @@ def deposit_points(
 
     Args:
         user_id (int): Discord user ID to give points to
-        point_amount (int): Number of points to withdraw
+        point_amount (int): Number of points to deposit
         session (sessionmaker): Open DB session
 
     Returns:
         tuple[bool, int]: True if points were successfully depisoted. If so, return new balance
     """
-    with session() as sess:
-        result = sess.execute(
-            select(ChannelPoints).where(ChannelPoints.user_id == user_id)
-        ).first()
-        if result is None:
+    with session() as sess, _transaction(sess):
+        return True, _deposit(sess, user_id, point_amount)
+
+
+def transfer_points(
+    from_user_id: int, to_user_id: int, point_amount: int, session: sessionmaker
+) -> tuple[bool, int, int]:
+    """Move points from one user's balance to another's in a single transaction
+
+    Args:
+        from_user_id (int): Discord user ID to take points from
+        to_user_id (int): Discord user ID to give points to
+        point_amount (int): Number of points to move
+        session (sessionmaker): Open DB session
+
+    Returns:
+        tuple[bool, int, int]: True if the sender could afford the transfer,
+            followed by the sender's and recipient's balances afterwards
+    """
+    with session() as sess, _transaction(sess):
+        success, from_balance = _withdraw(sess, from_user_id, point_amount, False)
+        if not success:
+            return False, from_balance, _balance(sess, to_user_id) or 0
+        return True, from_balance, _deposit(sess, to_user_id, point_amount)
+
+
+def deposit_points_bulk(
+    deposits: list[tuple[int, int]], reason: str, session: sessionmaker
+) -> list[Transaction]:
+    """Deposit points into many balances and record the matching points
+    history in one transaction
+
+    Balances are read once, updated with a single multi-row upsert and the
+    history rows are written with one executemany insert, regardless of how
+    many users are being paid.
+
+    Args:
+        deposits (list[tuple[int, int]]): (user_id, point_amount) pairs. Users
+            appearing more than once receive the sum of their amounts
+        reason (str): Reason recorded in every user's points history
+        session (sessionmaker): Open DB session
+
+    Returns:
+        list[Transaction]: One transaction per user that received points
+    """
+    totals: dict[int, int] = {}
+    for user_id, point_amount in deposits:
+        totals[user_id] = totals.get(user_id, 0) + point_amount
+    if len(totals) == 0:
+        return []
+
+    with session() as sess, _transaction(sess):
+        starting_balances = dict(
             sess.execute(
-                insert(ChannelPoints).values(user_id=user_id, points=point_amount)
-            )
-            return True, point_amount
+                select(ChannelPoints.user_id, ChannelPoints.points)
+                .where(ChannelPoints.user_id.in_(list(totals)))
+                .with_for_update()
+            ).all()
+        )
 
-        channel_points: ChannelPoints = result[0]
-        new_balance = channel_points.points + point_amount
+        stmt = mysql_insert(ChannelPoints).values(
+            [
+                {"user_id": user_id, "points": point_amount}
+                for user_id, point_amount in totals.items()
+            ]
+        )
         sess.execute(
-            update(ChannelPoints)
-            .where(ChannelPoints.user_id == user_id)
-            .values(
-                points=new_balance,
+            stmt.on_duplicate_key_update(
+                points=ChannelPoints.points + stmt.inserted.points,
+                timestamp=func.now(),
+            )
+        )
+
+        transactions = []
+        for user_id, point_amount in totals.items():
+            starting_balance = starting_balances.get(user_id, 0)
+            transactions.append(
+                Transaction(
+                    user_id,
+                    point_amount,
+                    starting_balance,
+                    starting_balance + point_amount,
+                    reason,
+                )
             )
+        sess.execute(
+            insert(PointsHistory),
+            [
+                {
+                    "user_id": transaction.user_id,
+                    "points_delta": transaction.points_delta,
+                    "starting_balance": transaction.starting_balance,
+                    "ending_balance": transaction.ending_balance,
+                    "reason": transaction.reason,
+                }
+                for transaction in transactions
+            ],
         )
-        return True, new_balance
+        return transactions
 
 
 def accrue_channel_points(
@@ -144,20 +278,11 @@ def accrue_channel_points(
             )
             return True
 
-        # Ensure points are not accruing on every message
-        # Only award points once per MIN_ACCRUAL_TIME
         channel_points: ChannelPoints = result[0]
-        last_accrued: datetime = channel_points.timestamp
-        now = datetime.now()
-        time_difference = now - last_accrued
-
-        if time_difference < MIN_ACCRUAL_TIME:
+        updated_timestamp = next_accrual_time(channel_points.timestamp, datetime.now())
+        if updated_timestamp is None:
             return False
 
-        updated_timestamp = now
-        if time_difference < MAX_ACCRUAL_WINDOW:
-            updated_timestamp = last_accrued + MIN_ACCRUAL_TIME
-
         points_to_accrue = POINTS_PER_ACCRUAL * get_multiplier_for_user(roles)
         sess.execute(
             update(ChannelPoints)
@@ -168,3 +293,47 @@ def accrue_channel_points(
             )
         )
         return True
+
+
+def get_last_accrual_time(user_id: int, session: sessionmaker) -> Optional[datetime]:
+    """Get the timestamp of a user's most recent channel point accrual
+
+    Args:
+        user_id (int): Discord user ID to look up
+        session (sessionmaker): Open DB session
+
+    Returns:
+        Optional[datetime]: Timestamp of the last accrual, or None if the user
+            has never accrued points
+    """
+    with session() as sess:
+        return sess.execute(
+            select(ChannelPoints.timestamp).where(ChannelPoints.user_id == user_id)
+        ).scalar()
+
+
+def flush_channel_point_accruals(
+    accruals: list[tuple[int, int, datetime]], session: sessionmaker
+):
+    """Apply a batch of buffered accruals with a single multi-row upsert
+
+    Args:
+        accruals (list[tuple[int, int, datetime]]): (user_id, points, timestamp)
+            for every user with pending points
+        session (sessionmaker): Open DB session
+    """
+    if len(accruals) == 0:
+        return
+
+    stmt = mysql_insert(ChannelPoints).values(
+        [
+            {"user_id": user_id, "points": points, "timestamp": timestamp}
+            for user_id, points, timestamp in accruals
+        ]
+    )
+    stmt = stmt.on_duplicate_key_update(
+        points=ChannelPoints.points + stmt.inserted.points,
+        timestamp=stmt.inserted.timestamp,
+    )
+    with session() as sess:
+        sess.execute(stmt)
@@ -1,13 +1,14 @@
 from db.models import PointsHistory
+from typing import Optional
 from sqlalchemy.orm import sessionmaker
-from sqlalchemy import select, insert, delete, desc
+from sqlalchemy import select, insert, delete, desc, func
 from config import YAMLConfig as Config
 from models.transaction import Transaction
 
 
 def record_transaction(transaction: Transaction, session: sessionmaker):
-    """Record transaction into points history respecting maximum
-    maximum transaction limit
+    """Record transaction into points history. Old transactions are removed
+    separately by trim_transaction_history
 
     Args:
         transaction (Transaction): Transaction data to record
@@ -25,21 +26,25 @@ def record_transaction(transaction: Transaction, session: sessionmaker):
         )
 
 
-def get_transaction_history(user_id: int, session: sessionmaker):
+def get_transaction_history(
+    user_id: int, session: sessionmaker, limit: Optional[int] = None
+):
     """Get transaction history for user
 
     Args:
         user_id (int): Discord User ID of user
         session (sessionmaker): Open DB session
+        limit (Optional[int]): Maximum number of transactions to return
 
     Returns:
-        list[PointsHistory]: Up to MAXIMUM_TRANSACTIONS most recent point transactions
+        list[PointsHistory]: Up to limit most recent point transactions
     """
     with session() as sess:
         results = sess.execute(
             select(PointsHistory)
             .where(PointsHistory.user_id == user_id)
-            .order_by(desc(PointsHistory.timestamp))
+            .order_by(desc(PointsHistory.timestamp), desc(PointsHistory.id))
+            .limit(limit)
         ).all()
         user_history: list[PointsHistory] = [row[0] for row in results]
         return user_history
@@ -55,3 +60,30 @@ def delete_transactions(transactions: list[PointsHistory], session: sessionmaker
     with session() as sess:
         to_delete = list(map(lambda transaction: transaction.id, transactions))
         sess.execute(delete(PointsHistory).where(PointsHistory.id.in_(to_delete)))
+
+
+def trim_transaction_history(max_transactions: int, session: sessionmaker) -> int:
+    """Delete every transaction older than each user's max_transactions most
+    recent ones, for all users in a single statement
+
+    Args:
+        max_transactions (int): Number of transactions to keep per user
+        session (sessionmaker): Open DB session
+
+    Returns:
+        int: Number of transactions deleted
+    """
+    ranked = select(
+        PointsHistory.id,
+        func.row_number()
+        .over(
+            partition_by=PointsHistory.user_id,
+            order_by=(desc(PointsHistory.timestamp), desc(PointsHistory.id)),
+        )
+        .label("rank"),
+    ).subquery()
+    expired = select(ranked.c.id).where(ranked.c.rank > max_transactions)
+    with session() as sess:
+        return sess.execute(
+            delete(PointsHistory).where(PointsHistory.id.in_(expired))
+        ).rowcount
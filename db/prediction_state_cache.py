@@ -0,0 +1,98 @@
+from dataclasses import dataclass, replace
+from datetime import datetime
+from sqlalchemy.orm import Session
+from typing import Callable, Optional
+
+
+@dataclass(frozen=True)
+class PredictionState:
+    """Snapshot of the parts of an ongoing Prediction row that votes read"""
+
+    id: int
+    guild_id: int
+    channel_id: int
+    message_id: int
+    description: str
+    option_one: str
+    option_two: str
+    end_time: Optional[datetime]
+    set_nickname: bool
+    accepting_entries: bool
+
+
+@dataclass
+class PotTotals:
+    """Running point totals and entry counts for each side of a prediction"""
+
+    option_one_points: int = 0
+    option_two_points: int = 0
+    option_one_entries: int = 0
+    option_two_entries: int = 0
+
+    def set_option(self, guess: int, points: int, entries: int):
+        if guess == 0:
+            self.option_one_points = int(points)
+            self.option_one_entries = entries
+        else:
+            self.option_two_points = int(points)
+            self.option_two_entries = entries
+
+
+class PredictionStateCache:
+    """Ongoing predictions already read in one DB session
+
+    Kept in the session's info dict, so it lives only as long as a single DB
+    call or DB().unit(). The bot and the server both create and end
+    predictions, so every new session reads the ongoing prediction from
+    MySQL again, but the several lookups made while recording one vote share
+    a single read. Writes made in the session update it, and a rolled back
+    transaction discards it along with the session.
+    """
+
+    def __init__(self):
+        # guild_id -> ongoing prediction, or None once we know there isn't one
+        self.active: dict[int, Optional[PredictionState]] = {}
+
+    @staticmethod
+    def of(sess: Session) -> "PredictionStateCache":
+        """Get the cache belonging to an open session"""
+        return sess.info.setdefault("prediction_state", PredictionStateCache())
+
+    def get(
+        self, guild_id: int, load: Callable[[], Optional[PredictionState]]
+    ) -> Optional[PredictionState]:
+        """Get the ongoing prediction for a guild
+
+        Args:
+            guild_id (int): Guild to look up
+            load (Callable[[], Optional[PredictionState]]): Reads the ongoing
+                prediction from the DB if this session has not loaded it yet
+
+        Returns:
+            Optional[PredictionState]: The ongoing prediction, if there is one
+        """
+        if guild_id not in self.active:
+            self.active[guild_id] = load()
+        return self.active[guild_id]
+
+    def find(self, prediction_id: int) -> Optional[PredictionState]:
+        """Get an ongoing prediction by its id, if it has been loaded"""
+        for state in self.active.values():
+            if state is not None and state.id == prediction_id:
+                return state
+        return None
+
+    def set(self, guild_id: int, state: Optional[PredictionState]):
+        self.active[guild_id] = state
+
+    def update(self, guild_id: int, **changes):
+        """Apply changes to a guild's ongoing prediction if it is cached"""
+        state = self.active.get(guild_id)
+        if state is not None:
+            self.active[guild_id] = replace(state, **changes)
+
+    def end(self, prediction_id: int):
+        """Forget a prediction that has ended"""
+        state = self.find(prediction_id)
+        if state is not None:
+            self.set(state.guild_id, None)
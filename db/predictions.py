@@ -1,10 +1,97 @@
 from datetime import datetime
-from db.models import Prediction, PredictionEntry, PredictionSummary
-from sqlalchemy.orm import sessionmaker
+from functools import partial
+from db.models import Prediction, PredictionEntry, PredictionSummary, PredictionTotal
+from db.prediction_state_cache import (
+    PotTotals,
+    PredictionState,
+    PredictionStateCache,
+)
+from sqlalchemy.orm import Session, sessionmaker
 from sqlalchemy import select, update, insert, func
 from typing import Optional
 
 
+def _to_state(prediction: Prediction) -> PredictionState:
+    return PredictionState(
+        id=prediction.id,
+        guild_id=prediction.guild_id,
+        channel_id=prediction.channel_id,
+        message_id=prediction.message_id,
+        description=prediction.description,
+        option_one=prediction.option_one,
+        option_two=prediction.option_two,
+        end_time=prediction.end_time,
+        set_nickname=prediction.set_nickname,
+        accepting_entries=prediction.accepting_entries,
+    )
+
+
+def _load_active_prediction(guild_id: int, sess: Session) -> Optional[PredictionState]:
+    # Shared lock, so closing or ending the prediction waits for units that
+    # have checked it, e.g. a vote between its check and its entry insert
+    stmt = (
+        select(Prediction)
+        .where(Prediction.guild_id == guild_id)
+        .where(Prediction.ended == False)
+        .limit(1)
+        .with_for_update(read=True)
+    )
+    prediction = sess.execute(stmt).scalar()
+    if prediction is None:
+        return None
+    return _to_state(prediction)
+
+
+def _aggregate_pot_totals(prediction_id: int, sess: Session) -> PotTotals:
+    stmt = (
+        select(
+            PredictionEntry.guess,
+            func.sum(PredictionEntry.channel_points),
+            func.count(PredictionEntry.id),
+        )
+        .where(PredictionEntry.prediction_id == prediction_id)
+        .group_by(PredictionEntry.guess)
+    )
+    totals = PotTotals()
+    for guess, points, entries in sess.execute(stmt).all():
+        totals.set_option(guess, points, entries)
+    return totals
+
+
+def _stored_pot_totals(prediction_id: int, sess: Session) -> Optional[PotTotals]:
+    stmt = select(
+        PredictionTotal.guess, PredictionTotal.points, PredictionTotal.entries
+    ).where(PredictionTotal.prediction_id == prediction_id)
+    results = sess.execute(stmt).all()
+    # Predictions started before prediction_totals existed have no rows
+    if len(results) == 0:
+        return None
+
+    totals = PotTotals()
+    for guess, points, entries in results:
+        totals.set_option(guess, points, entries)
+    return totals
+
+
+def get_active_prediction(
+    guild_id: int, session: sessionmaker
+) -> Optional[PredictionState]:
+    """Get the ongoing prediction for a guild, reading it from the DB only
+    the first time the guild is looked up in this session
+
+    Args:
+        guild_id (int): Guild to look up
+        session (sessionmaker): Open DB session
+
+    Returns:
+        Optional[PredictionState]: The ongoing prediction, if there is one
+    """
+    with session() as sess:
+        return PredictionStateCache.of(sess).get(
+            guild_id, partial(_load_active_prediction, guild_id, sess)
+        )
+
+
 def create_prediction(
     guild_id: int,
     channel_id: int,
@@ -20,7 +107,7 @@ def create_prediction(
         raise Exception("There is already an ongoing prediction!")
 
     with session() as sess:
-        sess.execute(
+        result = sess.execute(
             insert(Prediction).values(
                 guild_id=guild_id,
                 channel_id=channel_id,
@@ -32,6 +119,26 @@ def create_prediction(
                 set_nickname=set_nickname,
             )
         )
+        prediction_id = result.inserted_primary_key[0]
+        sess.execute(
+            insert(PredictionTotal),
+            [{"prediction_id": prediction_id, "guess": guess} for guess in (0, 1)],
+        )
+        PredictionStateCache.of(sess).set(
+            guild_id,
+            PredictionState(
+                id=prediction_id,
+                guild_id=guild_id,
+                channel_id=channel_id,
+                message_id=message_id,
+                description=description,
+                option_one=option_one,
+                option_two=option_two,
+                end_time=end_time,
+                set_nickname=set_nickname,
+                accepting_entries=True,
+            ),
+        )
 
 
 def rename_prediction(
@@ -54,31 +161,21 @@ def rename_prediction(
                 option_two=option_two,
             )
         )
+        PredictionStateCache.of(sess).update(
+            guild_id,
+            description=description,
+            option_one=option_one,
+            option_two=option_two,
+        )
 
 
 def has_ongoing_prediction(guild_id: int, session: sessionmaker) -> bool:
-    with session() as sess:
-        stmt = (
-            select(Prediction)
-            .where(Prediction.guild_id == guild_id)
-            .where(Prediction.ended == False)
-        )
-        result = sess.execute(stmt).all()
-
-    return len(result) > 0
+    return get_active_prediction(guild_id, session) is not None
 
 
 def accepting_prediction_entries(guild_id: int, session: sessionmaker) -> bool:
-    with session() as sess:
-        stmt = (
-            select(Prediction)
-            .where(Prediction.guild_id == guild_id)
-            .where(Prediction.ended == False)
-            .where(Prediction.accepting_entries == True)
-        )
-        result = sess.execute(stmt).all()
-
-    return len(result) > 0
+    prediction = get_active_prediction(guild_id, session)
+    return prediction is not None and prediction.accepting_entries
 
 
 def close_prediction(guild_id: int, session: sessionmaker):
@@ -89,6 +186,7 @@ def close_prediction(guild_id: int, session: sessionmaker):
             .where(Prediction.ended == False)
             .values(accepting_entries=False)
         )
+        PredictionStateCache.of(sess).update(guild_id, accepting_entries=False)
 
 
 def complete_prediction(guild_id: int, winning_option: int, session: sessionmaker):
@@ -99,31 +197,25 @@ def complete_prediction(guild_id: int, winning_option: int, session: sessionmake
             .where(Prediction.ended == False)
             .values(ended=True, accepting_entries=False, winning_option=winning_option)
         )
+        PredictionStateCache.of(sess).set(guild_id, None)
 
 
 def get_ongoing_prediction_id(guild_id: int, session: sessionmaker) -> Optional[int]:
-    if not has_ongoing_prediction(guild_id, session):
+    prediction = get_active_prediction(guild_id, session)
+    if prediction is None:
         raise Exception("There is no ongoing prediction! You need to start a new one.")
 
-    with session() as sess:
-        stmt = (
-            select(Prediction.id)
-            .where(Prediction.guild_id == guild_id)
-            .where(Prediction.ended == False)
-            .limit(1)
-        )
-        result = sess.execute(stmt).one()
-
-    if len(result) == 0:
-        return None
-
-    return result[0]
+    return prediction.id
 
 
 def get_prediction_message_id(
     prediction_id: int, session: sessionmaker
 ) -> Optional[int]:
     with session() as sess:
+        prediction = PredictionStateCache.of(sess).find(prediction_id)
+        if prediction is not None:
+            return prediction.message_id
+
         stmt = (
             select(Prediction.message_id).where(Prediction.id == prediction_id).limit(1)
         )
@@ -139,6 +231,10 @@ def get_prediction_channel_id(
     prediction_id: int, session: sessionmaker
 ) -> Optional[int]:
     with session() as sess:
+        prediction = PredictionStateCache.of(sess).find(prediction_id)
+        if prediction is not None:
+            return prediction.channel_id
+
         stmt = (
             select(Prediction.channel_id).where(Prediction.id == prediction_id).limit(1)
         )
@@ -163,6 +259,16 @@ def create_prediction_entry(
                 guess=guess,
             )
         )
+        # Same transaction as the entry, so the totals can't drift from it
+        sess.execute(
+            update(PredictionTotal)
+            .where(PredictionTotal.prediction_id == prediction_id)
+            .where(PredictionTotal.guess == guess)
+            .values(
+                points=PredictionTotal.points + channel_points,
+                entries=PredictionTotal.entries + 1,
+            )
+        )
     return True
 
 
@@ -184,31 +290,75 @@ def get_user_prediction_entry(
     return result[0][0]
 
 
+def get_pot_totals(prediction_id: int, session: sessionmaker) -> PotTotals:
+    """Get running point totals and entry counts for a prediction from
+    prediction_totals, aggregating prediction_entries only for predictions
+    started before the running totals were kept
+
+    Args:
+        prediction_id (int): ID of Prediction to get totals for
+        session (sessionmaker): Open DB session
+
+    Returns:
+        PotTotals: Points and entries on each option
+    """
+    with session() as sess:
+        totals = _stored_pot_totals(prediction_id, sess)
+        if totals is None:
+            totals = _aggregate_pot_totals(prediction_id, sess)
+    return totals
+
+
 def get_prediction_point_counts(
     prediction_id: int, session: sessionmaker
 ) -> tuple[int, int]:
+    """Sum the points on each option straight from prediction_entries, for
+    payouts, which must not depend on the running totals
+
+    Args:
+        prediction_id (int): ID of Prediction to sum
+        session (sessionmaker): Open DB session
+
+    Returns:
+        tuple[int, int]: Points on option one and option two
+    """
     with session() as sess:
-        stmt = (
-            select(func.sum(PredictionEntry.channel_points))
-            .select_from(PredictionEntry)
-            .where(PredictionEntry.prediction_id == prediction_id)
-            .where(PredictionEntry.guess == 0)
-        )
-        result_one = sess.execute(stmt).first()[0]
-        if result_one is None:
-            result_one = 0
+        totals = _aggregate_pot_totals(prediction_id, sess)
+    return (totals.option_one_points, totals.option_two_points)
 
-        stmt = (
-            select(func.sum(PredictionEntry.channel_points))
-            .select_from(PredictionEntry)
-            .where(PredictionEntry.prediction_id == prediction_id)
-            .where(PredictionEntry.guess == 1)
-        )
-        result_two = sess.execute(stmt).first()[0]
-        if result_two is None:
-            result_two = 0
 
-    return (int(result_one), int(result_two))
+def reconcile_pot_totals(prediction_id: int, session: sessionmaker) -> bool:
+    """Check the running pot totals for a prediction against
+    prediction_entries, replacing them with the aggregated values if they
+    have drifted
+
+    Args:
+        prediction_id (int): ID of Prediction to check
+        session (sessionmaker): Open DB session
+
+    Returns:
+        bool: True if the running totals were correct (or none are kept)
+    """
+    with session() as sess:
+        stored = _stored_pot_totals(prediction_id, sess)
+        if stored is None:
+            return True
+
+        actual = _aggregate_pot_totals(prediction_id, sess)
+        if actual == stored:
+            return True
+
+        for guess, points, entries in (
+            (0, actual.option_one_points, actual.option_one_entries),
+            (1, actual.option_two_points, actual.option_two_entries),
+        ):
+            sess.execute(
+                update(PredictionTotal)
+                .where(PredictionTotal.prediction_id == prediction_id)
+                .where(PredictionTotal.guess == guess)
+                .values(points=points, entries=entries)
+            )
+    return False
 
 
 def get_prediction_entries_for_guess(
@@ -250,11 +400,28 @@ def set_prediction_outcome(
             .where(Prediction.id == prediction_id)
             .values(ended=True, accepting_entries=False, winning_option=winning_option)
         )
+        PredictionStateCache.of(sess).end(prediction_id)
 
 
 def get_prediction_summary(
     prediction_id: int, session: sessionmaker
 ) -> PredictionSummary:
+    with session() as sess:
+        prediction = PredictionStateCache.of(sess).find(prediction_id)
+    if prediction is not None:
+        totals = get_pot_totals(prediction_id, session)
+        return PredictionSummary(
+            prediction.description,
+            prediction.option_one,
+            prediction.option_two,
+            totals.option_one_points,
+            totals.option_two_points,
+            prediction.end_time,
+            prediction.set_nickname,
+            prediction.accepting_entries,
+            False,
+        )
+
     with session() as sess:
         stmt = select(Prediction).where(Prediction.id == prediction_id)
         result = sess.execute(stmt).all()
@@ -263,15 +430,13 @@ def get_prediction_summary(
                 "There is no ongoing prediction! You need to start a new one."
             )
         prediction: Prediction = result[0][0]
-        option_one_points, option_two_points = get_prediction_point_counts(
-            prediction_id, session
-        )
+        totals = get_pot_totals(prediction_id, session)
         return PredictionSummary(
             prediction.description,
             prediction.option_one,
             prediction.option_two,
-            option_one_points,
-            option_two_points,
+            totals.option_one_points,
+            totals.option_two_points,
             prediction.end_time,
             prediction.set_nickname,
             prediction.accepting_entries,
@@ -0,0 +1,293 @@
+from datetime import datetime
+from typing import Optional
+from sqlalchemy import delete, func, insert, literal, select, update
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+from sqlalchemy.orm import Session, sessionmaker
+from db.models import Raffle, RaffleEntry, RaffleLossStreak, RaffleType, RoleModifier
+
+# guild_id -> role_id -> ticket modifier. Loaded on first use and dropped
+# whenever the guild's modifiers are changed through set_role_modifier
+ROLE_MODIFIERS: dict[int, dict[int, int]] = {}
+
+
+def get_role_modifiers(guild_id: int, session: sessionmaker) -> dict[int, int]:
+    """Get the raffle ticket modifier for every role in a guild
+
+    Args:
+        guild_id (int): Guild to look up
+        session (sessionmaker): Open DB session
+
+    Returns:
+        dict[int, int]: role_id -> modifier. Shared with the cache, so don't
+            modify it
+    """
+    modifiers = ROLE_MODIFIERS.get(guild_id)
+    if modifiers is not None:
+        return modifiers
+
+    with session() as sess:
+        stmt = select(RoleModifier).where(RoleModifier.guild_id == guild_id)
+        result = sess.execute(stmt).all()
+
+    modifiers = {r[0].role_id: r[0].modifier for r in result}
+    return ROLE_MODIFIERS.setdefault(guild_id, modifiers)
+
+
+def set_role_modifier(
+    guild_id: int, role_id: int, modifier: int, session: sessionmaker
+):
+    """Set the number of extra raffle tickets a role grants
+
+    Args:
+        guild_id (int): Guild the role belongs to
+        role_id (int): Role to set the modifier for
+        modifier (int): Tickets added to (or removed from) entries by members
+            with the role
+        session (sessionmaker): Open DB session
+    """
+    with session() as sess:
+        sess.execute(
+            mysql_insert(RoleModifier)
+            .values(guild_id=guild_id, role_id=role_id, modifier=modifier)
+            .on_duplicate_key_update(guild_id=guild_id, modifier=modifier)
+        )
+    invalidate_role_modifiers(guild_id)
+
+
+def invalidate_role_modifiers(guild_id: Optional[int] = None):
+    """Reload a guild's role modifiers (or every guild's) on next use"""
+    if guild_id is None:
+        ROLE_MODIFIERS.clear()
+    else:
+        ROLE_MODIFIERS.pop(guild_id, None)
+
+
+def get_loss_streak(user_id: int, session: sessionmaker) -> int:
+    """Get the number of normal raffles a user has lost since their last win
+
+    Args:
+        user_id (int): Discord user ID to look up
+        session (sessionmaker): Open DB session
+
+    Returns:
+        int: Current loss streak
+    """
+    with session() as sess:
+        streak = sess.execute(
+            select(RaffleLossStreak.loss_streak).where(
+                RaffleLossStreak.user_id == user_id
+            )
+        ).scalar()
+    return streak or 0
+
+
+def get_loss_streaks(session: sessionmaker) -> dict[int, int]:
+    """Get every user's current loss streak
+
+    Args:
+        session (sessionmaker): Open DB session
+
+    Returns:
+        dict[int, int]: user_id -> loss streak, for users with a streak
+    """
+    with session() as sess:
+        result = sess.execute(
+            select(RaffleLossStreak.user_id, RaffleLossStreak.loss_streak).where(
+                RaffleLossStreak.loss_streak > 0
+            )
+        ).all()
+    return {user_id: streak for user_id, streak in result}
+
+
+def get_recent_wins(
+    guild_id: int, after: datetime, session: sessionmaker
+) -> dict[int, datetime]:
+    """Get everyone who has won a normal raffle in a guild since a date
+
+    Args:
+        guild_id (int): Guild to look up
+        after (datetime): Only count raffles that ended after this
+        session (sessionmaker): Open DB session
+
+    Returns:
+        dict[int, datetime]: user_id -> time of the user's latest winning entry
+    """
+    with session() as sess:
+        result = sess.execute(
+            select(RaffleEntry.user_id, func.max(RaffleEntry.timestamp))
+            .join(Raffle)
+            .where(Raffle.guild_id == guild_id)
+            .where(Raffle.ended == True)
+            .where(Raffle.raffle_type == RaffleType.normal)
+            .where(RaffleEntry.winner == True)
+            .where(Raffle.end_time > after)
+            .group_by(RaffleEntry.user_id)
+        ).all()
+    return {user_id: timestamp for user_id, timestamp in result}
+
+
+def create_raffle_entries(
+    raffle_id: int, entries: list[tuple[int, int]], session: sessionmaker
+):
+    """Insert a batch of raffle entries
+
+    Args:
+        raffle_id (int): Raffle being entered
+        entries (list[tuple[int, int]]): (user_id, tickets) for every entrant
+        session (sessionmaker): Open DB session
+    """
+    if len(entries) == 0:
+        return
+
+    with session() as sess:
+        sess.execute(
+            insert(RaffleEntry),
+            [
+                {"raffle_id": raffle_id, "user_id": user_id, "tickets": tickets}
+                for user_id, tickets in entries
+            ],
+        )
+
+
+def _is_normal_raffle(sess: Session, raffle_id: int) -> bool:
+    raffle_type = sess.execute(
+        select(Raffle.raffle_type).where(Raffle.id == raffle_id)
+    ).scalar()
+    return raffle_type == RaffleType.normal
+
+
+def reset_loss_streaks(raffle_id: int, user_ids: list[int], session: sessionmaker):
+    """Reset the loss streak of users who won a raffle
+
+    Only normal raffles count towards loss streaks, so this does nothing for
+    other raffle types.
+
+    Args:
+        raffle_id (int): Raffle the users won
+        user_ids (list[int]): Winners
+        session (sessionmaker): Open DB session
+    """
+    if len(user_ids) == 0:
+        return
+
+    with session() as sess:
+        if not _is_normal_raffle(sess, raffle_id):
+            return
+        sess.execute(
+            mysql_insert(RaffleLossStreak)
+            .values([{"user_id": user_id, "loss_streak": 0} for user_id in user_ids])
+            .on_duplicate_key_update(loss_streak=0)
+        )
+
+
+def record_raffle_losses(raffle_id: int, session: sessionmaker):
+    """Add a loss to every entrant of a closed normal raffle who didn't win
+
+    Args:
+        raffle_id (int): Raffle that was closed
+        session (sessionmaker): Open DB session
+    """
+    with session() as sess:
+        if not _is_normal_raffle(sess, raffle_id):
+            return
+        losers = select(RaffleEntry.user_id, literal(1)).where(
+            RaffleEntry.raffle_id == raffle_id, RaffleEntry.winner == False
+        )
+        sess.execute(
+            mysql_insert(RaffleLossStreak)
+            .from_select(["user_id", "loss_streak"], losers)
+            .on_duplicate_key_update(loss_streak=RaffleLossStreak.loss_streak + 1)
+        )
+
+
+def undo_raffle_losses(raffle_id: int, session: sessionmaker):
+    """Take back the losses record_raffle_losses added when a raffle is reopened
+
+    Args:
+        raffle_id (int): Raffle that was reopened
+        session (sessionmaker): Open DB session
+    """
+    with session() as sess:
+        if not _is_normal_raffle(sess, raffle_id):
+            return
+        losers = select(RaffleEntry.user_id).where(
+            RaffleEntry.raffle_id == raffle_id, RaffleEntry.winner == False
+        )
+        sess.execute(
+            update(RaffleLossStreak)
+            .where(RaffleLossStreak.user_id.in_(losers))
+            .values(loss_streak=func.greatest(RaffleLossStreak.loss_streak - 1, 0))
+            .execution_options(synchronize_session=False)
+        )
+
+
+def _loss_streaks_query(user_id: Optional[int] = None):
+    """Count every user's closed normal raffle losses since their last win"""
+    last_wins = (
+        select(RaffleEntry.user_id, func.max(RaffleEntry.id).label("last_win_id"))
+        .join(Raffle)
+        .where(RaffleEntry.winner == True)
+        .where(Raffle.raffle_type == RaffleType.normal)
+        .group_by(RaffleEntry.user_id)
+    )
+    if user_id is not None:
+        last_wins = last_wins.where(RaffleEntry.user_id == user_id)
+    last_wins = last_wins.subquery()
+
+    stmt = (
+        select(RaffleEntry.user_id, func.count("*").label("loss_streak"))
+        .select_from(RaffleEntry)
+        .join(Raffle)
+        .outerjoin(last_wins, last_wins.c.user_id == RaffleEntry.user_id)
+        .where(RaffleEntry.id > func.ifnull(last_wins.c.last_win_id, 0))
+        .where(RaffleEntry.winner == False)
+        .where(Raffle.raffle_type == RaffleType.normal)
+        # Ongoing raffles are counted by record_raffle_losses once they close
+        .where(Raffle.ended == True)
+        .group_by(RaffleEntry.user_id)
+    )
+    if user_id is not None:
+        stmt = stmt.where(RaffleEntry.user_id == user_id)
+    return stmt
+
+
+def recalculate_loss_streak(user_id: int, session: sessionmaker) -> int:
+    """Recount a user's loss streak from their raffle history
+
+    Used when a past win is removed, which can't be undone incrementally.
+
+    Args:
+        user_id (int): Discord user ID to recount
+        session (sessionmaker): Open DB session
+
+    Returns:
+        int: The user's new loss streak
+    """
+    with session() as sess:
+        row = sess.execute(_loss_streaks_query(user_id)).first()
+        streak = 0 if row is None else row.loss_streak
+        sess.execute(
+            mysql_insert(RaffleLossStreak)
+            .values(user_id=user_id, loss_streak=streak)
+            .on_duplicate_key_update(loss_streak=streak)
+        )
+    return streak
+
+
+def backfill_loss_streaks(session: sessionmaker) -> int:
+    """Rebuild every user's loss streak from their raffle history
+
+    Args:
+        session (sessionmaker): Open DB session
+
+    Returns:
+        int: Number of users with a loss streak
+    """
+    with session() as sess, sess.begin():
+        sess.execute(delete(RaffleLossStreak))
+        result = sess.execute(
+            mysql_insert(RaffleLossStreak).from_select(
+                ["user_id", "loss_streak"], _loss_streaks_query()
+            )
+        )
+    return result.rowcount
@@ -0,0 +1,76 @@
+from datetime import datetime
+from typing import Optional
+
+
+class RobomojiIndex:
+    """In-process copy of every user's Robomojis and the reaction delay
+
+    Loaded from the DB once by load_robomoji_index in db/emoji_reactions.py
+    and from then on kept current by toggle_emoji_reaction and
+    set_emoji_reaction_delay, so looking up the reactions for a message never
+    has to touch MySQL.
+
+    Reaction times are recorded here as they happen and written back in
+    batches. dirty holds the users whose time hasn't been written yet.
+    """
+
+    __instance = None
+
+    def __new__(cls):
+        if cls.__instance is None:
+            cls.__instance = super(RobomojiIndex, cls).__new__(cls)
+            cls.__instance.__initialized = False
+        return cls.__instance
+
+    def __init__(self):
+        if self.__initialized:
+            return
+
+        self.__initialized = True
+        self.loaded = False
+        # user_id -> emojis to react with, only for users that have any
+        self.emojis: dict[int, list[str]] = {}
+        # None until a delay has been set
+        self.delay: Optional[int] = None
+        # user_id -> time of the user's last Robomoji reaction
+        self.last_used: dict[int, datetime] = {}
+        self.dirty: set[int] = set()
+
+    def load(
+        self,
+        emojis: dict[int, list[str]],
+        delay: Optional[int],
+        last_used: dict[int, datetime],
+    ):
+        self.emojis = emojis
+        self.delay = delay
+        # Keep reactions recorded while the load was running
+        self.last_used = {**last_used, **self.last_used}
+        self.loaded = True
+
+    def get(self, user_id: int) -> list[str]:
+        """Get the emojis to react to a user's messages with"""
+        return self.emojis.get(user_id, [])
+
+    def toggle(self, user_id: int, emoji: str, enabled: bool):
+        emojis = self.emojis.setdefault(user_id, [])
+        if enabled and emoji not in emojis:
+            emojis.append(emoji)
+        elif not enabled and emoji in emojis:
+            emojis.remove(emoji)
+        if len(emojis) == 0:
+            del self.emojis[user_id]
+
+    def mark_used(self, user_id: int, when: datetime, written: bool = False):
+        """Record a reaction, to be written back unless it already has been"""
+        self.last_used[user_id] = when
+        if written:
+            self.dirty.discard(user_id)
+        else:
+            self.dirty.add(user_id)
+
+    def take_dirty(self) -> list[tuple[int, datetime]]:
+        """Remove and return every reaction time not yet written to the DB"""
+        dirty = [(user_id, self.last_used[user_id]) for user_id in self.dirty]
+        self.dirty.clear()
+        return dirty
@@ -0,0 +1,74 @@
+from asyncio import Event
+from datetime import datetime
+from typing import NamedTuple
+
+from models.temprole_index import TempRoleIndex
+from util.expiry_heap import ExpiryHeap
+
+
+class ScheduledTempRole(NamedTuple):
+    user_id: int
+    role_id: int
+    guild_id: int
+
+
+class TempRoleCache:
+    """In-process copy of every temprole
+
+    Loaded from the DB once by load_temprole_cache in db/temproles.py and from
+    then on kept current by set_temprole and delete_temprole.
+
+    schedule orders temproles by expiration so the expiry task can sleep until
+    exactly the next one, and changed is set whenever it changes to wake the
+    task early. index answers which temproles a member holds, so member
+    updates can be checked without touching MySQL.
+    """
+
+    __instance = None
+
+    def __new__(cls):
+        if cls.__instance is None:
+            cls.__instance = super(TempRoleCache, cls).__new__(cls)
+            cls.__instance.__initialized = False
+        return cls.__instance
+
+    def __init__(self):
+        if self.__initialized:
+            return
+
+        self.__initialized = True
+        self.loaded = False
+        # temprole id -> when it expires and who it belongs to
+        self.schedule: ExpiryHeap[int, ScheduledTempRole] = ExpiryHeap()
+        self.index = TempRoleIndex()
+        self.changed = Event()
+
+    def load(self, temproles: list[tuple[int, int, int, int, datetime]]):
+        """Add (id, user_id, role_id, guild_id, expiration) rows
+
+        Temproles set while the load was running are kept as they are.
+        """
+        for id, user_id, role_id, guild_id, expiration in temproles:
+            if id not in self.index:
+                self.set(id, user_id, role_id, guild_id, expiration)
+        self.loaded = True
+        self.changed.set()
+
+    def set(
+        self,
+        id: int,
+        user_id: int,
+        role_id: int,
+        guild_id: int,
+        expiration: datetime,
+    ):
+        self.schedule.schedule(
+            id, expiration, ScheduledTempRole(user_id, role_id, guild_id)
+        )
+        self.index.add(id, user_id, role_id)
+        self.changed.set()
+
+    def remove(self, id: int):
+        self.index.remove(id)
+        if self.schedule.cancel(id):
+            self.changed.set()
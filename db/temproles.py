@@ -1,5 +1,6 @@
 from datetime import datetime
 from db.models import TempRoles
+from db.temprole_cache import TempRoleCache
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy import select, delete, insert, update, func
 
@@ -23,21 +24,23 @@ def set_temprole(
     with session() as sess:
         result = retrieve_temprole(user_id, role_id, session)
         if result is None:
-            sess.execute(
+            id = sess.execute(
                 insert(TempRoles).values(
                     user_id=user_id,
                     role_id=role_id,
                     guild_id=guild_id,
                     expiration=expiration,
                 )
+            ).inserted_primary_key[0]
+        else:
+            id = result.id
+            sess.execute(
+                update(TempRoles)
+                .where(TempRoles.user_id == user_id)
+                .where(TempRoles.role_id == role_id)
+                .values(expiration=expiration)
             )
-            return
-        sess.execute(
-            update(TempRoles)
-            .where(TempRoles.user_id == user_id)
-            .where(TempRoles.role_id == role_id)
-            .values(expiration=expiration)
-        )
+    TempRoleCache().set(id, user_id, role_id, guild_id, expiration)
 
 
 def retrieve_temprole(
@@ -73,6 +76,26 @@ def delete_temprole(id: int, session: sessionmaker):
     """
     with session() as sess:
         sess.execute(delete(TempRoles).where(TempRoles.id == id))
+    TempRoleCache().remove(id)
+
+
+def load_temprole_cache(session: sessionmaker):
+    """Load every temprole into TempRoleCache
+
+    Args:
+        session (sessionmaker): Open DB session
+    """
+    with session() as sess:
+        temproles = sess.execute(
+            select(
+                TempRoles.id,
+                TempRoles.user_id,
+                TempRoles.role_id,
+                TempRoles.guild_id,
+                TempRoles.expiration,
+            )
+        ).all()
+    TempRoleCache().load(temproles)
 
 
 def get_expired_roles(compare_time: datetime, session: sessionmaker) -> list[TempRoles]:
@@ -0,0 +1,36 @@
+import os
+
+import pytest
+
+pytest.importorskip("sqlalchemy")
+pytest.importorskip("discord")
+# Importing db loads config.yaml, which exits when it is missing
+if not os.path.exists(os.path.join(os.path.dirname(__file__), "../../config.yaml")):
+    pytest.skip("db needs config.yaml", allow_module_level=True)
+
+from sqlalchemy import create_engine, insert, select
+from sqlalchemy.orm import sessionmaker
+
+from db.models import Base, ChannelPoints
+from db.point_accrual import transfer_points
+
+
+def balances(session: sessionmaker) -> dict[int, int]:
+    with session() as sess:
+        return dict(
+            sess.execute(select(ChannelPoints.user_id, ChannelPoints.points)).all()
+        )
+
+
+def test_overdrawn_transfers_leave_both_balances_unchanged():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    session = sessionmaker(engine, autocommit=True)
+    with session() as sess:
+        sess.execute(
+            insert(ChannelPoints),
+            [{"user_id": 1, "points": 50}, {"user_id": 2, "points": 10}],
+        )
+
+    assert transfer_points(1, 2, 100, session) == (False, 50, 10)
+    assert balances(session) == {1: 50, 2: 10}
@@ -0,0 +1,58 @@
+from dataclasses import dataclass, field
+from datetime import datetime
+
+
+@dataclass
+class LiveRaffle:
+    """In-memory state of a raffle that is accepting entries
+
+    Everything needed to decide whether someone can enter, and with how many
+    tickets, is loaded when the raffle starts. Entries are queued in pending
+    and written to the DB in batches.
+    """
+
+    raffle_id: int
+    message_id: int
+    # role_id -> ticket modifier
+    role_modifiers: dict[int, int] = field(default_factory=dict)
+    # user_id -> loss streak, for users with one
+    loss_streaks: dict[int, int] = field(default_factory=dict)
+    # user_id -> latest winning entry, for users who won in the last week
+    recent_wins: dict[int, datetime] = field(default_factory=dict)
+    # Users who have entered, or are in the middle of entering
+    entrants: set[int] = field(default_factory=set)
+    entry_count: int = 0
+    total_tickets: int = 0
+    # (user_id, tickets) entries not yet written to the DB
+    pending: list[tuple[int, int]] = field(default_factory=list)
+    accepting_entries: bool = True
+
+    def reserve(self, user_id: int) -> bool:
+        """Claim a user's spot so a double click can't enter them twice
+
+        Returns:
+            bool: False if the user has already entered or entries are closed
+        """
+        if not self.accepting_entries or user_id in self.entrants:
+            return False
+        self.entrants.add(user_id)
+        return True
+
+    def release(self, user_id: int):
+        """Give back a spot claimed by reserve for a user who can't enter"""
+        self.entrants.discard(user_id)
+
+    def add_entry(self, user_id: int, tickets: int):
+        """Queue the entry of a user who was reserved"""
+        self.pending.append((user_id, tickets))
+        self.entry_count += 1
+        self.total_tickets += tickets
+
+    def take_pending(self) -> list[tuple[int, int]]:
+        """Remove and return every queued entry"""
+        pending, self.pending = self.pending, []
+        return pending
+
+    def restore_pending(self, entries: list[tuple[int, int]]):
+        """Put entries that failed to write back at the front of the queue"""
+        self.pending[:0] = entries
@@ -0,0 +1,75 @@
+from dataclasses import dataclass, field
+from typing import AbstractSet
+
+
+@dataclass
+class TempRoleIndex:
+    """Which temproles each member holds
+
+    Lets a member update be checked for removed temproles with a dict lookup
+    and a set intersection, so only updates that actually remove one go to
+    the DB.
+    """
+
+    # user_id -> role_id -> temprole id, only for users with a temprole
+    members: dict[int, dict[int, int]] = field(default_factory=dict)
+    # temprole id -> (user_id, role_id)
+    temproles: dict[int, tuple[int, int]] = field(default_factory=dict)
+
+    def __len__(self) -> int:
+        return len(self.temproles)
+
+    def __contains__(self, id: int) -> bool:
+        return id in self.temproles
+
+    def add(self, id: int, user_id: int, role_id: int):
+        """Record a temprole, replacing any other for the same user and role"""
+        previous = self.members.get(user_id, {}).get(role_id)
+        if previous is not None and previous != id:
+            self.remove(previous)
+        self.members.setdefault(user_id, {})[role_id] = id
+        self.temproles[id] = (user_id, role_id)
+
+    def remove(self, id: int) -> bool:
+        """Forget a temprole
+
+        Returns:
+            bool: True if the temprole was indexed
+        """
+        pair = self.temproles.pop(id, None)
+        if pair is None:
+            return False
+
+        user_id, role_id = pair
+        roles = self.members[user_id]
+        del roles[role_id]
+        if len(roles) == 0:
+            del self.members[user_id]
+        return True
+
+    def holds_any(self, user_id: int) -> bool:
+        return user_id in self.members
+
+    def get(self, user_id: int, role_id: int) -> int | None:
+        """Get the id of a user's temprole for a role, if they have one"""
+        return self.members.get(user_id, {}).get(role_id)
+
+    def removed(
+        self,
+        user_id: int,
+        before_role_ids: AbstractSet[int],
+        after_role_ids: AbstractSet[int],
+    ) -> list[tuple[int, int]]:
+        """Find the temproles a member update took away
+
+        Only roles the member had before count, since a temprole is recorded
+        just before its role is granted.
+
+        Returns:
+            list[tuple[int, int]]: (role_id, temprole id) of each removed temprole
+        """
+        roles = self.members.get(user_id)
+        if roles is None:
+            return []
+        removed = (roles.keys() & before_role_ids) - after_role_ids
+        return [(role_id, roles[role_id]) for role_id in removed]
@@ -0,0 +1,48 @@
+from models.live_raffle import LiveRaffle
+
+
+def test_users_can_only_reserve_once():
+    raffle = LiveRaffle(raffle_id=1, message_id=2)
+
+    assert raffle.reserve(10)
+    assert not raffle.reserve(10)
+    assert raffle.reserve(11)
+
+
+def test_released_users_can_enter_again():
+    raffle = LiveRaffle(raffle_id=1, message_id=2)
+    raffle.reserve(10)
+    raffle.release(10)
+
+    assert raffle.reserve(10)
+
+
+def test_closed_raffles_cannot_be_entered():
+    raffle = LiveRaffle(raffle_id=1, message_id=2)
+    raffle.accepting_entries = False
+
+    assert not raffle.reserve(10)
+
+
+def test_entries_are_counted_and_queued_in_order():
+    raffle = LiveRaffle(raffle_id=1, message_id=2)
+    for user_id, tickets in ((10, 100), (11, 150), (12, 105)):
+        raffle.reserve(user_id)
+        raffle.add_entry(user_id, tickets)
+
+    assert raffle.entry_count == 3
+    assert raffle.total_tickets == 355
+    assert raffle.take_pending() == [(10, 100), (11, 150), (12, 105)]
+    assert raffle.take_pending() == []
+
+
+def test_failed_batches_are_retried_before_newer_entries():
+    raffle = LiveRaffle(raffle_id=1, message_id=2)
+    raffle.add_entry(10, 100)
+    batch = raffle.take_pending()
+    raffle.add_entry(11, 100)
+    raffle.restore_pending(batch)
+
+    assert raffle.take_pending() == [(10, 100), (11, 100)]
+    # Counts reflect entries, not how many times they were written
+    assert raffle.entry_count == 2
@@ -0,0 +1,100 @@
+import random
+
+from models.temprole_index import TempRoleIndex
+
+
+def test_removed_only_reports_temproles_the_update_took_away():
+    index = TempRoleIndex()
+    index.add(1, user_id=10, role_id=100)
+    index.add(2, user_id=10, role_id=200)
+
+    assert index.removed(10, {100, 200, 300}, {200, 300}) == [(100, 1)]
+    assert index.removed(10, {100, 200, 300}, {100, 200}) == []
+    assert index.removed(11, {100}, set()) == []
+
+
+def test_roles_not_yet_granted_are_not_removed():
+    # set_role records the temprole before granting the role, so an update in
+    # between must not see it as removed
+    index = TempRoleIndex()
+    index.add(1, user_id=10, role_id=100)
+
+    assert index.removed(10, {300}, set()) == []
+
+
+def test_remove_forgets_the_member_once_they_hold_nothing():
+    index = TempRoleIndex()
+    index.add(1, user_id=10, role_id=100)
+    index.add(2, user_id=10, role_id=200)
+
+    assert index.remove(1)
+    assert not index.remove(1)
+    assert index.holds_any(10)
+    assert index.get(10, 100) is None
+    assert index.remove(2)
+    assert not index.holds_any(10)
+    assert len(index) == 0
+
+
+def test_adding_the_same_user_and_role_replaces_the_old_temprole():
+    index = TempRoleIndex()
+    index.add(1, user_id=10, role_id=100)
+    index.add(2, user_id=10, role_id=100)
+
+    assert index.get(10, 100) == 2
+    assert 1 not in index
+    assert len(index) == 1
+
+
+def test_replayed_member_updates_match_a_full_scan():
+    # Replays 10k member updates with temproles being set and deleted in
+    # between, checking each against a scan of every temprole row like the
+    # one check_removed_roles used to query for
+    rng = random.Random(1234)
+    roles = list(range(1_000, 1_030))
+    members = {user_id: set(rng.sample(roles, 5)) for user_id in range(2_000)}
+    rows: dict[int, tuple[int, int]] = {}
+    index = TempRoleIndex()
+    next_id = 1
+    affected_updates = 0
+
+    for _ in range(10_000):
+        user_id = rng.randrange(len(members))
+        if rng.random() < 0.05:
+            role_id = rng.choice(roles)
+            existing = index.get(user_id, role_id)
+            if existing is not None:
+                del rows[existing]
+            rows[next_id] = (user_id, role_id)
+            index.add(next_id, user_id, role_id)
+            members[user_id].add(role_id)
+            next_id += 1
+
+        before = set(members[user_id])
+        after = set(before)
+        for role_id in rng.sample(roles, 2):
+            if role_id in after:
+                after.remove(role_id)
+            else:
+                after.add(role_id)
+        members[user_id] = after
+
+        expected = sorted(
+            (role_id, id)
+            for id, (row_user_id, role_id) in rows.items()
+            if row_user_id == user_id and role_id in before - after
+        )
+        removed = index.removed(user_id, before, after)
+        assert sorted(removed) == expected
+
+        if len(removed) > 0:
+            affected_updates += 1
+        for _, id in removed:
+            del rows[id]
+            index.remove(id)
+
+    assert affected_updates > 0
+    assert len(index) == len(rows)
+    assert all(
+        index.get(user_id, role_id) == id for id, (user_id, role_id) in rows.items()
+    )
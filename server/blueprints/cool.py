@@ -10,7 +10,10 @@ cool_blueprint = Blueprint("cool", __name__)
 @cool_blueprint.route("/publish-cool", methods=["POST"])
 @token_required
 async def publish_cool():
-    valid_request = {"cool": SchemaValueType.Integer}
+    valid_request = {
+        "cool": SchemaValueType.Integer,
+        "voters": SchemaValueType.Integer,
+    }
     try:
         to_publish = await parse_body(request, valid_request)
         await sse.publish(to_publish, type=COOL_TYPE, channel=EVENTS_CHANNEL)
@@ -0,0 +1,11 @@
+from quart import Blueprint
+from server.util.token_required import token_required
+from util.metrics import CONTENT_TYPE, REGISTRY
+
+metrics_blueprint = Blueprint("metrics", __name__)
+
+
+@metrics_blueprint.route("/metrics")
+@token_required
+async def metrics():
+    return (REGISTRY.render(), 200, {"Content-Type": CONTENT_TYPE})
@@ -1,6 +1,9 @@
 from __future__ import unicode_literals
 
-from collections import OrderedDict
+from collections import OrderedDict, namedtuple
+from functools import partial
+from operator import attrgetter
+import time
 from quart import (
     Blueprint,
     make_response,
@@ -10,8 +13,10 @@ from quart import (
     stream_with_context,
 )
 from redis.asyncio import StrictRedis
-from redis.exceptions import ConnectionError
 import six
+from server.util.constants import KEEPALIVE_TYPE
+from server.util.redis_pool import InstrumentedConnectionPool
+from util.channel_hub import ChannelHub
 import logging
 
 __version__ = "1.0.0"
@@ -19,6 +24,28 @@ __version__ = "1.0.0"
 LOG = logging.getLogger(__name__)
 
 
+def parse_event_id(id):
+    """
+    Parse a Redis Stream entry ID such as ``1700000000000-0`` into a tuple
+    that orders the same way the stream does, or None if it isn't one.
+    """
+    try:
+        ms, seq = id.split("-")
+        return (int(ms), int(seq))
+    except (AttributeError, ValueError):
+        return None
+
+
+Frame = namedtuple("Frame", ["id", "order", "type", "data"])
+"""
+A published event as it is fanned out to streams. ``data`` holds the
+event's complete wire format, so each stream writes it without encoding
+anything. ``order`` is the parsed ``id``, for comparing events. Both are
+None for events sent with :meth:`~ServerSentEventsBlueprint.publish_local`,
+which are never stored.
+"""
+
+
 @six.python_2_unicode_compatible
 class Message(object):
     """
@@ -108,70 +135,237 @@ class ServerSentEventsBlueprint(Blueprint):
     and stream server-sent events.
     """
 
-    @property
-    def redis(self):
+    async def connect(self, app):
         """
-        A :class:`redis.StrictRedis` instance, configured to connect to the
-        current application's Redis server.
+        Open the application's Redis client and connection pool. Call this
+        from a :meth:`~quart.Quart.before_serving` function.
+
+        The pool opens at most ``SSE_REDIS_MAX_CONNECTIONS`` connections
+        (default 50). When all of them are in use, callers wait up to
+        ``SSE_REDIS_POOL_TIMEOUT`` seconds (default 20) for one to be
+        released.
         """
-        redis_url = current_app.config.get("SSE_REDIS_URL")
+        redis_url = app.config.get("SSE_REDIS_URL")
         if not redis_url:
-            redis_url = current_app.config.get("REDIS_URL")
+            redis_url = app.config.get("REDIS_URL")
         if not redis_url:
             raise KeyError("Must set a redis connection URL in app config.")
-        return StrictRedis.from_url(redis_url)
+        pool = InstrumentedConnectionPool.from_url(
+            redis_url,
+            max_connections=app.config.get("SSE_REDIS_MAX_CONNECTIONS", 50),
+            timeout=app.config.get("SSE_REDIS_POOL_TIMEOUT", 20),
+        )
+        client = StrictRedis(connection_pool=pool)
+        app.extensions["sse_redis"] = client
+        app.extensions["sse_hub"] = ChannelHub(
+            partial(self.redis_messages, client),
+            type_of=attrgetter("type"),
+            queue_size=app.config.get("SSE_CLIENT_QUEUE_SIZE", 100),
+        )
+
+    async def close(self, app):
+        """
+        End every open stream and close every connection in the
+        application's Redis pool. Call this from an
+        :meth:`~quart.Quart.after_serving` function.
+        """
+        hub = app.extensions.pop("sse_hub", None)
+        if hub is not None:
+            await hub.close()
+        client = app.extensions.pop("sse_redis", None)
+        if client is not None:
+            await client.connection_pool.disconnect()
+
+    @property
+    def redis(self):
+        """
+        The current application's :class:`redis.StrictRedis` client. Every
+        access shares the connection pool opened by :meth:`connect`.
+        """
+        client = current_app.extensions.get("sse_redis")
+        if client is None:
+            raise RuntimeError("Redis is not connected, call sse.connect(app) first.")
+        return client
+
+    def stream_key(self, channel):
+        """
+        The Redis Stream that stores a channel's events.
+        """
+        return "sse:{channel}".format(channel=channel)
 
-    async def publish(self, data, type=None, id=None, retry=None, channel="sse"):
+    async def publish(self, data, type=None, retry=None, channel="sse"):
         """
         Publish data as a server-sent event.
 
+        The event is appended to the channel's Redis Stream, which assigns
+        its ID. The stream keeps the latest ``SSE_RETENTION_COUNT`` events
+        (default 1000) that are at most ``SSE_RETENTION_SECONDS`` old
+        (default 3600), so that reconnecting clients can catch up.
+
         :param data: The event data. If it is not a string, it will be
             serialized to JSON using the Flask application's
             :class:`~flask.json.JSONEncoder`.
         :param type: An optional event type.
-        :param id: An optional event ID.
         :param retry: An optional integer, to specify the reconnect time for
             disconnected clients of this stream.
         :param channel: If you want to direct different events to different
             clients, you may specify a channel for this event to go to.
             Only clients listening to the same channel will receive this event.
             Defaults to "sse".
+        :returns: The event ID.
+        """
+        message = Message(data, type=type, retry=retry)
+        # Encoded once here and stored as is. The ID isn't known until the
+        # stream assigns it, so the line with it and the blank line ending
+        # the event are added as the event is read back
+        body = str(message)[:-1].encode("utf-8")
+        key = self.stream_key(channel)
+        retention_ms = current_app.config.get("SSE_RETENTION_SECONDS", 3600) * 1000
+        oldest_id = "{ms}-0".format(ms=int(time.time() * 1000 - retention_ms))
+        async with self.redis.pipeline(transaction=False) as pipe:
+            pipe.xadd(
+                key,
+                {"type": type or "", "frame": body},
+                maxlen=current_app.config.get("SSE_RETENTION_COUNT", 1000),
+                approximate=False,
+            )
+            pipe.xtrim(key, minid=oldest_id, approximate=False)
+            id, _ = await pipe.execute()
+        return id.decode()
+
+    def publish_local(self, data, type=None, channel="sse"):
+        """
+        Send data as a server-sent event to the streams connected to this
+        process, without storing it. For events that are worthless once
+        missed, such as keepalives, which would otherwise take up the
+        channel's retained events and be replayed to reconnecting clients.
+
+        The event has no ID, so clients keep the ID of the last stored event
+        they received.
+        """
+        data = str(Message(data, type=type)).encode("utf-8")
+        self.hub.publish_local(channel, Frame(None, None, type, data))
+
+    @property
+    def hub(self):
+        """
+        The current application's :class:`~util.channel_hub.ChannelHub`,
+        which shares one Redis read per channel between every stream.
         """
-        message = Message(data, type=type, id=id, retry=retry)
-        msg_json = json.dumps(message.to_dict())
-        return await self.redis.publish(channel=channel, message=msg_json)
+        hub = current_app.extensions.get("sse_hub")
+        if hub is None:
+            raise RuntimeError("Redis is not connected, call sse.connect(app) first.")
+        return hub
+
+    def _decode(self, id, fields):
+        data = fields[b"frame"] + b"id:" + id + b"\n\n"
+        id = id.decode()
+        return Frame(id, parse_event_id(id), fields[b"type"].decode() or None, data)
 
-    async def messages(self, channel="sse"):
+    async def redis_messages(self, client, channel, last=None):
         """
-        A generator of :class:`~flask_sse.Message` objects from the given channel.
+        A generator of :class:`Frame` objects appended to the given
+        channel's Redis Stream from now on. The hub runs one of these per
+        channel, so each event is read and decoded once per process.
+
+        :param last: The last :class:`Frame` read before the hub restarted
+            this subscription, to carry on from.
+        """
+        key = self.stream_key(channel)
+        if last is not None:
+            last_id = last.id
+        else:
+            # Start after the newest stored event. Every read then names the
+            # ID to read after, unlike "$", so events added between two
+            # reads aren't skipped
+            newest = await client.xrevrange(key, count=1)
+            last_id = newest[0][0] if newest else "0-0"
+        while True:
+            # Wake up now and then so a dead connection is noticed
+            response = await client.xread({key: last_id}, block=15000)
+            for _, entries in response:
+                for id, fields in entries:
+                    last_id = id
+                    yield self._decode(id, fields)
+
+    async def replay(self, channel, last_event_id):
+        """
+        Get the events still stored for a channel that came after
+        last_event_id.
+
+        :returns: A list of :class:`Frame` objects, oldest first. Empty if last_event_id is not a valid event ID.
+        """
+        if parse_event_id(last_event_id) is None:
+            return []
+        entries = await self.redis.xrange(
+            self.stream_key(channel), min="(" + last_event_id
+        )
+        return [self._decode(id, fields) for id, fields in entries]
+
+    async def messages(self, channel="sse", last_event_id=None, types=None):
+        """
+        A generator of :class:`Frame` objects from the given channel, for
+        one client.
+
+        :param last_event_id: The ID of the last event the client received.
+            If given, the events stored since then are replayed before live
+            delivery starts.
+        :param types: If given, only events of these types are sent. They
+            are filtered out by the hub, before reaching this client's queue.
         """
-        pubsub = self.redis.pubsub()
-        await pubsub.subscribe(channel)
+        hub = self.hub
+        types = frozenset(types) if types is not None else None
+        # Subscribe before reading the replay so nothing published in
+        # between is missed, then skip live events the replay already sent
+        queue = hub.subscribe(channel, types)
         try:
-            async for pubsub_message in pubsub.listen():
-                if pubsub_message["type"] == "message":
-                    msg_dict = json.loads(pubsub_message["data"])
-                    yield Message(**msg_dict)
+            last_seen = None
+            if last_event_id is not None:
+                for frame in await self.replay(channel, last_event_id):
+                    last_seen = frame.order
+                    if types is None or frame.type in types:
+                        yield frame
+            while True:
+                frame = await queue.get()
+                if frame is None:
+                    # Dropped for falling behind, or the server is stopping
+                    return
+                if (
+                    last_seen is not None
+                    and frame.order is not None
+                    and frame.order <= last_seen
+                ):
+                    continue
+                yield frame
         finally:
-            try:
-                await pubsub.unsubscribe(channel)
-            except ConnectionError:
-                pass
+            hub.unsubscribe(channel, queue)
 
     async def stream(self):
         """
-        A view function that streams server-sent events. Ignores any
-        :mailheader:`Last-Event-ID` headers in the HTTP request.
+        A view function that streams server-sent events. If the request has a
+        :mailheader:`Last-Event-ID` header, as browsers send when an
+        EventSource reconnects, the events missed since then are sent first.
         Use a "channel" query parameter to stream events from a different
-        channel than the default channel (which is "sse").
+        channel than the default channel (which is "sse"), and a
+        comma-separated "types" query parameter to only stream some types
+        of event, e.g. ``?channel=events&types=subs,subs-count``. Keepalive
+        events are always sent.
         """
         LOG.debug("Stream triggered, setting nginx headers")
         channel = request.args.get("channel") or "sse"
+        last_event_id = request.headers.get("Last-Event-ID")
+        types = None
+        if request.args.get("types"):
+            types = {type.strip() for type in request.args["types"].split(",")}
+            types.discard("")
+            types.add(KEEPALIVE_TYPE)
 
         @stream_with_context
         async def generator():
-            async for message in self.messages(channel=channel):
-                yield str(message)
+            async for frame in self.messages(
+                channel=channel, last_event_id=last_event_id, types=types
+            ):
+                yield frame.data
 
         response = await make_response(
             generator(),
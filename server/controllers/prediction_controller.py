@@ -10,7 +10,7 @@ from controllers.predictions.payout_prediction_controller import (
 )
 from config import YAMLConfig as Config
 import logging
-from db import DB
+from db import AsyncDB
 from db.models import PredictionChoice
 
 from server.models.quick_prediction import QuickPrediction
@@ -24,7 +24,7 @@ LOG = logging.getLogger(__name__)
 
 class PredictionController:
     async def create_prediction(prediction_details: QuickPrediction, client: Client):
-        if CreatePredictionController.has_ongoing_prediction(GUILD_ID):
+        if await CreatePredictionController.has_ongoing_prediction(GUILD_ID):
             LOG.info("Ongoing prediction running")
             return False
 
@@ -58,7 +58,7 @@ class PredictionController:
         return True
 
     async def close_prediction(client: Client):
-        if not DB().has_ongoing_prediction(GUILD_ID):
+        if not await AsyncDB().has_ongoing_prediction(GUILD_ID):
             return False
         LOG.info("Closing ongoing prediction")
         audit_channel = client.get_channel(PREDICTION_AUDIT_CHANNEL)
@@ -68,9 +68,13 @@ class PredictionController:
         )
 
         try:
-            prediction_id = DB().get_ongoing_prediction_id(GUILD_ID)
-            prediction_message_id = DB().get_prediction_message_id(prediction_id)
-            prediction_channel_id = DB().get_prediction_channel_id(prediction_id)
+            prediction_id = await AsyncDB().get_ongoing_prediction_id(GUILD_ID)
+            prediction_message_id = await AsyncDB().get_prediction_message_id(
+                prediction_id
+            )
+            prediction_channel_id = await AsyncDB().get_prediction_channel_id(
+                prediction_id
+            )
             prediction_message = await client.get_channel(
                 prediction_channel_id
             ).fetch_message(prediction_message_id)
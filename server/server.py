@@ -14,6 +14,7 @@ from server.blueprints.tamagachi import tamagachi_blueprint
 from server.blueprints.overlay import overlay_blueprint
 from server.blueprints.connect_four import connect_four_blueprint
 from server.blueprints.overlay_message import overlay_message_blueprint
+from server.blueprints.metrics import metrics_blueprint
 from server.util.discord_client import DISCORD_CLIENT, start_discord_client
 from server.util.keep_alive import start_keepalive
 from server.blueprints.chat import publish_chat
@@ -32,11 +33,16 @@ PUBLISH_URL = f"{get_base_url()}/publish-chat"
 discord.utils.setup_logging(level=logging.INFO, root=True)
 
 CACHE_HOST = Config.CONFIG["Server"]["Cache"]["Host"]
+CACHE_MAX_CONNECTIONS = Config.CONFIG["Server"]["Cache"]["MaxConnections"]
+EVENTS_CONFIG = Config.CONFIG["Server"]["Events"]
 AUTH_TOKEN = Config.CONFIG["Secrets"]["Server"]["Token"]
 
 app = Quart(__name__)
 app = cors(app, allow_origin="*")
 app.config["REDIS_URL"] = f"redis://{CACHE_HOST}"
+app.config["SSE_REDIS_MAX_CONNECTIONS"] = CACHE_MAX_CONNECTIONS
+app.config["SSE_RETENTION_COUNT"] = EVENTS_CONFIG["RetentionCount"]
+app.config["SSE_RETENTION_SECONDS"] = EVENTS_CONFIG["RetentionSeconds"]
 
 app.register_blueprint(sse, url_prefix="/stream")
 app.register_blueprint(prediction_blueprint)
@@ -52,6 +58,7 @@ app.register_blueprint(tamagachi_blueprint)
 app.register_blueprint(overlay_blueprint)
 app.register_blueprint(connect_four_blueprint)
 app.register_blueprint(overlay_message_blueprint)
+app.register_blueprint(metrics_blueprint)
 
 
 LOG = logging.getLogger(__name__)
@@ -59,10 +66,16 @@ LOG = logging.getLogger(__name__)
 
 @app.before_serving
 async def setup():
+    await sse.connect(app)
     Thread(target=async_setup()).start()
     Thread(target=start_listener).start()
 
 
+@app.after_serving
+async def teardown():
+    await sse.close(app)
+
+
 def async_setup():
     start_keepalive(app)
     loop = asyncio.get_event_loop()
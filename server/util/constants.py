@@ -1,5 +1,9 @@
 EVENTS_CHANNEL = "events"
 SIMPLE_CHANNEL = "simple-chat"
+
+# Sent periodically so proxies don't close idle streams
+KEEPALIVE_TYPE = "keepalive"
+
 PREDICTIONS_TYPE = "predictions"
 SUBS_TYPE = "subs"
 SUBS_COUNT_TYPE = "subs-count"
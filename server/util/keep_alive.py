@@ -1,6 +1,6 @@
 import asyncio
 import logging
-from server.util.constants import EVENTS_CHANNEL
+from server.util.constants import EVENTS_CHANNEL, KEEPALIVE_TYPE
 from quart import Quart
 from server.blueprints.sse import sse
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
@@ -10,7 +10,7 @@ logging.getLogger("apscheduler.executors.default").setLevel(logging.ERROR)
 
 async def keep_alive(app: Quart):
     async with app.app_context():
-        await sse.publish("\n\n", type="keepalive", channel=EVENTS_CHANNEL)
+        sse.publish_local("\n\n", type=KEEPALIVE_TYPE, channel=EVENTS_CHANNEL)
 
 
 def start_keepalive(app: Quart):
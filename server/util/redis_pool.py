@@ -0,0 +1,49 @@
+import time
+from redis.asyncio import BlockingConnectionPool
+from util.metrics import Counter, Gauge, Histogram
+
+REDIS_CONNECTIONS_IN_USE = Gauge(
+    "robobanana_sse_redis_connections_in_use",
+    "Redis connections checked out of the SSE pool, including subscribers",
+)
+REDIS_MAX_CONNECTIONS = Gauge(
+    "robobanana_sse_redis_max_connections",
+    "Most connections the SSE pool will open",
+)
+REDIS_CONNECTIONS_CREATED = Counter(
+    "robobanana_sse_redis_connections_created_total",
+    "Redis connections opened by the SSE pool",
+)
+REDIS_CONNECTION_WAIT_SECONDS = Histogram(
+    "robobanana_sse_redis_connection_wait_seconds",
+    "Time spent waiting for a connection from the SSE pool",
+)
+
+
+class InstrumentedConnectionPool(BlockingConnectionPool):
+    """Redis connection pool that reports its usage as metrics
+
+    When every connection is checked out, callers wait up to timeout seconds
+    for one to be released rather than opening more.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.in_use = 0
+        REDIS_MAX_CONNECTIONS.set(self.max_connections)
+        REDIS_CONNECTIONS_IN_USE.set_function(lambda: self.in_use)
+
+    def make_connection(self):
+        REDIS_CONNECTIONS_CREATED.inc()
+        return super().make_connection()
+
+    async def get_connection(self, *args, **kwargs):
+        start = time.monotonic()
+        connection = await super().get_connection(*args, **kwargs)
+        REDIS_CONNECTION_WAIT_SECONDS.observe(time.monotonic() - start)
+        self.in_use += 1
+        return connection
+
+    async def release(self, connection):
+        await super().release(connection)
+        self.in_use -= 1
@@ -0,0 +1,101 @@
+from collections import OrderedDict
+import random
+from typing import Optional
+
+
+class ActiveChatterSet:
+    """Chatters seen within a sliding window, ordered by when they were last seen
+
+    Last-seen times are kept in an OrderedDict, so touching a chatter moves it
+    to the end and the chatters that expire first are always at the front.
+    Eviction pops from the front until it reaches someone still active, which
+    only touches the entries that expired. Members are also kept in a list
+    with each one's position, so removal swaps the last member into the hole
+    and sampling picks random positions without copying the list.
+
+    Times only have to be increasing, e.g. time.monotonic().
+    """
+
+    def __init__(self, window_seconds: float):
+        """
+        Args:
+            window_seconds (float): How long a chatter stays active after
+                their last message
+        """
+        self.window_seconds = window_seconds
+        # Chatters seen at or before this are inactive, see reset
+        self.floor: Optional[float] = None
+        # user_id -> last seen, oldest first
+        self.last_seen: OrderedDict[int, float] = OrderedDict()
+        self.members: list[int] = []
+        # user_id -> index in members
+        self.positions: dict[int, int] = {}
+
+    def __len__(self) -> int:
+        return len(self.members)
+
+    def __contains__(self, user_id: int) -> bool:
+        return user_id in self.positions
+
+    def touch(self, user_id: int, now: float):
+        """Mark a chatter as seen at now"""
+        if user_id in self.positions:
+            self.last_seen.move_to_end(user_id)
+        else:
+            self.positions[user_id] = len(self.members)
+            self.members.append(user_id)
+        self.last_seen[user_id] = now
+
+    def remove(self, user_id: int) -> bool:
+        """Forget a chatter
+
+        Returns:
+            bool: False if they weren't active
+        """
+        position = self.positions.pop(user_id, None)
+        if position is None:
+            return False
+        del self.last_seen[user_id]
+        last = self.members.pop()
+        if last != user_id:
+            self.members[position] = last
+            self.positions[last] = position
+        return True
+
+    def evict(self, now: float) -> int:
+        """Remove every chatter whose window has passed
+
+        Returns:
+            int: Number of chatters removed
+        """
+        cutoff = now - self.window_seconds
+        if self.floor is not None:
+            # Everyone seen before the floor drains now, so it's only needed once
+            cutoff = max(cutoff, self.floor)
+            self.floor = None
+
+        evicted = 0
+        while len(self.last_seen) > 0:
+            user_id, last_seen = next(iter(self.last_seen.items()))
+            if last_seen > cutoff:
+                break
+            self.remove(user_id)
+            evicted += 1
+        return evicted
+
+    def reset(self, now: float):
+        """Treat everyone seen up to now as inactive
+
+        Nothing is removed here, the chatters seen before now are evicted by
+        the next call to evict along with anyone else who expired.
+        """
+        self.floor = now
+
+    def sample(self, k: int, now: float) -> list[int]:
+        """Pick k distinct active chatters uniformly at random
+
+        Raises:
+            ValueError: If fewer than k chatters are active
+        """
+        self.evict(now)
+        return [self.members[i] for i in random.sample(range(len(self.members)), k)]
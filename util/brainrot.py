@@ -0,0 +1,74 @@
+import re
+from typing import Iterable, Optional
+
+# No leet speak here. Applied after lowercasing, so final sigma is folded too
+NORMALIZE = str.maketrans(
+    {
+        "1": "i",
+        "3": "e",
+        "4": "a",
+        "5": "s",
+        "0": "o",
+        "7": "t",
+        "$": "s",
+        "|": "l",
+        "/": "l",
+        "\\": "l",
+        "*": None,
+        "ς": "σ",
+    }
+)
+
+
+def normalize(text: str) -> str:
+    return text.lower().translate(NORMALIZE)
+
+
+def term_pattern(term: str) -> str:
+    """Regex for a normalized term with every letter stretchable, e.g. "riiizzz"
+
+    l and i are interchangeable, since | and / are read as l.
+    """
+    return "".join(
+        "[li]+" if c == "l" or c == "i" else re.escape(c) + "+" for c in term
+    )
+
+
+class BrainrotMatcher:
+    """Finds the first cringe term in a message in a single pass
+
+    Every term is compiled into one alternation with a named group per term,
+    so a message is normalized once with str.translate and scanned once no
+    matter how many terms there are. A lookahead on the terms' first letters
+    lets the scan skip positions no term can start at without trying each
+    branch.
+    """
+
+    def __init__(self, terms: Iterable[str] = ()):
+        self.load(terms)
+
+    def load(self, terms: Iterable[str]):
+        """Replace the word list"""
+        # Drop blanks and duplicates, keeping the configured order
+        terms = list(dict.fromkeys(term for term in terms if normalize(term)))
+        pattern = None
+        if len(terms) > 0:
+            normalized = [normalize(term) for term in terms]
+            first_letters = {term[0] for term in normalized}
+            if first_letters & {"l", "i"}:
+                first_letters |= {"l", "i"}
+            first_letters = "".join(re.escape(c) for c in sorted(first_letters))
+            branches = "|".join(
+                f"(?P<t{i}>{term_pattern(term)})" for i, term in enumerate(normalized)
+            )
+            pattern = re.compile(f"(?=[{first_letters}])(?:{branches})")
+        self.terms, self.pattern = terms, pattern
+
+    def match(self, text: str) -> Optional[str]:
+        """Get the term that appears earliest in text, if any does"""
+        if self.pattern is None:
+            return None
+        found = self.pattern.search(normalize(text))
+        if found is None:
+            return None
+        return self.terms[int(found.lastgroup[1:])]
@@ -0,0 +1,205 @@
+import asyncio
+from contextlib import aclosing
+import logging
+from typing import AsyncIterator, Callable, Generic, Iterable, Optional, TypeVar
+from util.metrics import Counter, Gauge
+
+LOG = logging.getLogger(__name__)
+
+SSE_SUBSCRIBERS = Gauge(
+    "robobanana_sse_subscribers",
+    "Clients streaming server-sent events",
+    ["channel"],
+)
+SSE_TYPE_SUBSCRIBERS = Gauge(
+    "robobanana_sse_type_subscribers",
+    "Clients streaming each event type, * for clients streaming every type",
+    ["channel", "type"],
+)
+SSE_UPSTREAM_MESSAGES = Counter(
+    "robobanana_sse_upstream_messages_total",
+    "Messages received from the channel's single upstream subscription",
+    ["channel"],
+)
+SSE_DELIVERIES = Counter(
+    "robobanana_sse_deliveries_total",
+    "Messages queued for a client",
+    ["channel"],
+)
+SSE_SLOW_CLIENTS_DROPPED = Counter(
+    "robobanana_sse_slow_clients_dropped_total",
+    "Clients disconnected because their queue filled up",
+    ["channel"],
+)
+SSE_UPSTREAM_RESTARTS = Counter(
+    "robobanana_sse_upstream_restarts_total",
+    "Upstream subscriptions restarted after failing or ending",
+    ["channel"],
+)
+
+T = TypeVar("T")
+
+
+class ChannelHub(Generic[T]):
+    """Fans one upstream subscription per channel out to every local subscriber
+
+    The first subscriber to a channel starts a listener task that iterates
+    listen(channel, None), and the last one to leave cancels it. If the
+    upstream subscription fails it is restarted with listen(channel, last),
+    where last is the last item received, so it can resume from there. Each item is put
+    on every subscriber's queue as is, so it is only received and decoded
+    once however many clients are connected.
+
+    Subscribers can ask for only some types of item. Queues are indexed by
+    the types they asked for, so an item is only offered to the subscribers
+    that want it.
+
+    A subscriber whose queue fills up is dropped rather than holding up the
+    others, and gets None so its stream can end and the client reconnect.
+    """
+
+    def __init__(
+        self,
+        listen: Callable[[str, Optional[T]], AsyncIterator[T]],
+        type_of: Callable[[T], Optional[str]] = lambda item: None,
+        queue_size: int = 100,
+        retry_seconds: float = 1,
+    ):
+        """
+        Args:
+            listen (Callable[[str, Optional[T]], AsyncIterator[T]]):
+                Subscribes to a channel upstream and yields its decoded
+                messages, starting after the given one if it isn't None
+            type_of (Callable[[T], Optional[str]]): Gets an item's type, for
+                subscribers that filter by type
+            queue_size (int): Messages each subscriber can fall behind by
+                before being dropped
+            retry_seconds (float): Delay before restarting a failed upstream
+                subscription
+        """
+        self.listen = listen
+        self.type_of = type_of
+        self.queue_size = queue_size
+        self.retry_seconds = retry_seconds
+        # channel -> subscriber -> the types it wants, None for every type
+        self.subscribers: dict[
+            str, dict[asyncio.Queue[Optional[T]], Optional[frozenset[str]]]
+        ] = {}
+        # channel -> type -> subscribers that want it, None for every type
+        self.routes: dict[str, dict[Optional[str], set[asyncio.Queue[Optional[T]]]]] = (
+            {}
+        )
+        self.listeners: dict[str, asyncio.Task] = {}
+
+    def subscribe(
+        self, channel: str, types: Optional[Iterable[str]] = None
+    ) -> asyncio.Queue[Optional[T]]:
+        """Register a subscriber to channel
+
+        Args:
+            channel (str): Channel to subscribe to
+            types (Optional[Iterable[str]]): Only receive items of these
+                types. Defaults to every type
+
+        Returns:
+            asyncio.Queue[Optional[T]]: Receives the channel's messages, then
+                None if the subscriber was dropped or the hub closed
+        """
+        queue = asyncio.Queue(maxsize=self.queue_size)
+        types = frozenset(types) if types is not None else None
+        self.subscribers.setdefault(channel, {})[queue] = types
+        routes = self.routes.setdefault(channel, {})
+        for type in types if types is not None else (None,):
+            routes.setdefault(type, set()).add(queue)
+            SSE_TYPE_SUBSCRIBERS.inc(channel=channel, type=type or "*")
+        SSE_SUBSCRIBERS.inc(channel=channel)
+        if channel not in self.listeners:
+            self.listeners[channel] = asyncio.create_task(self._listen(channel))
+        return queue
+
+    def unsubscribe(self, channel: str, queue: asyncio.Queue[Optional[T]]):
+        """Unregister a subscriber, stopping the listener if it was the last one"""
+        subscribers = self.subscribers.get(channel)
+        if subscribers is None or queue not in subscribers:
+            return
+        types = subscribers.pop(queue)
+        routes = self.routes[channel]
+        for type in types if types is not None else (None,):
+            routes[type].remove(queue)
+            if len(routes[type]) == 0:
+                del routes[type]
+            SSE_TYPE_SUBSCRIBERS.dec(channel=channel, type=type or "*")
+        SSE_SUBSCRIBERS.dec(channel=channel)
+        if len(subscribers) == 0:
+            del self.subscribers[channel]
+            del self.routes[channel]
+            self.listeners.pop(channel).cancel()
+
+    def subscriber_count(self, channel: str, type: Optional[str] = None) -> int:
+        """Count the subscribers to channel, or the ones that receive type"""
+        if type is None:
+            return len(self.subscribers.get(channel, ()))
+        routes = self.routes.get(channel, {})
+        return len(routes.get(None, ())) + len(routes.get(type, ()))
+
+    async def _listen(self, channel: str):
+        task = asyncio.current_task()
+        last = None
+        # Cancelling can be lost if it lands while a client library is
+        # handling a connection, so the listener also stops itself once it
+        # has been replaced or its last subscriber has left
+        while self.listeners.get(channel) is task:
+            try:
+                async with aclosing(self.listen(channel, last)) as items:
+                    async for item in items:
+                        if self.listeners.get(channel) is not task:
+                            return
+                        last = item
+                        SSE_UPSTREAM_MESSAGES.inc(channel=channel)
+                        self.publish_local(channel, item)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                if self.listeners.get(channel) is not task:
+                    return
+                LOG.exception(f"Subscription to {channel} failed")
+            SSE_UPSTREAM_RESTARTS.inc(channel=channel)
+            await asyncio.sleep(self.retry_seconds)
+
+    def publish_local(self, channel: str, item: T):
+        """Queue item for every subscriber to channel that wants its type"""
+        routes = self.routes.get(channel)
+        if routes is None:
+            return
+        type = self.type_of(item)
+        subscribers = list(routes.get(None, ()))
+        if type is not None:
+            subscribers.extend(routes.get(type, ()))
+        delivered = 0
+        for queue in subscribers:
+            try:
+                queue.put_nowait(item)
+                delivered += 1
+            except asyncio.QueueFull:
+                LOG.warning(f"Dropping slow {channel} subscriber")
+                SSE_SLOW_CLIENTS_DROPPED.inc(channel=channel)
+                self.unsubscribe(channel, queue)
+                self._end(queue)
+        SSE_DELIVERIES.inc(delivered, channel=channel)
+
+    @staticmethod
+    def _end(queue: asyncio.Queue[Optional[T]]):
+        # Make room so None is the next thing the subscriber sees
+        while not queue.empty():
+            queue.get_nowait()
+        queue.put_nowait(None)
+
+    async def close(self, timeout_seconds: float = 1):
+        """Stop every listener and end every subscriber's stream"""
+        listeners = list(self.listeners.values())
+        for channel, subscribers in list(self.subscribers.items()):
+            for queue in list(subscribers):
+                self.unsubscribe(channel, queue)
+                self._end(queue)
+        if len(listeners) > 0:
+            await asyncio.wait(listeners, timeout=timeout_seconds)
@@ -0,0 +1,96 @@
+import asyncio
+import logging
+from typing import Awaitable, Callable, Optional
+from util.metrics import Counter, Gauge
+
+LOG = logging.getLogger(__name__)
+
+COOL_METER_WINDOW_SECONDS = Gauge(
+    "robobanana_cool_meter_window_seconds",
+    "How long cool meter votes are collected before being published together",
+)
+COOL_METER_VOTES_MERGED = Counter(
+    "robobanana_cool_meter_votes_merged_total",
+    "Cool meter votes folded into a published event",
+)
+COOL_METER_VOTES_DROPPED = Counter(
+    "robobanana_cool_meter_votes_dropped_total",
+    "Cool meter votes that were not published",
+    ["reason"],
+)
+COOL_METER_EVENTS = Counter(
+    "robobanana_cool_meter_events_total",
+    "Aggregated cool meter events published",
+)
+
+
+class CoolMeterAggregator:
+    """Collects cool meter votes and publishes them once per window
+
+    The first vote after a quiet period opens a window. Every vote in the
+    window is merged into a running sum, so the meter moves as far as it
+    would for separate events, and when it closes the net delta and number
+    of distinct voters are published as a single event. Nothing runs while
+    nobody is voting.
+    """
+
+    def __init__(
+        self,
+        publish: Callable[[int, int], Awaitable[None]],
+        window_seconds: float,
+    ):
+        """
+        Args:
+            publish (Callable[[int, int], Awaitable[None]]): Called with the
+                net delta and number of distinct voters of each window
+            window_seconds (float): How long to collect votes for
+        """
+        self.publish = publish
+        self.window_seconds = window_seconds
+        # Net delta, votes and voters of the window being collected
+        self.delta = 0
+        self.votes = 0
+        self.voters: set[int] = set()
+        self.flush_task: Optional[asyncio.Task] = None
+        COOL_METER_WINDOW_SECONDS.set(window_seconds)
+
+    def vote(self, user_id: int, delta: int):
+        """Add a vote to the window being collected"""
+        self.delta += delta
+        self.votes += 1
+        self.voters.add(user_id)
+        if self.flush_task is None:
+            self.flush_task = asyncio.create_task(self._flush_after_window())
+
+    async def _flush_after_window(self):
+        await asyncio.sleep(self.window_seconds)
+        self.flush_task = None
+        await self.flush()
+
+    async def flush(self):
+        """Publish the votes collected so far"""
+        delta, votes, voters = self.delta, self.votes, len(self.voters)
+        self.delta, self.votes, self.voters = 0, 0, set()
+        if votes == 0:
+            return
+
+        if delta == 0:
+            # The votes cancelled out, so there is nothing to move the meter by
+            COOL_METER_VOTES_MERGED.inc(votes)
+            return
+
+        try:
+            await self.publish(delta, voters)
+        except Exception:
+            LOG.exception(f"Failed to publish cool meter change of {delta}")
+            COOL_METER_VOTES_DROPPED.inc(votes, reason="publish_failed")
+            return
+        COOL_METER_VOTES_MERGED.inc(votes)
+        COOL_METER_EVENTS.inc()
+
+    async def close(self):
+        """Publish any open window immediately"""
+        if self.flush_task is not None:
+            self.flush_task.cancel()
+            self.flush_task = None
+        await self.flush()
@@ -0,0 +1,83 @@
+from datetime import datetime
+from heapq import heappop, heappush
+from itertools import count
+from typing import Generic, Hashable, Optional, TypeVar
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+class ExpiryHeap(Generic[K, V]):
+    """Deadlines keyed by K, soonest first
+
+    Rescheduling or cancelling a key leaves its old heap entry in place and
+    only drops it when it reaches the top, so every operation is O(log n).
+    """
+
+    def __init__(self):
+        # (deadline, sequence, key); sequence breaks ties and marks stale entries
+        self.heap: list[tuple[datetime, int, K]] = []
+        # key -> (deadline, sequence, value) for every live entry
+        self.entries: dict[K, tuple[datetime, int, V]] = {}
+        self.sequence = count()
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def __contains__(self, key: K) -> bool:
+        return key in self.entries
+
+    def schedule(self, key: K, deadline: datetime, value: V):
+        """Add a deadline, replacing any existing one for key"""
+        sequence = next(self.sequence)
+        self.entries[key] = (deadline, sequence, value)
+        heappush(self.heap, (deadline, sequence, key))
+        self._compact()
+
+    def cancel(self, key: K) -> bool:
+        """Remove key's deadline
+
+        Returns:
+            bool: True if key was scheduled
+        """
+        cancelled = self.entries.pop(key, None) is not None
+        self._compact()
+        return cancelled
+
+    def _discard_stale(self):
+        while len(self.heap) > 0:
+            _, sequence, key = self.heap[0]
+            entry = self.entries.get(key)
+            if entry is not None and entry[1] == sequence:
+                return
+            heappop(self.heap)
+
+    def next_deadline(self) -> Optional[datetime]:
+        """Get the soonest deadline, if anything is scheduled"""
+        self._discard_stale()
+        if len(self.heap) == 0:
+            return None
+        return self.heap[0][0]
+
+    def pop_due(self, now: datetime) -> list[tuple[K, V]]:
+        """Remove and return every entry with a deadline at or before now
+
+        Returns:
+            list[tuple[K, V]]: (key, value) for each due entry, soonest first
+        """
+        due = []
+        while (deadline := self.next_deadline()) is not None and deadline <= now:
+            _, _, key = heappop(self.heap)
+            _, _, value = self.entries.pop(key)
+            due.append((key, value))
+        return due
+
+    def _compact(self):
+        # Rebuild the heap once stale entries make up most of it, so keys that
+        # are rescheduled over and over don't grow it without bound
+        if len(self.heap) > 2 * len(self.entries) + 64:
+            self.heap = [
+                (deadline, sequence, key)
+                for key, (deadline, sequence, _) in self.entries.items()
+            ]
+            self.heap.sort()
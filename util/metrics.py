@@ -0,0 +1,222 @@
+from abc import ABC, abstractmethod
+from bisect import bisect_left
+from threading import Lock
+from typing import Callable, Iterable, Optional
+
+# Seconds; tuned for DB queries and HTTP calls that should take a few ms
+DEFAULT_BUCKETS = (
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels: Iterable[tuple[str, str]]) -> str:
+    rendered = ",".join(f'{name}="{_escape(str(value))}"' for name, value in labels)
+    return f"{{{rendered}}}" if rendered else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class Registry:
+    """Collection of metrics that can be rendered in the Prometheus text format"""
+
+    def __init__(self):
+        self.metrics: dict[str, "Metric"] = {}
+        self.lock = Lock()
+
+    def register(self, metric: "Metric"):
+        with self.lock:
+            if metric.name in self.metrics:
+                raise ValueError(f"Metric {metric.name} is already registered")
+            self.metrics[metric.name] = metric
+
+    def render(self) -> str:
+        """Render every registered metric
+
+        Returns:
+            str: Metrics in the Prometheus text exposition format (0.0.4)
+        """
+        with self.lock:
+            metrics = list(self.metrics.values())
+        return "".join(metric.render() for metric in metrics)
+
+
+REGISTRY = Registry()
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class Metric(ABC):
+    type = "untyped"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Iterable[str] = (),
+        registry: Optional[Registry] = REGISTRY,
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.lock = Lock()
+        if registry is not None:
+            registry.register(self)
+
+    def _key(self, labels: dict[str, str]) -> tuple[str, ...]:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(
+                f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}"
+            )
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def _labels(self, key: tuple[str, ...], *extra: tuple[str, str]) -> str:
+        return _format_labels((*zip(self.labelnames, key), *extra))
+
+    def _header(self) -> str:
+        return (
+            f"# HELP {self.name} {_escape(self.documentation)}\n"
+            f"# TYPE {self.name} {self.type}\n"
+        )
+
+    @abstractmethod
+    def render(self) -> str:
+        """Render this metric's samples, including its HELP and TYPE lines"""
+
+
+class Counter(Metric):
+    """Monotonically increasing value, e.g. number of calls"""
+
+    type = "counter"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.values: dict[tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def get(self, **labels) -> float:
+        return self.values.get(self._key(labels), 0)
+
+    def render(self) -> str:
+        with self.lock:
+            values = list(self.values.items())
+        lines = [
+            f"{self.name}{self._labels(key)} {_format_value(value)}\n"
+            for key, value in values
+        ]
+        return self._header() + "".join(lines)
+
+
+class Gauge(Metric):
+    """Value that can go up and down, e.g. queue depth"""
+
+    type = "gauge"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.values: dict[tuple[str, ...], float] = {}
+        self.functions: dict[tuple[str, ...], Callable[[], float]] = {}
+
+    def set(self, value: float, **labels):
+        key = self._key(labels)
+        with self.lock:
+            self.values[key] = value
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels):
+        self.inc(-amount, **labels)
+
+    def set_function(self, function: Callable[[], float], **labels):
+        """Read the value from function every time metrics are rendered"""
+        key = self._key(labels)
+        with self.lock:
+            self.functions[key] = function
+
+    def get(self, **labels) -> float:
+        key = self._key(labels)
+        if key in self.functions:
+            return self.functions[key]()
+        return self.values.get(key, 0)
+
+    def render(self) -> str:
+        with self.lock:
+            values = dict(self.values)
+            functions = list(self.functions.items())
+        for key, function in functions:
+            values[key] = function()
+        lines = [
+            f"{self.name}{self._labels(key)} {_format_value(value)}\n"
+            for key, value in values.items()
+        ]
+        return self._header() + "".join(lines)
+
+
+class Histogram(Metric):
+    """Distribution of observed values, e.g. latencies"""
+
+    type = "histogram"
+
+    def __init__(self, *args, buckets: Iterable[float] = DEFAULT_BUCKETS, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.buckets = tuple(sorted(buckets))
+        # key -> (per-bucket counts with a trailing +Inf bucket, sum)
+        self.values: dict[tuple[str, ...], tuple[list[int], float]] = {}
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        index = bisect_left(self.buckets, value)
+        with self.lock:
+            counts, total = self.values.get(key, (None, 0.0))
+            if counts is None:
+                counts = [0] * (len(self.buckets) + 1)
+            counts[index] += 1
+            self.values[key] = (counts, total + value)
+
+    def count(self, **labels) -> int:
+        counts, _ = self.values.get(self._key(labels), ([], 0.0))
+        return sum(counts)
+
+    def render(self) -> str:
+        with self.lock:
+            values = [
+                (key, list(counts), total)
+                for key, (counts, total) in self.values.items()
+            ]
+        lines = []
+        for key, counts, total in values:
+            cumulative = 0
+            for bound, count in zip((*self.buckets, float("inf")), counts):
+                cumulative += count
+                labels = self._labels(key, ("le", _format_value(bound)))
+                lines.append(f"{self.name}_bucket{labels} {cumulative}\n")
+            lines.append(f"{self.name}_sum{self._labels(key)} {_format_value(total)}\n")
+            lines.append(f"{self.name}_count{self._labels(key)} {cumulative}\n")
+        return self._header() + "".join(lines)
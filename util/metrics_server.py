@@ -0,0 +1,30 @@
+from aiohttp import web
+import logging
+from util.metrics import CONTENT_TYPE, REGISTRY
+
+LOG = logging.getLogger(__name__)
+
+
+async def metrics(_: web.Request) -> web.Response:
+    return web.Response(
+        body=REGISTRY.render().encode(), headers={"Content-Type": CONTENT_TYPE}
+    )
+
+
+async def start_metrics_server(host: str, port: int) -> web.AppRunner:
+    """Serve the process' metrics at http://host:port/metrics
+
+    Args:
+        host (str): Interface to bind, usually 127.0.0.1
+        port (int): Port to listen on
+
+    Returns:
+        web.AppRunner: Runner to clean up when shutting down
+    """
+    app = web.Application()
+    app.router.add_get("/metrics", metrics)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, host, port).start()
+    LOG.info(f"Serving metrics on http://{host}:{port}/metrics")
+    return runner
@@ -0,0 +1,186 @@
+import asyncio
+from dataclasses import dataclass, field
+import logging
+import random
+import time
+from typing import Optional
+from aiohttp import ClientError, ClientSession, ClientTimeout, TCPConnector
+from util.metrics import Counter, Gauge, Histogram
+
+LOG = logging.getLogger(__name__)
+
+OVERLAY_PUBLISH_SECONDS = Histogram(
+    "robobanana_overlay_publish_seconds",
+    "Time from queueing an overlay event to the server accepting it",
+    ["event"],
+)
+OVERLAY_PUBLISH_FAILURES = Counter(
+    "robobanana_overlay_publish_failures_total",
+    "Overlay events the server never accepted",
+    ["event"],
+)
+OVERLAY_PUBLISH_RETRIES = Counter(
+    "robobanana_overlay_publish_retries_total",
+    "Overlay event sends retried after a connection error or server error",
+    ["event"],
+)
+OVERLAY_PUBLISH_DROPPED = Counter(
+    "robobanana_overlay_publish_dropped_total",
+    "Overlay events dropped because the queue was full",
+    ["event"],
+)
+OVERLAY_QUEUE_DEPTH = Gauge(
+    "robobanana_overlay_queue_depth",
+    "Overlay events waiting to be sent",
+)
+
+
+@dataclass
+class OverlayEvent:
+    type: str
+    method: str
+    path: str
+    payload: dict
+    queued_at: float = field(default_factory=time.monotonic)
+
+
+class OverlayPublisher:
+    """Sends overlay events to the server from the event loop
+
+    Events are queued and sent by a fixed number of workers sharing one
+    keep-alive connection pool. publish waits for room when the queue is
+    full, so a burst slows its producers down instead of piling up. Sends
+    that fail with a connection error or a 5xx are retried with jittered
+    exponential backoff.
+
+    The session and workers are started by the first publish, since they
+    need a running event loop.
+    """
+
+    def __init__(
+        self,
+        base_url: str,
+        token: str,
+        workers: int = 4,
+        queue_size: int = 1000,
+        attempts: int = 3,
+        backoff_seconds: float = 0.25,
+        timeout_seconds: float = 5,
+    ):
+        """
+        Args:
+            base_url (str): Server URL event paths are relative to
+            token (str): Server access token
+            workers (int): Events sent concurrently, and pooled connections
+            queue_size (int): Events that can wait to be sent
+            attempts (int): Times to try sending each event
+            backoff_seconds (float): Upper bound of the first retry delay,
+                doubled for each retry after it
+            timeout_seconds (float): Time allowed for each attempt
+        """
+        self.base_url = base_url
+        self.token = token
+        self.workers = workers
+        self.queue_size = queue_size
+        self.attempts = attempts
+        self.backoff_seconds = backoff_seconds
+        self.timeout_seconds = timeout_seconds
+        self.queue: Optional[asyncio.Queue[OverlayEvent]] = None
+        self.session: Optional[ClientSession] = None
+        self.tasks: list[asyncio.Task] = []
+
+    def _start(self):
+        if self.session is not None:
+            return
+
+        self.queue = asyncio.Queue(maxsize=self.queue_size)
+        OVERLAY_QUEUE_DEPTH.set_function(self.queue.qsize)
+        self.session = ClientSession(
+            headers={"x-access-token": self.token},
+            timeout=ClientTimeout(total=self.timeout_seconds),
+            connector=TCPConnector(limit=self.workers),
+        )
+        self.tasks = [asyncio.create_task(self._work()) for _ in range(self.workers)]
+
+    async def publish(self, type: str, path: str, payload: dict, method: str = "POST"):
+        """Queue an event, waiting for room if the queue is full
+
+        Args:
+            type (str): Event type, used to label metrics
+            path (str): Server endpoint, e.g. /publish-poll
+            payload (dict): JSON body
+            method (str): HTTP method. Defaults to POST
+        """
+        self._start()
+        await self.queue.put(OverlayEvent(type, method, path, payload))
+
+    def publish_nowait(
+        self, type: str, path: str, payload: dict, method: str = "POST"
+    ) -> bool:
+        """Queue an event unless the queue is full
+
+        Returns:
+            bool: False if the event was dropped
+        """
+        self._start()
+        try:
+            self.queue.put_nowait(OverlayEvent(type, method, path, payload))
+        except asyncio.QueueFull:
+            OVERLAY_PUBLISH_DROPPED.inc(event=type)
+            LOG.warning(f"Overlay queue is full, dropped {type} event")
+            return False
+        return True
+
+    async def _work(self):
+        while True:
+            event = await self.queue.get()
+            try:
+                await self._send(event)
+            except Exception:
+                LOG.exception(f"Failed to publish {event.type} event")
+                OVERLAY_PUBLISH_FAILURES.inc(event=event.type)
+            finally:
+                self.queue.task_done()
+
+    async def _send(self, event: OverlayEvent):
+        for attempt in range(self.attempts):
+            if attempt > 0:
+                OVERLAY_PUBLISH_RETRIES.inc(event=event.type)
+                # Full jitter, so retries after a server restart don't all
+                # land at the same moment
+                delay = self.backoff_seconds * 2 ** (attempt - 1)
+                await asyncio.sleep(random.uniform(0, delay))
+
+            try:
+                async with self.session.request(
+                    event.method, self.base_url + event.path, json=event.payload
+                ) as response:
+                    if response.status == 200:
+                        OVERLAY_PUBLISH_SECONDS.observe(
+                            time.monotonic() - event.queued_at, event=event.type
+                        )
+                        return
+                    error = f"{response.status} {await response.text()}"
+                    if response.status < 500:
+                        # The server rejected the event, sending it again won't help
+                        break
+            except (ClientError, asyncio.TimeoutError) as e:
+                error = repr(e)
+
+        LOG.error(f"Failed to publish {event.type} event: {error}")
+        OVERLAY_PUBLISH_FAILURES.inc(event=event.type)
+
+    async def close(self, timeout_seconds: float = 5):
+        """Send the events still queued, then close the connection pool"""
+        if self.session is None:
+            return
+
+        try:
+            await asyncio.wait_for(self.queue.join(), timeout_seconds)
+        except asyncio.TimeoutError:
+            LOG.warning(f"Closing with {self.queue.qsize()} overlay events unsent")
+        for task in self.tasks:
+            task.cancel()
+        await self.session.close()
+        self.session = None
+        self.tasks = []
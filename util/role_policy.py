@@ -0,0 +1,115 @@
+from dataclasses import dataclass
+from typing import Iterable, Optional
+
+
+@dataclass(frozen=True)
+class RolePolicy:
+    role_ids: frozenset[int]
+    # Longest message the member may send in stream chat
+    max_length: int
+    # Channel point accrual multiplier
+    multiplier: int
+
+
+class RolePolicyIndex:
+    """Per-member chat limits and accrual multipliers
+
+    A member's policy only depends on their set of roles, so policies are
+    resolved once per distinct role set and shared by every member with that
+    set. Each member's policy is also cached by user id, and only used while
+    the member's current roles still match the ones it was resolved for, so a
+    missed or late role update can't leave a member on a stale policy.
+    """
+
+    def __init__(
+        self,
+        length_overrides: dict[int, int],
+        default_length: int,
+        multipliers: dict[int, int],
+    ):
+        """
+        Args:
+            length_overrides (dict[int, int]): Role or user ID -> max message
+                length. The highest one that applies wins
+            default_length (int): Max message length when no override applies
+            multipliers (dict[int, int]): Role ID -> accrual multiplier. The
+                highest one that applies wins, 1 if none do
+        """
+        self.length_overrides = dict(length_overrides)
+        self.default_length = default_length
+        self.multipliers = dict(multipliers)
+        # role ids -> policy, shared by every member with exactly those roles
+        self.by_roles: dict[frozenset[int], RolePolicy] = {}
+        # user_id -> policy, until the member's roles change
+        self.by_member: dict[int, RolePolicy] = {}
+
+    def _resolve(self, role_ids: frozenset[int]) -> RolePolicy:
+        lengths = [
+            self.length_overrides[id] for id in role_ids if id in self.length_overrides
+        ]
+        multipliers = [
+            self.multipliers[id] for id in role_ids if id in self.multipliers
+        ]
+        return RolePolicy(
+            role_ids=role_ids,
+            max_length=max(lengths, default=self.default_length),
+            multiplier=max(multipliers, default=1),
+        )
+
+    def for_roles(self, role_ids: Iterable[int]) -> RolePolicy:
+        """Get the policy for a set of roles, ignoring user overrides"""
+        role_ids = frozenset(role_ids)
+        policy = self.by_roles.get(role_ids)
+        if policy is None:
+            policy = self._resolve(role_ids)
+            self.by_roles[role_ids] = policy
+        return policy
+
+    def cached(
+        self, user_id: int, role_ids: Optional[Iterable[int]] = None
+    ) -> Optional[RolePolicy]:
+        """Get a member's policy if it hasn't been invalidated since last resolved
+
+        Args:
+            user_id (int): Discord user ID of the member
+            role_ids (Optional[Iterable[int]]): The member's current role IDs.
+                If given, a policy resolved for different roles is ignored
+
+        Returns:
+            Optional[RolePolicy]: The cached policy, None if there isn't a
+                current one
+        """
+        policy = self.by_member.get(user_id)
+        if policy is None or role_ids is None:
+            return policy
+        if policy.role_ids != frozenset(role_ids):
+            return None
+        return policy
+
+    def resolve(self, user_id: int, role_ids: Iterable[int]) -> RolePolicy:
+        """Resolve and cache a member's policy
+
+        Args:
+            user_id (int): Discord user ID of the member
+            role_ids (Iterable[int]): The member's role IDs
+
+        Returns:
+            RolePolicy: The member's policy, including any user override
+        """
+        policy = self.for_roles(role_ids)
+        override = self.length_overrides.get(user_id)
+        if override is not None:
+            lengths = [
+                self.length_overrides[id]
+                for id in policy.role_ids
+                if id in self.length_overrides
+            ]
+            policy = RolePolicy(
+                policy.role_ids, max(lengths + [override]), policy.multiplier
+            )
+        self.by_member[user_id] = policy
+        return policy
+
+    def invalidate(self, user_id: int):
+        """Forget a member's cached policy after their roles change"""
+        self.by_member.pop(user_id, None)
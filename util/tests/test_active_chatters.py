@@ -0,0 +1,97 @@
+import random
+import time
+
+import pytest
+
+from util.active_chatters import ActiveChatterSet
+
+
+def test_evict_only_removes_expired_chatters():
+    chatters = ActiveChatterSet(window_seconds=10)
+    chatters.touch(1, now=0)
+    chatters.touch(2, now=5)
+    chatters.touch(3, now=8)
+    # Seen again, so 1 is now the most recent
+    chatters.touch(1, now=9)
+
+    assert chatters.evict(now=15) == 1
+    assert 2 not in chatters
+    assert sorted(chatters.members) == [1, 3]
+    assert chatters.evict(now=18) == 1
+    assert chatters.members == [1]
+
+
+def test_remove_keeps_positions_consistent():
+    chatters = ActiveChatterSet(window_seconds=10)
+    for user_id in range(5):
+        chatters.touch(user_id, now=user_id)
+
+    assert chatters.remove(1)
+    assert not chatters.remove(1)
+    assert chatters.remove(4)
+    assert len(chatters) == 3
+    assert all(
+        chatters.members[position] == user_id
+        for user_id, position in chatters.positions.items()
+    )
+    assert list(chatters.last_seen) == [0, 2, 3]
+
+
+def test_reset_drops_everyone_seen_before_it():
+    chatters = ActiveChatterSet(window_seconds=300)
+    chatters.touch(1, now=0)
+    chatters.touch(2, now=1)
+    chatters.reset(now=2)
+    chatters.touch(3, now=3)
+
+    assert chatters.sample(1, now=4) == [3]
+    assert len(chatters) == 1
+    # The floor is spent, so later chatters only expire with the window
+    chatters.touch(1, now=5)
+    assert chatters.evict(now=6) == 0
+
+
+def test_sample_is_distinct_and_raises_when_too_few_are_active():
+    chatters = ActiveChatterSet(window_seconds=10)
+    for user_id in range(20):
+        chatters.touch(user_id, now=0)
+
+    assert len(set(chatters.sample(20, now=1))) == 20
+    with pytest.raises(ValueError):
+        chatters.sample(21, now=1)
+    with pytest.raises(ValueError):
+        chatters.sample(1, now=11)
+
+
+def test_sample_is_uniform():
+    random.seed(1234)
+    chatters = ActiveChatterSet(window_seconds=10)
+    for user_id in range(10):
+        chatters.touch(user_id, now=0)
+    chatters.remove(3)
+
+    counts = dict.fromkeys(chatters.members, 0)
+    for _ in range(9_000):
+        for user_id in chatters.sample(2, now=1):
+            counts[user_id] += 1
+
+    assert all(1_800 < count < 2_200 for count in counts.values())
+
+
+def test_50k_chatters_evict_in_order():
+    rng = random.Random(1234)
+    chatters = ActiveChatterSet(window_seconds=300)
+    last_seen = {}
+    start = time.perf_counter()
+    for now in range(600):
+        for user_id in rng.sample(range(50_000), 500):
+            chatters.touch(user_id, now)
+            last_seen[user_id] = now
+        chatters.evict(now)
+    elapsed = time.perf_counter() - start
+
+    active = {user_id for user_id, seen in last_seen.items() if seen > 599 - 300}
+    assert set(chatters.members) == active
+    assert len(chatters.sample(1_000, now=599)) == 1_000
+    # 300k touches, generous bound to catch accidental full scans
+    assert elapsed < 5
@@ -0,0 +1,50 @@
+from util.brainrot import BrainrotMatcher
+
+WORDS = ["sigma", "rizz", "ligma", "Σ", "erm what the", "is this real"]
+
+
+def test_matches_plain_and_stretched_terms():
+    matcher = BrainrotMatcher(WORDS)
+
+    assert matcher.match("what a sigma move") == "sigma"
+    assert matcher.match("SIGMAAAA") == "sigma"
+    assert matcher.match("he has riiiizzzz") == "rizz"
+    assert matcher.match("errrm what the heck") == "erm what the"
+
+
+def test_leet_speak_is_normalized():
+    matcher = BrainrotMatcher(WORDS)
+
+    assert matcher.match("$1gm4") == "sigma"
+    assert matcher.match("r1zz") == "rizz"
+    # | and / read as l, and l and i are interchangeable
+    assert matcher.match("|igma") == "ligma"
+    assert matcher.match("/igma") == "ligma"
+    assert matcher.match("s*i*g*m*a") == "sigma"
+
+
+def test_terms_need_every_letter():
+    matcher = BrainrotMatcher(WORDS)
+
+    assert matcher.match("riz") is None
+    assert matcher.match("stigma is bad") is None
+    assert matcher.match("good morning chat") is None
+
+
+def test_reports_the_earliest_term():
+    matcher = BrainrotMatcher(WORDS)
+
+    assert matcher.match("is this real rizz") == "is this real"
+    assert matcher.match("Σ") == "Σ"
+
+
+def test_load_replaces_the_word_list():
+    matcher = BrainrotMatcher(WORDS)
+    matcher.load(["gyat", "gyat", ""])
+
+    assert matcher.terms == ["gyat"]
+    assert matcher.match("sigma") is None
+    assert matcher.match("gyatt") == "gyat"
+
+    matcher.load([])
+    assert matcher.match("gyat") is None
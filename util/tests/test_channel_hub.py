@@ -0,0 +1,153 @@
+import asyncio
+
+from util.channel_hub import SSE_SLOW_CLIENTS_DROPPED, ChannelHub
+
+
+class Upstream:
+    """Feeds items to the hub's listeners and counts the subscriptions made"""
+
+    def __init__(self):
+        self.subscriptions: dict[str, int] = {}
+        self.queues: dict[str, asyncio.Queue] = {}
+        self.open: set[str] = set()
+        self.resumed_after: list = []
+
+    async def listen(self, channel: str, last=None):
+        self.subscriptions[channel] = self.subscriptions.get(channel, 0) + 1
+        self.resumed_after.append(last)
+        queue = self.queues.setdefault(channel, asyncio.Queue())
+        self.open.add(channel)
+        try:
+            while True:
+                item = await queue.get()
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+        finally:
+            self.open.discard(channel)
+
+    def send(self, channel: str, item):
+        self.queues.setdefault(channel, asyncio.Queue()).put_nowait(item)
+
+
+def test_200_subscribers_share_one_upstream_subscription():
+    async def run():
+        upstream = Upstream()
+        hub = ChannelHub(upstream.listen)
+        queues = [hub.subscribe("events") for _ in range(200)]
+        other = hub.subscribe("other")
+        await asyncio.sleep(0)
+
+        upstream.send("events", "hello")
+        await asyncio.sleep(0.01)
+        received = [queue.get_nowait() for queue in queues]
+        await hub.close()
+        return upstream, received, other
+
+    upstream, received, other = asyncio.run(run())
+    assert upstream.subscriptions == {"events": 1, "other": 1}
+    assert received == ["hello"] * 200
+    assert other.get_nowait() is None
+
+
+def test_last_unsubscribe_stops_the_upstream_subscription():
+    async def run():
+        upstream = Upstream()
+        hub = ChannelHub(upstream.listen)
+        first = hub.subscribe("events")
+        second = hub.subscribe("events")
+        await asyncio.sleep(0)
+
+        hub.unsubscribe("events", first)
+        hub.unsubscribe("events", first)
+        await asyncio.sleep(0)
+        still_open = "events" in upstream.open
+        hub.unsubscribe("events", second)
+        await asyncio.sleep(0)
+        return upstream, hub, still_open
+
+    upstream, hub, still_open = asyncio.run(run())
+    assert still_open
+    assert upstream.open == set()
+    assert hub.subscriber_count("events") == 0
+    assert hub.listeners == {}
+
+
+def test_slow_subscribers_are_dropped_without_holding_up_others():
+    async def run():
+        upstream = Upstream()
+        hub = ChannelHub(upstream.listen, queue_size=2)
+        dropped = SSE_SLOW_CLIENTS_DROPPED.get(channel="events")
+        slow = hub.subscribe("events")
+        fast = hub.subscribe("events")
+        await asyncio.sleep(0)
+
+        received = []
+        for i in range(5):
+            upstream.send("events", i)
+            await asyncio.sleep(0.01)
+            received.append(fast.get_nowait())
+        dropped = SSE_SLOW_CLIENTS_DROPPED.get(channel="events") - dropped
+        await hub.close()
+        return received, slow.get_nowait(), slow.empty(), dropped
+
+    received, slow_next, slow_empty, dropped = asyncio.run(run())
+    assert received == [0, 1, 2, 3, 4]
+    assert slow_next is None and slow_empty
+    assert dropped == 1
+
+
+def test_failed_upstream_subscriptions_are_restarted():
+    async def run():
+        upstream = Upstream()
+        hub = ChannelHub(upstream.listen, retry_seconds=0.01)
+        queue = hub.subscribe("events")
+        await asyncio.sleep(0)
+
+        upstream.send("events", "before")
+        upstream.send("events", ConnectionError("lost"))
+        upstream.send("events", "after")
+        received = [await asyncio.wait_for(queue.get(), 1) for _ in range(2)]
+        await hub.close()
+        return upstream, received
+
+    upstream, received = asyncio.run(run())
+    assert upstream.subscriptions == {"events": 2}
+    assert upstream.resumed_after == [None, "before"]
+    assert received == ["before", "after"]
+
+
+def test_subscribers_only_receive_the_types_they_asked_for():
+    async def run():
+        upstream = Upstream()
+        hub = ChannelHub(upstream.listen, type_of=lambda item: item[0])
+        everything = hub.subscribe("events")
+        subs = hub.subscribe("events", ["subs", "subs-count"])
+        chat = hub.subscribe("events", ["chat"])
+        await asyncio.sleep(0)
+        counts = {
+            type: hub.subscriber_count("events", type)
+            for type in ("subs", "subs-count", "chat", "cool")
+        }
+
+        for item in [("chat", 1), ("subs", 2), ("cool", 3), ("subs-count", 4)]:
+            upstream.send("events", item)
+        await asyncio.sleep(0.01)
+        received = [
+            [queue.get_nowait() for _ in range(queue.qsize())]
+            for queue in (everything, subs, chat)
+        ]
+
+        hub.unsubscribe("events", subs)
+        routes = dict(hub.routes["events"])
+        await hub.close()
+        return counts, received, routes
+
+    counts, received, routes = asyncio.run(run())
+    assert counts == {"subs": 2, "subs-count": 2, "chat": 2, "cool": 1}
+    assert received == [
+        [("chat", 1), ("subs", 2), ("cool", 3), ("subs-count", 4)],
+        [("subs", 2), ("subs-count", 4)],
+        [("chat", 1)],
+    ]
+    assert set(routes) == {None, "chat"}
@@ -0,0 +1,92 @@
+import asyncio
+
+from util.cool_meter import (
+    COOL_METER_VOTES_DROPPED,
+    COOL_METER_VOTES_MERGED,
+    CoolMeterAggregator,
+)
+
+
+def collect(window_seconds: float = 0.01):
+    published = []
+
+    async def publish(delta: int, voters: int):
+        published.append((delta, voters))
+
+    return CoolMeterAggregator(publish, window_seconds), published
+
+
+def test_votes_in_a_window_are_published_once():
+    async def run():
+        meter, published = collect()
+        meter.vote(1, 1)
+        meter.vote(2, 1)
+        meter.vote(3, -1)
+        await asyncio.sleep(0.05)
+        return published
+
+    assert asyncio.run(run()) == [(1, 3)]
+
+
+def test_every_vote_is_summed_and_each_voter_counted_once():
+    async def run():
+        meter, published = collect()
+        merged = COOL_METER_VOTES_MERGED.get()
+        for _ in range(10):
+            meter.vote(1, 1)
+        meter.vote(2, -1)
+        meter.vote(2, -1)
+        await asyncio.sleep(0.05)
+        return published, COOL_METER_VOTES_MERGED.get() - merged
+
+    published, merged = asyncio.run(run())
+    assert published == [(8, 2)]
+    assert merged == 12
+
+
+def test_later_votes_open_a_new_window():
+    async def run():
+        meter, published = collect()
+        meter.vote(1, 1)
+        await asyncio.sleep(0.05)
+        meter.vote(1, -1)
+        await asyncio.sleep(0.05)
+        return published
+
+    assert asyncio.run(run()) == [(1, 1), (-1, 1)]
+
+
+def test_cancelled_out_votes_are_not_published():
+    async def run():
+        meter, published = collect()
+        meter.vote(1, 1)
+        meter.vote(2, -1)
+        await asyncio.sleep(0.05)
+        return published
+
+    assert asyncio.run(run()) == []
+
+
+def test_close_publishes_the_open_window():
+    async def run():
+        meter, published = collect(window_seconds=60)
+        meter.vote(1, 1)
+        await meter.close()
+        return published, meter.flush_task
+
+    assert asyncio.run(run()) == ([(1, 1)], None)
+
+
+def test_failed_publishes_are_counted_as_dropped():
+    async def run():
+        async def publish(delta: int, voters: int):
+            raise ConnectionError()
+
+        meter = CoolMeterAggregator(publish, 60)
+        failed = COOL_METER_VOTES_DROPPED.get(reason="publish_failed")
+        meter.vote(1, 1)
+        meter.vote(2, 1)
+        await meter.close()
+        return COOL_METER_VOTES_DROPPED.get(reason="publish_failed") - failed
+
+    assert asyncio.run(run()) == 2
@@ -0,0 +1,80 @@
+from datetime import datetime, timedelta
+import random
+
+from util.expiry_heap import ExpiryHeap
+
+START = datetime(2024, 1, 1)
+
+
+def at(minutes: int) -> datetime:
+    return START + timedelta(minutes=minutes)
+
+
+def test_pop_due_returns_due_entries_soonest_first():
+    heap = ExpiryHeap()
+    heap.schedule("c", at(30), 3)
+    heap.schedule("a", at(10), 1)
+    heap.schedule("b", at(20), 2)
+
+    assert heap.next_deadline() == at(10)
+    assert heap.pop_due(at(20)) == [("a", 1), ("b", 2)]
+    assert heap.next_deadline() == at(30)
+    assert len(heap) == 1
+    assert heap.pop_due(at(29)) == []
+
+
+def test_rescheduling_replaces_the_old_deadline():
+    heap = ExpiryHeap()
+    heap.schedule("a", at(10), "old")
+    heap.schedule("b", at(20), "b")
+    heap.schedule("a", at(30), "new")
+
+    assert len(heap) == 2
+    assert heap.next_deadline() == at(20)
+    assert heap.pop_due(at(60)) == [("b", "b"), ("a", "new")]
+    assert heap.next_deadline() is None
+
+
+def test_cancelled_entries_are_never_returned():
+    heap = ExpiryHeap()
+    heap.schedule("a", at(10), 1)
+    heap.schedule("b", at(20), 2)
+
+    assert heap.cancel("a")
+    assert not heap.cancel("a")
+    assert "a" not in heap
+    assert heap.next_deadline() == at(20)
+    assert heap.pop_due(at(60)) == [("b", 2)]
+
+
+def test_stale_entries_do_not_accumulate():
+    heap = ExpiryHeap()
+    for minutes in range(10_000):
+        heap.schedule("a", at(minutes), minutes)
+
+    assert len(heap) == 1
+    assert len(heap.heap) < 200
+    assert heap.pop_due(at(10_000)) == [("a", 9_999)]
+
+
+def test_matches_a_sorted_reference_under_random_updates():
+    rng = random.Random(1234)
+    heap = ExpiryHeap()
+    reference = {}
+    for _ in range(5_000):
+        key = rng.randrange(100)
+        if rng.random() < 0.2:
+            assert heap.cancel(key) == (reference.pop(key, None) is not None)
+        else:
+            deadline = at(rng.randrange(1_000))
+            heap.schedule(key, deadline, deadline)
+            reference[key] = deadline
+
+    now = at(500)
+    expected = sorted(
+        (deadline, key) for key, deadline in reference.items() if deadline <= now
+    )
+    due = heap.pop_due(now)
+    assert [value for _, value in due] == sorted(value for _, value in due)
+    assert sorted((value, key) for key, value in due) == expected
+    assert len(heap) == len(reference) - len(expected)
@@ -0,0 +1,72 @@
+import pytest
+
+from util.metrics import Counter, Gauge, Histogram, Metric, Registry
+
+
+def test_counter_renders_each_label_set():
+    registry = Registry()
+    calls = Counter("calls_total", "Calls", ["method"], registry=registry)
+    calls.inc(method="a")
+    calls.inc(2, method="a")
+    calls.inc(method="b")
+
+    assert calls.get(method="a") == 3
+    assert registry.render() == (
+        "# HELP calls_total Calls\n"
+        "# TYPE calls_total counter\n"
+        'calls_total{method="a"} 3\n'
+        'calls_total{method="b"} 1\n'
+    )
+
+
+def test_histogram_buckets_are_cumulative():
+    registry = Registry()
+    latency = Histogram(
+        "latency_seconds", "Latency", buckets=(0.1, 1), registry=registry
+    )
+    for value in (0.05, 0.1, 0.5, 2):
+        latency.observe(value)
+
+    rendered = registry.render().splitlines()
+    assert 'latency_seconds_bucket{le="0.1"} 2' in rendered
+    assert 'latency_seconds_bucket{le="1"} 3' in rendered
+    assert 'latency_seconds_bucket{le="+Inf"} 4' in rendered
+    assert "latency_seconds_sum 2.65" in rendered
+    assert "latency_seconds_count 4" in rendered
+    assert latency.count() == 4
+
+
+def test_gauge_function_is_read_at_render_time():
+    registry = Registry()
+    depth = Gauge("depth", "Depth", registry=registry)
+    values = iter([1, 5])
+    depth.set_function(lambda: next(values))
+
+    assert "depth 1" in registry.render()
+    assert "depth 5" in registry.render()
+
+
+def test_label_values_are_escaped():
+    registry = Registry()
+    queries = Counter("queries_total", "Queries", ["statement"], registry=registry)
+    queries.inc(statement='SELECT "a"\n\\')
+
+    assert 'queries_total{statement="SELECT \\"a\\"\\n\\\\"} 1' in registry.render()
+
+
+def test_wrong_labels_are_rejected():
+    calls = Counter("calls_total", "Calls", ["method"], registry=None)
+    with pytest.raises(ValueError):
+        calls.inc(facade="sync")
+
+
+def test_duplicate_names_are_rejected():
+    registry = Registry()
+    Counter("calls_total", "Calls", registry=registry)
+    with pytest.raises(ValueError):
+        Counter("calls_total", "Calls", registry=registry)
+
+
+def test_metrics_must_implement_render():
+    with pytest.raises(TypeError):
+        Metric("calls_total", "Calls", registry=None)
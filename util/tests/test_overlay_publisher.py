@@ -0,0 +1,88 @@
+import asyncio
+
+import pytest
+
+web = pytest.importorskip("aiohttp.web")
+
+from util.overlay_publisher import (
+    OVERLAY_PUBLISH_FAILURES,
+    OVERLAY_PUBLISH_RETRIES,
+    OverlayPublisher,
+)
+
+
+async def serve(statuses: list[int]):
+    """Start a server answering each request with the next status in statuses"""
+    received = []
+
+    async def handle(request):
+        received.append((request.method, request.path, await request.json()))
+        status = statuses.pop(0) if len(statuses) > 0 else 200
+        return web.Response(status=status, text="")
+
+    app = web.Application()
+    app.router.add_route("*", "/{path}", handle)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = runner.addresses[0][1]
+    return runner, f"http://127.0.0.1:{port}", received
+
+
+def test_events_are_sent_in_order_over_one_worker():
+    async def run():
+        runner, url, received = await serve([])
+        publisher = OverlayPublisher(url, "token", workers=1)
+        for i in range(5):
+            await publisher.publish("poll", "/publish-poll", {"i": i})
+        await publisher.publish("overlay", "/publish-overlay", {}, method="PATCH")
+        await publisher.close()
+        await runner.cleanup()
+        return received
+
+    received = asyncio.run(run())
+    assert received[:5] == [("POST", "/publish-poll", {"i": i}) for i in range(5)]
+    assert received[5] == ("PATCH", "/publish-overlay", {})
+
+
+def test_server_errors_are_retried():
+    async def run():
+        runner, url, received = await serve([503, 500])
+        retries = OVERLAY_PUBLISH_RETRIES.get(event="sub")
+        publisher = OverlayPublisher(url, "token", attempts=3, backoff_seconds=0.01)
+        await publisher.publish("sub", "/publish-sub", {"name": "a"})
+        await publisher.close()
+        await runner.cleanup()
+        return len(received), OVERLAY_PUBLISH_RETRIES.get(event="sub") - retries
+
+    assert asyncio.run(run()) == (3, 2)
+
+
+def test_rejected_events_are_not_retried():
+    async def run():
+        runner, url, received = await serve([400])
+        failures = OVERLAY_PUBLISH_FAILURES.get(event="tts")
+        publisher = OverlayPublisher(url, "token", attempts=3, backoff_seconds=0.01)
+        await publisher.publish("tts", "/publish-streamdeck", {})
+        await publisher.close()
+        await runner.cleanup()
+        return len(received), OVERLAY_PUBLISH_FAILURES.get(event="tts") - failures
+
+    assert asyncio.run(run()) == (1, 1)
+
+
+def test_publish_nowait_drops_when_the_queue_is_full():
+    async def run():
+        # Nothing listens on the base URL, and the queue is checked before
+        # the worker gets to run
+        publisher = OverlayPublisher(
+            "http://127.0.0.1:9", "token", workers=1, queue_size=2, attempts=1
+        )
+        accepted = [
+            publisher.publish_nowait("cool", "/publish-cool", {}) for _ in range(3)
+        ]
+        await publisher.close()
+        return accepted
+
+    assert asyncio.run(run()) == [True, True, False]
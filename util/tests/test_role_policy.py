@@ -0,0 +1,65 @@
+from util.role_policy import RolePolicyIndex
+
+DEV, MOD, T1, T3 = 1, 2, 3, 4
+ETHAN = 100
+
+
+def make_index() -> RolePolicyIndex:
+    return RolePolicyIndex(
+        length_overrides={DEV: 300, MOD: 400, ETHAN: 9999},
+        default_length=200,
+        multipliers={T1: 2, T3: 4},
+    )
+
+
+def test_highest_applicable_limit_and_multiplier_win():
+    index = make_index()
+
+    assert index.resolve(10, []).max_length == 200
+    assert index.resolve(11, [DEV, MOD]).max_length == 400
+    assert index.resolve(12, [T1, T3]).multiplier == 4
+    assert index.resolve(13, [DEV]).multiplier == 1
+
+
+def test_user_overrides_apply_on_top_of_roles():
+    index = make_index()
+
+    policy = index.resolve(ETHAN, [T3])
+    assert policy.max_length == 9999
+    assert policy.multiplier == 4
+    # Members without the override sharing the role set are unaffected
+    assert index.resolve(10, [T3]).max_length == 200
+
+
+def test_policies_are_shared_by_role_set():
+    index = make_index()
+
+    first = index.resolve(10, [T1, MOD])
+    second = index.resolve(11, [MOD, T1])
+    assert first is second
+    assert len(index.by_roles) == 1
+
+
+def test_members_stay_cached_until_invalidated():
+    index = make_index()
+    index.resolve(10, [T1])
+
+    assert index.cached(10).multiplier == 2
+    index.invalidate(10)
+    assert index.cached(10) is None
+    assert index.resolve(10, [T3]).multiplier == 4
+    assert index.cached(10).role_ids == frozenset({T3})
+    index.invalidate(11)
+
+
+def test_cached_policy_is_ignored_once_roles_change():
+    index = make_index()
+    index.resolve(ETHAN, [T1])
+
+    assert index.cached(ETHAN, [T1]).max_length == 9999
+    # A role change that was never invalidated, e.g. a missed member update
+    assert index.cached(ETHAN, [T1, T3]) is None
+    policy = index.resolve(ETHAN, [T1, T3])
+    assert policy.multiplier == 4
+    assert policy.max_length == 9999
+    assert index.cached(ETHAN, [T3, T1]) is policy
@@ -0,0 +1,127 @@
+from collections import Counter
+import random
+
+import pytest
+
+from util import weighted_sampling
+from util.weighted_sampling import weighted_sample
+
+# Chi-squared critical values at p = 0.001, by degrees of freedom. Every draw
+# below is seeded, so these tests are deterministic rather than flaky at 0.1%
+CHI_SQUARED_CRITICAL = {1: 10.83, 2: 13.82, 3: 16.27, 4: 18.47}
+
+
+def chi_squared(observed: Counter, expected: dict) -> float:
+    return sum((observed[key] - value) ** 2 / value for key, value in expected.items())
+
+
+def first_pick_counts(weights: list[float], trials: int, sample=weighted_sample):
+    population = list(range(len(weights)))
+    return Counter(
+        sample(population, weights, 1, seed=seed)[0] for seed in range(trials)
+    )
+
+
+def test_first_pick_frequencies_match_weights():
+    weights = [1, 2, 3, 4, 10]
+    trials = 20_000
+    counts = first_pick_counts(weights, trials)
+
+    total = sum(weights)
+    expected = {i: trials * w / total for i, w in enumerate(weights)}
+    assert chi_squared(counts, expected) < CHI_SQUARED_CRITICAL[len(weights) - 1]
+
+
+def test_inclusion_frequencies_without_replacement():
+    # Drawing 2 of [1, 1, 2]: the heavy member is drawn first half the time,
+    # and second 2/3 of the time otherwise, so it is included 5/6 of the time
+    population = ["a", "b", "c"]
+    trials = 20_000
+    counts = Counter()
+    for seed in range(trials):
+        counts.update(weighted_sample(population, [1, 1, 2], 2, seed=seed))
+
+    expected = {"a": trials * 7 / 12, "b": trials * 7 / 12, "c": trials * 5 / 6}
+    assert sum(counts.values()) == 2 * trials
+    assert chi_squared(counts, expected) < CHI_SQUARED_CRITICAL[2]
+
+
+def test_large_ticket_counts_keep_their_odds():
+    # u ** (1 / w) rounds to 1.0 for weights this large, which made every
+    # entrant equally likely. Log-space keys only scale with the weights
+    weights = [1e9, 2e9, 3e9]
+    trials = 20_000
+    counts = first_pick_counts(weights, trials)
+
+    expected = {0: trials / 6, 1: trials / 3, 2: trials / 2}
+    assert chi_squared(counts, expected) < CHI_SQUARED_CRITICAL[2]
+
+
+def test_scaling_weights_does_not_change_a_seeded_draw():
+    population = list(range(100))
+    weights = [random.Random(i).randint(1, 500) for i in population]
+    scaled = [w * 10**12 for w in weights]
+
+    for seed in range(50):
+        assert weighted_sample(population, weights, 5, seed=seed) == weighted_sample(
+            population, scaled, 5, seed=seed
+        )
+
+
+def test_seeded_draws_are_reproducible():
+    population = list(range(1000))
+    weights = [100 + i % 7 for i in population]
+
+    first = weighted_sample(population, weights, 10, seed=1234)
+    assert weighted_sample(population, weights, 10, seed=1234) == first
+    assert weighted_sample(population, weights, 10, seed=4321) != first
+    assert len(set(first)) == 10
+
+
+def test_members_without_tickets_are_drawn_last():
+    population = ["none", "negative", "some", "more"]
+    weights = [0, -5, 1, 3]
+    for seed in range(200):
+        assert set(weighted_sample(population, weights, 2, seed=seed)) == {
+            "some",
+            "more",
+        }
+
+
+def test_draw_size_is_validated():
+    assert weighted_sample([1, 2], [1, 1], 0) == []
+    assert sorted(weighted_sample([1, 2], [1, 1], 2)) == [1, 2]
+    with pytest.raises(ValueError):
+        weighted_sample([1, 2], [1, 1], 3)
+    with pytest.raises(ValueError):
+        weighted_sample([1, 2], [1], 1)
+
+
+def test_numpy_first_pick_frequencies_match_weights():
+    pytest.importorskip("numpy")
+    weights = [1, 2, 3, 4, 10]
+    trials = 20_000
+    counts = first_pick_counts(weights, trials, weighted_sampling._sample_numpy)
+
+    total = sum(weights)
+    expected = {i: trials * w / total for i, w in enumerate(weights)}
+    assert chi_squared(counts, expected) < CHI_SQUARED_CRITICAL[len(weights) - 1]
+
+
+def test_large_draws_use_numpy_seeded_or_not(monkeypatch):
+    pytest.importorskip("numpy")
+    population = list(range(weighted_sampling.NUMPY_MIN_POPULATION))
+    weights = [1] * len(population)
+    calls = []
+    sample_numpy = weighted_sampling._sample_numpy
+    monkeypatch.setattr(
+        weighted_sampling,
+        "_sample_numpy",
+        lambda *args: calls.append(args) or sample_numpy(*args),
+    )
+
+    winners = weighted_sample(population, weights, 3)
+    assert len(set(winners)) == 3
+    seeded = weighted_sample(population, weights, 3, seed=1234)
+    assert weighted_sample(population, weights, 3, seed=1234) == seeded
+    assert len(calls) == 3
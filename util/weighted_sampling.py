@@ -0,0 +1,90 @@
+from heapq import nlargest
+from math import inf, log1p
+import random
+from typing import Optional, Sequence, TypeVar
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+T = TypeVar("T")
+
+# Below this many entrants the pure Python path is as fast as NumPy once the
+# cost of converting the inputs to arrays is counted
+NUMPY_MIN_POPULATION = 50_000
+
+
+def _key(u: float, weight: float) -> float:
+    # log(1 - u) is log of a uniform draw on (0, 1]; dividing by the weight
+    # instead of raising to 1 / weight keeps keys distinguishable for weights
+    # in the millions, where u ** (1 / weight) rounds to 1.0
+    if weight <= 0:
+        return -inf
+    return log1p(-u) / weight
+
+
+def _sample_heap(
+    population: Sequence[T], weights: Sequence[float], k: int, rng: random.Random
+) -> list[T]:
+    keys = [_key(rng.random(), weight) for weight in weights]
+    winners = nlargest(k, range(len(population)), key=keys.__getitem__)
+    return [population[i] for i in winners]
+
+
+def _sample_numpy(
+    population: Sequence[T], weights: Sequence[float], k: int, seed: Optional[int]
+) -> list[T]:
+    weights = numpy.asarray(weights, dtype=float)
+    u = numpy.random.default_rng(seed).random(len(weights))
+    keys = numpy.full(len(weights), -inf)
+    numpy.divide(numpy.log1p(-u), weights, out=keys, where=weights > 0)
+
+    # Only the k largest keys need to be ordered
+    top = numpy.argpartition(keys, len(keys) - k)[len(keys) - k :]
+    top = top[numpy.argsort(keys[top])[::-1]]
+    return [population[i] for i in top]
+
+
+def uses_numpy(population_size: int) -> bool:
+    """Check whether a draw from this many members is vectorized with NumPy"""
+    return numpy is not None and population_size >= NUMPY_MIN_POPULATION
+
+
+def weighted_sample(
+    population: Sequence[T],
+    weights: Sequence[float],
+    k: int,
+    seed: Optional[int] = None,
+) -> list[T]:
+    """Pick k distinct members of population, weighted by weights
+
+    Uses the Efraimidis-Spirakis method: every member gets the key
+    log(u) / weight for a uniform u and the k largest keys win, so a member's
+    chance of being drawn first is proportional to its weight. Members with a
+    weight of zero or less are only picked once everyone else has been.
+
+    Large draws are vectorized with NumPy when it is installed, see
+    uses_numpy. NumPy draws from a different random generator, so a seeded
+    draw only replays the same way on the path it was drawn on.
+
+    Args:
+        population (Sequence[T]): Members to draw from
+        weights (Sequence[float]): Weight of each member, e.g. raffle tickets
+        k (int): Number of members to draw
+        seed (Optional[int]): Seed for a reproducible draw, e.g. to audit a
+            raffle
+
+    Returns:
+        list[T]: The drawn members, in the order they were drawn
+    """
+    if len(population) != len(weights):
+        raise ValueError("population and weights must be the same length")
+    if k < 0 or k > len(population):
+        raise ValueError(f"Cannot draw {k} from a population of {len(population)}")
+    if k == 0:
+        return []
+
+    if uses_numpy(len(population)):
+        return _sample_numpy(population, weights, k, seed)
+    return _sample_heap(population, weights, k, random.Random(seed))
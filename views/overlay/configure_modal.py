@@ -18,7 +18,7 @@ class OverlayConfigurationModal(Modal, title="Configure overlay"):
 
     async def on_submit(self, interaction: Interaction):
         overlay_config = json.loads(self.configure_field.value)
-        OverlayController.publish_overlay(overlay_config)
+        await OverlayController.publish_overlay(overlay_config)
         await interaction.response.send_message(
             "Set configuration to provided config", ephemeral=True
         )
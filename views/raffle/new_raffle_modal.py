@@ -1,6 +1,7 @@
 from discord.ui import Modal, TextInput
 from discord import TextStyle, Interaction
 from datetime import datetime, timedelta
+from controllers.live_raffle_controller import LiveRaffleController
 from db import DB, RaffleType
 from .raffle_embed import RaffleEmbed
 from .raffle_view import RaffleView
@@ -83,7 +84,7 @@ class NewRaffleModal(Modal, title="Create VOD Review Raffle"):
         await interaction.response.send_message("Creating raffle...")
         raffle_message = await interaction.original_response()
 
-        DB().create_raffle(
+        await LiveRaffleController.start(
             guild_id=interaction.guild.id,
             message_id=raffle_message.id,
             raffle_type=self.raffle_type,
@@ -1,5 +1,6 @@
 from discord import Embed
 from datetime import datetime
+from controllers.live_raffle_controller import LiveRaffleController
 from db import DB, RaffleType
 
 
@@ -39,16 +40,18 @@ class RaffleEmbed(Embed):
         self.update_fields()
 
     def update_fields(self) -> None:
+        live_raffle = LiveRaffleController.get(self.guild_id)
+        if live_raffle is not None:
+            entry_count = live_raffle.entry_count
+            total_tickets = live_raffle.total_tickets
+        else:
+            entry_count = DB().get_raffle_entry_count(self.guild_id)
+            total_tickets = self.get_raffle_tickets()
+
         self.clear_fields()
         self.add_field(name="Raffle End", value=f"<t:{self.end_time}:R>", inline=True)
-        self.add_field(
-            name="Entries",
-            value=str(DB().get_raffle_entry_count(self.guild_id)),
-            inline=True,
-        )
-        self.add_field(
-            name="Total Tickets", value=str(self.get_raffle_tickets()), inline=True
-        )
+        self.add_field(name="Entries", value=str(entry_count), inline=True)
+        self.add_field(name="Total Tickets", value=str(total_tickets), inline=True)
         self.add_field(name="Global Odds", value=self.global_odds_str, inline=True)
         self.add_field(name="Role Odds", value=self.role_odds_str, inline=True)
 
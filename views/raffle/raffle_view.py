@@ -1,13 +1,17 @@
 from discord import ButtonStyle, Interaction
 from discord.ui import Button, View
 from datetime import datetime
+from controllers.live_raffle_controller import LiveRaffleController
 from controllers.raffle_controller import RaffleController
 from db import DB, RaffleType
 import discord
+import logging
 
 from .raffle_embed import RaffleEmbed
 from .redo_raffle_modal import RedoRaffleModal
 
+LOG = logging.getLogger(__name__)
+
 
 class RaffleView(View):
     def __init__(
@@ -51,13 +55,15 @@ class RaffleView(View):
     async def enter_raffle_onclick(self, interaction: Interaction):
         await interaction.response.defer(thinking=True, ephemeral=True)
 
-        guild_id = interaction.guild.id
-        if not DB().has_ongoing_raffle(interaction.guild.id):
+        # Entering only touches the raffle's in-memory state. The entry is
+        # written to the DB by the next flush, or when the raffle ends
+        live_raffle = LiveRaffleController.get(interaction.guild.id)
+        if live_raffle is None:
             await interaction.followup.send("This raffle is no longer active!")
             return
 
         user = interaction.user
-        if DB().get_user_raffle_entry(guild_id, user.id) is not None:
+        if not live_raffle.reserve(user.id):
             await interaction.followup.send(
                 "You have already entered this raffle!", ephemeral=True
             )
@@ -69,22 +75,27 @@ class RaffleView(View):
             and self.raffle_type != RaffleType.anyone
         ):
             eligible, ineligibility_message = RaffleController.eligible_for_raffle(
-                guild_id, user, self.raffle_type
+                user, self.raffle_type, live_raffle.recent_wins.get(user.id)
             )
             if not eligible:
+                live_raffle.release(user.id)
                 await interaction.followup.send(
                     ineligibility_message,
                     ephemeral=True,
                 )
                 return
 
-        tickets = RaffleController.get_tickets(guild_id, user, self.raffle_type)
-        DB().create_raffle_entry(guild_id, user.id, tickets)
+        tickets = RaffleController.get_tickets(
+            user,
+            self.raffle_type,
+            live_raffle.role_modifiers,
+            live_raffle.loss_streaks.get(user.id, 0),
+        )
+        live_raffle.add_entry(user.id, tickets)
 
         self.parent.update_fields()
 
-        raffle_message_id = DB().get_raffle_message_id(guild_id)
-        raffle_message = await interaction.channel.fetch_message(raffle_message_id)
+        raffle_message = await interaction.channel.fetch_message(live_raffle.message_id)
         await raffle_message.edit(embed=self.parent)
 
         await interaction.followup.send(
@@ -109,6 +120,18 @@ class RaffleView(View):
             )
             return
 
+        # Write the queued entries before showing the raffle as ended. If
+        # that fails the raffle stays open, so the mod can press End again
+        try:
+            await LiveRaffleController.close(interaction.guild.id)
+        except Exception:
+            LOG.exception(f"Failed to close raffle {raffle_message_id}")
+            await interaction.response.send_message(
+                "Failed to save the raffle entries, please try ending it again.",
+                ephemeral=True,
+            )
+            return
+
         self.enter_raffle_button.disabled = True
         self.end_raffle_button.disabled = True
         self.redo_raffle_button.disabled = False
@@ -48,7 +48,7 @@ class PendingRewardView(View):
 
     async def refund_reward_onclick(self, interaction: Interaction):
         success, new_balance = DB().deposit_points(self.user.id, self.reward.point_cost)
-        PointHistoryController.record_transaction(
+        await PointHistoryController.record_transaction(
             Transaction(
                 self.user.id,
                 self.reward.point_cost,
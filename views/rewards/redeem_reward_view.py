@@ -2,7 +2,7 @@ from discord import Client, SelectOption, Interaction
 from discord.ui import View, Select
 from controllers.point_history_controller import PointHistoryController
 
-from db import DB
+from db import AsyncDB
 from db.models import ChannelReward
 from config import YAMLConfig as Config
 from models.transaction import Transaction
@@ -54,24 +54,27 @@ class RedeemRewardView(View):
                 ephemeral=True,
             )
 
-        success, balance = DB().withdraw_points(
-            interaction.user.id, redeemed_reward.point_cost
-        )
+        async with AsyncDB().unit() as uow:
+            success, balance = await uow.withdraw_points(
+                interaction.user.id, redeemed_reward.point_cost
+            )
+            if success:
+                await PointHistoryController.record_transaction(
+                    Transaction(
+                        interaction.user.id,
+                        -redeemed_reward.point_cost,
+                        balance + redeemed_reward.point_cost,
+                        balance,
+                        "Redeemed Reward",
+                    ),
+                    uow,
+                )
+
         if not success:
             return await interaction.response.send_message(
                 "Failed to redeem reward - please try again.", ephemeral=True
             )
 
-        PointHistoryController.record_transaction(
-            Transaction(
-                interaction.user.id,
-                -redeemed_reward.point_cost,
-                self.user_points,
-                balance,
-                "Redeemed Reward",
-            )
-        )
-
         await interaction.response.send_message(
             f"Redeemed! You have {balance} points remaining.", ephemeral=True
         )
@@ -1,11 +1,9 @@
 from discord import Client, SelectOption, Interaction, TextStyle
 from discord.ui import View, Select, TextInput, Modal
+from controllers.overlay_controller import OverlayController
 from controllers.point_history_controller import PointHistoryController
 
-import requests
-from threading import Thread
-from util.server_utils import get_base_url
-from db import DB
+from db import AsyncDB
 from db.models import ChannelReward
 from config import YAMLConfig as Config
 from models.transaction import Transaction
@@ -13,9 +11,6 @@ import logging
 
 from .pending_reward_view import PendingRewardView
 
-PUBLISH_URL = f"{get_base_url()}/publish-streamdeck"
-
-AUTH_TOKEN = Config.CONFIG["Secrets"]["Server"]["Token"]
 STREAM_CHAT_ID = Config.CONFIG["Discord"]["Channels"]["Stream"]
 
 LOG = logging.getLogger(__name__)
@@ -54,33 +49,35 @@ class RedeemTTSView(Modal, title="Redeem a TTS Message"):
 
     async def on_submit(self, interaction: Interaction):
         if self.cost > 0:
-            success, balance = DB().withdraw_points(interaction.user.id, self.cost)
+            async with AsyncDB().unit() as uow:
+                success, balance = await uow.withdraw_points(
+                    interaction.user.id, self.cost
+                )
+                if success:
+                    await PointHistoryController.record_transaction(
+                        Transaction(
+                            interaction.user.id,
+                            -self.cost,
+                            balance + self.cost,
+                            balance,
+                            "TTS Redemption",
+                        ),
+                        uow,
+                    )
+
             if not success:
                 return await interaction.response.send_message(
                     "Failed to redeem reward - please try again.", ephemeral=True
                 )
-
-            PointHistoryController.record_transaction(
-                Transaction(
-                    interaction.user.id,
-                    -self.cost,
-                    self.user_points,
-                    balance,
-                    "TTS Redemption",
-                )
-            )
         else:
-            balance = DB().get_point_balance(interaction.user.id)
-
-        Thread(
-            target=publish_tts,
-            args=(
-                self.voice_id,
-                self.voice_name,
-                self.text.value,
-                interaction.user.display_name,
-            ),
-        ).start()
+            balance = self.user_points
+
+        await publish_tts(
+            self.voice_id,
+            self.voice_name,
+            self.text.value,
+            interaction.user.display_name,
+        )
 
         await interaction.response.send_message(
             f"TTS Redeemed! You have {balance} points remaining after spending {self.cost}.",
@@ -88,7 +85,9 @@ class RedeemTTSView(Modal, title="Redeem a TTS Message"):
         )
 
 
-def publish_tts(voice_id: str, voice_name: str, message: str, sender_nickname: str):
+async def publish_tts(
+    voice_id: str, voice_name: str, message: str, sender_nickname: str
+):
     payload = {
         "type": "tts",
         "voice_id": voice_id,
@@ -96,10 +95,4 @@ def publish_tts(voice_id: str, voice_name: str, message: str, sender_nickname: s
         "message": message,
         "sender_nickname": sender_nickname,
     }
-
-    response = requests.post(
-        url=PUBLISH_URL, json=payload, headers={"x-access-token": AUTH_TOKEN}
-    )
-
-    if response.status_code != 200:
-        LOG.error(f"Failed to publish tts: {response.text}")
+    await OverlayController.publish("tts", "/publish-streamdeck", payload)